@@ -1,14 +1,26 @@
 from client import Client
 from server import Server
+from server.server_manager import DEFAULT_TICK_RATE
+from server.tick_scheduler import TickScheduler
 from common import version, logging
+from common.network_manager import NetworkManager
+from common.async_network_manager import AsyncNetworkManager
+from common.idle_tracker import DEFAULT_IDLE_TIMEOUT
+from common.socket_options import SocketOptions
 
 import argparse
+import functools
 import sys
 import string
 import math
 
 DEFAULT_PORT = "3500"
 
+NETWORK_CORE_DICT = {
+    "threads": NetworkManager,
+    "asyncio": AsyncNetworkManager,
+}
+
 def command_line_interface():
     parser = argparse.ArgumentParser(prog = "asciiarena")
     parser.add_argument("--version", action = "version", version = "%(prog)s " + version.CURRENT)
@@ -21,6 +33,10 @@ def command_line_interface():
     client_parser.add_argument("--ip", required = True, help = "Server ip")
     client_parser.add_argument("--port", default = DEFAULT_PORT, type = int, help = "Server port (" + DEFAULT_PORT + " by default)")
     client_parser.add_argument("--character", default = "", help = "Player character", choices = list(string.ascii_uppercase))
+    client_parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT), help = "network implementation (threads by default)")
+    client_parser.add_argument("--udp", action = "store_true", help = "use an udp channel for frames if the server allows it")
+    client_parser.add_argument("--compression", action = "store_true", help = "compress the tcp stream with zlib")
+    add_socket_arguments(client_parser)
     client_parser.set_defaults(func = init_client)
 
     server_parser = subparsers.add_parser("server")
@@ -30,17 +46,34 @@ def command_line_interface():
     server_parser.add_argument("--log-level", default = "critical", choices = logging.LEVEL_LIST, help = "Set the log level (critical by default)")
     server_parser.add_argument("--arena-size", default = 0, type = int, help = "size of the arena")
     server_parser.add_argument("--seed", default = "", help = "map generator seed (random by default)")
+    server_parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT), help = "network implementation (threads by default)")
+    server_parser.add_argument("--udp", action = "store_true", help = "offer an udp channel to the clients for frames")
+    server_parser.add_argument("--idle-timeout", default = DEFAULT_IDLE_TIMEOUT, type = float, help = "close the connections without input for the specified seconds, 0 to disable ({} by default)".format(DEFAULT_IDLE_TIMEOUT))
+    server_parser.add_argument("--tick-rate", default = DEFAULT_TICK_RATE, type = int, help = "arena updates per second ({} by default)".format(DEFAULT_TICK_RATE))
+    server_parser.add_argument("--tick-policy", default = TickScheduler.Policy.CATCH_UP.value, choices = [policy.value for policy in TickScheduler.Policy], help = "what to do with the late ticks when the server can not keep the tick rate ({} by default)".format(TickScheduler.Policy.CATCH_UP.value))
+    add_socket_arguments(server_parser)
     server_parser.set_defaults(func = init_server)
 
     args = parser.parse_args()
     args.func(args)
 
 
+def add_socket_arguments(parser):
+    parser.add_argument("--nagle", action = "store_true", help = "enable the nagle algorithm in the tcp connections (disabled by default)")
+    parser.add_argument("--send-buffer", default = 0, type = int, help = "size in bytes of the socket send buffer (system default by default)")
+    parser.add_argument("--receive-buffer", default = 0, type = int, help = "size in bytes of the socket receive buffer (system default by default)")
+
+
+def create_network_factory(args):
+    socket_options = SocketOptions(not args.nagle, args.send_buffer, args.receive_buffer)
+    return functools.partial(NETWORK_CORE_DICT[args.network_core], datagram = args.udp, socket_options = socket_options)
+
+
 def init_client(args):
     print("Running asciiarena client...")
 
     try:
-        client = Client(args.character)
+        client = Client(args.character, create_network_factory(args), args.compression)
         client.run(args.ip, args.port)
 
     except KeyboardInterrupt:
@@ -57,7 +90,8 @@ def init_server(args):
     logging.init_logger(args.log_level)
 
     try:
-        server = Server(args.players, points, arena_size, args.seed)
+        network_factory = functools.partial(create_network_factory(args), idle_timeout = args.idle_timeout)
+        server = Server(args.players, points, arena_size, args.seed, network_factory, args.tick_rate, TickScheduler.Policy(args.tick_policy))
         server.run(args.port)
 
     except KeyboardInterrupt:
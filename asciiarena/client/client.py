@@ -2,21 +2,43 @@ from common.network_manager import NetworkManager
 from common.logging import logger
 from .client_manager import ClientManager
 
+import time
+
+RECONNECTION_ATTEMPTS = 20
+RECONNECTION_INTERVAL = 0.5 #seconds
+
 class Client:
-    def __init__(self, character):
-        self._client_manager = ClientManager(character)
+    def __init__(self, character, network_factory = NetworkManager, compression = False):
+        self._client_manager = ClientManager(character, compression)
+        self._network_factory = network_factory
 
     def run(self, ip, port):
-        network = NetworkManager(self._client_manager)
+        attempts = 0
+        while True:
+            network = self._network_factory(self._client_manager)
+
+            server = network.connect(ip, port)
+            if server:
+                print("Connected to server {}:{}".format(ip, port))
+
+                network.run()
+                lost = self._client_manager.init_communication(server)
+                network.stop()
+
+                if not lost:
+                    return
 
-        server = network.connect(ip, port)
-        if server:
-            print("Connected to server {}:{}".format(ip, port))
+                attempts = 0
+                print("Resuming the session...")
 
-            network.run()
-            self._client_manager.init_communication(server)
-            network.stop()
+            elif not self._client_manager.can_resume():
+                print("Can not connect to server {}:{}".format(ip, port))
+                return
 
-        else:
-            print("Can not connect to server {}:{}".format(ip, port))
+            else:
+                attempts += 1
+                if attempts >= RECONNECTION_ATTEMPTS:
+                    print("Can not reconnect to server {}:{}".format(ip, port))
+                    return
 
+                time.sleep(RECONNECTION_INTERVAL)
@@ -3,42 +3,65 @@ from .screen import TermScreen
 from .keyboard import Keyboard
 from .game_scene import GameScene, GameSceneEvent
 
-from common import version as Version, message as Message
+from common import version as Version, message as Message, message_codec as MessageCodec, stream_compression as StreamCompression
+from common.frame_snapshot import FrameSnapshot, SnapshotHistory
 from common.util.vec2 import Vec2
+from common.util import bit_packing as BitPacking
 
 import string
 import time
 
 class ClientManager(MessageQueue):
-    def __init__(self, character):
+    def __init__(self, character, compression):
         MessageQueue.__init__(self)
         self._character = character
+        self._compression = compression
         self._character_list = []
         self._players = 0
         self._points_to_win = 0
         self._arena_size = 0
         self._seed = ""
+        self._session_token = Message.LoginStatus.NO_SESSION_TOKEN
+        self._arena_seed = None
+        self._ground_grid = None
+        self._snapshot_history = SnapshotHistory()
+        self._last_frame_step = -1
 
 
+    def can_resume(self):
+        return Message.LoginStatus.NO_SESSION_TOKEN != self._session_token
+
+
+    # Returns True if the communication was lost and the session can be resumed.
     def init_communication(self, endpoint):
         self._attach_endpoint(endpoint)
 
         try:
-            if not self._server_info_request():
-                return
+            status = self._resume_request() if self.can_resume() else None
+
+            if None == status and not self._server_info_request():
+                return False
+
+            self._enable_ping()
+
+            if status in [None, Message.LoginStatus.INVALID_SESSION] and not self._login_request():
+                return False
 
-            if not self._login_request():
-                return
+            if Message.LoginStatus.RESUMED != status:
+                self._wait_game();
 
-            self._wait_game();
-            self._init_game();
+            self._init_game(Message.LoginStatus.RESUMED == status);
 
         except ReceiveMessageError:
             print("Unexpected disconnection")
+            return self.can_resume()
+
+        return False
 
 
     def _server_info_request(self):
-        version_message = Message.Version(Version.CURRENT)
+        compression_list = StreamCompression.PREFERENCE_LIST if self._compression else []
+        version_message = Message.Version(Version.CURRENT, MessageCodec.PREFERENCE_LIST, compression_list)
 
         self._send_message(version_message)
         checked_version_message = self._receive_message([Message.CheckedVersion])
@@ -49,6 +72,11 @@ class ClientManager(MessageQueue):
         if not compatibility:
             self._end_communication()
 
+        self._receive_game_info()
+        return compatibility
+
+
+    def _receive_game_info(self):
         game_info_message = self._receive_message([Message.GameInfo])
 
         self._character_list = game_info_message.character_list
@@ -60,7 +88,26 @@ class ClientManager(MessageQueue):
 
         print("\nGame: Points to win: {} | arena size: {} x {} | seed: {}".format(self._points_to_win, self._arena_size, self._arena_size, printable_seed))
         ClientManager._print_player_list(self._character_list, self._players)
-        return compatibility
+
+
+    # A resumed session skips the version and login round trips, and the ground download if the arena is the same.
+    def _resume_request(self):
+        compression_list = StreamCompression.PREFERENCE_LIST if self._compression else []
+        resume_message = Message.Resume(Version.CURRENT, MessageCodec.PREFERENCE_LIST, compression_list, self._session_token, self._arena_seed or "")
+
+        self._send_message(resume_message)
+        self._receive_message([Message.CheckedVersion])
+
+        login_status_message = self._receive_message([Message.LoginStatus])
+        self._session_token = login_status_message.session_token
+
+        if Message.LoginStatus.INVALID_SESSION == login_status_message.status:
+            print("      The session can not be resumed.")
+            self._receive_game_info()
+        else:
+            print("      Session resumed with character '" + self._character + "'.")
+
+        return login_status_message.status
 
 
     def _login_request(self):
@@ -72,6 +119,7 @@ class ClientManager(MessageQueue):
             self._send_message(login_message)
 
             login_status_message = self._receive_message([Message.LoginStatus])
+            self._session_token = login_status_message.session_token
 
             if Message.LoginStatus.LOGGED == login_status_message.status:
                 print("      Logged with character '" + self._character + "'.")
@@ -103,38 +151,67 @@ class ClientManager(MessageQueue):
             ClientManager._print_player_list(self._character_list, self._players)
 
 
-    def _init_game(self):
-        self._wait_to_start_game(0.20)
-        arena_info_message = self._receive_message([Message.ArenaInfo])
+    def _init_game(self, resumed):
+        if not resumed:
+            self._wait_to_start_game(0.20)
+            arena_info_message = self._receive_message([Message.ArenaInfo])
+            self._ground_grid = BitPacking.unpack(arena_info_message.ground)
+            self._arena_seed = arena_info_message.seed
 
         with TermScreen() as screen:
             keyboard = Keyboard(screen)
-            game_scene = GameScene(screen, keyboard, self._character, self._character_list, self._arena_size, arena_info_message.ground, arena_info_message.seed)
+            game_scene = GameScene(screen, keyboard, self._character, self._character_list, self._arena_size, self._ground_grid, self._arena_seed, self.get_clock_estimator())
 
+            snapshot = FrameSnapshot(0, {}, {})
+            self._snapshot_history.clear()
+            self._last_frame_step = -1
             while True:
                 frame_message = self._receive_message([Message.Frame])
+                snapshot = self._apply_frame(frame_message) or snapshot
 
                 event_list = game_scene.compute_events()
 
                 for kind, info in event_list:
                     if kind == GameSceneEvent.PLAYER_MOVEMENT:
-                        player_movement_message = Message.PlayerMovement(info)
+                        player_movement_message = Message.PlayerMovement(info, self._last_frame_step)
                         self._send_message(player_movement_message)
 
                     elif kind == GameSceneEvent.PLAYER_CAST:
-                        player_cast_message = Message.PlayerCast(info)
+                        player_cast_message = Message.PlayerCast(info, self._last_frame_step)
                         self._send_message(player_cast_message)
 
                 screen.clear()
-                game_scene.render(frame_message.entity_list, frame_message.spell_list)
+                game_scene.render(snapshot.get_entity_list(), snapshot.get_spell_list())
                 screen.draw()
 
 
+    def _apply_frame(self, frame_message):
+        if frame_message.step <= self._last_frame_step:
+            return None # Frames from the datagram channel and the stream could arrive unordered.
+
+        if Message.Frame.KEYFRAME == frame_message.base_step:
+            snapshot = FrameSnapshot.from_lists(frame_message.step, frame_message.entity_list, frame_message.spell_list)
+
+        else:
+            base = self._snapshot_history.get(frame_message.base_step)
+            if not base:
+                # The baseline is lost: request a keyframe and keep rendering the last snapshot.
+                self._send_message(Message.FrameAck(Message.Frame.KEYFRAME))
+                return None
+
+            snapshot = base.apply_frame(frame_message)
+
+        self._snapshot_history.add(snapshot)
+        self._last_frame_step = snapshot.get_step()
+        self._send_message(Message.FrameAck(snapshot.get_step()))
+        return snapshot
+
+
     def _wait_to_start_game(self, point_interval):
         print("Starting game", end = "", flush = True)
 
         last_point_time = 0
-        while 0 == self._input_queue.qsize():
+        while not self.has_input():
             current_time = time.time()
             if current_time - last_point_time > point_interval:
                 print(".", end = "", flush = True)
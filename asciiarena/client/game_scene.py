@@ -16,7 +16,7 @@ class GameSceneEvent(enum.Enum):
 
 
 class GameScene:
-    def __init__(self, screen, keyboard, character, character_list, arena_size, ground_grid, seed):
+    def __init__(self, screen, keyboard, character, character_list, arena_size, ground_grid, seed, clock_estimator):
         self._screen = screen
         self._screen.enable_fps_counter(Vec2(0, 0))
         self._keyboard = keyboard
@@ -26,7 +26,10 @@ class GameScene:
         self._arena_dimension = Vec2(arena_size, arena_size)
         self._ground_grid = ground_grid
         self._seed = seed
+        self._clock_estimator = clock_estimator
 
+        # Unknown at the start: the server releases the movement of a lost connection, so the first direction is always sent.
+        self._last_direction = None
         self._last_time_stamp_skill_key = 0
         self._skill_cast_try = False
 
@@ -38,9 +41,11 @@ class GameScene:
 
         player_event_list = []
 
+        # Only the changes are reported: the server keeps moving the player until the direction is released.
         direction = self._check_player_movement_direction()
-        if direction != Direction.NONE:
+        if direction != self._last_direction:
             player_event_list.append((GameSceneEvent.PLAYER_MOVEMENT, direction))
+            self._last_direction = direction
 
         self._skill_cast_try = False
         skill_id = self._check_player_cast_skill()
@@ -128,6 +133,8 @@ class GameScene:
     def draw_info(self):
         pencil = self._screen.create_pencil(self.get_info_origin())
         pencil.draw(Vec2(0, 0), "Seed: '{}'".format(self._seed))
+        if self._clock_estimator.has_samples():
+            pencil.draw(Vec2(0, 1), "RTT: {:.0f}ms".format(self._clock_estimator.get_rtt() * 1000))
 
 
     def get_arena_origin(self):
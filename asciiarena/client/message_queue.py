@@ -1,5 +1,10 @@
 from common.package_queue import PackageQueue, InputPack, OutputPack
+from common.clock_estimator import ClockEstimator
+from common import message as Message
 import queue
+import time
+
+PING_INTERVAL = 1.0 #seconds
 
 class ReceiveMessageError(Exception):
     pass
@@ -8,23 +13,48 @@ class MessageQueue(PackageQueue):
 
     def __init__(self):
         PackageQueue.__init__(self)
+        self._clock_estimator = ClockEstimator()
+        self._ping_enabled = False
+        self._last_ping_time_stamp = 0
+
+    def get_clock_estimator(self):
+        return self._clock_estimator
 
     def _attach_endpoint(self, endpoint):
         self._endpoint = endpoint
+        self._ping_enabled = False
+
+    # Nothing can be sent between the Version and the CheckedVersion messages, pings included.
+    def _enable_ping(self):
+        self._ping_enabled = True
 
     def _receive_message(self, message_class_list):
         while True:
-            input_pack = self._input_queue.get()
+            self._check_ping()
+            input_pack = self.dequeue_input()
             if None != input_pack.message:
+                if isinstance(input_pack.message, Message.Ping):
+                    self._send_message(Message.Pong(input_pack.message.time_stamp, time.time()))
+                    continue
+
+                if isinstance(input_pack.message, Message.Pong):
+                    self._clock_estimator.add_sample(input_pack.message.origin_time_stamp, input_pack.message.time_stamp, time.time())
+                    continue
+
                 for message_class in message_class_list:
                     if message_class == input_pack.message.__class__:
                         return input_pack.message
             else:
                 raise ReceiveMessageError()
 
+    def _check_ping(self):
+        current_time = time.time()
+        if self._ping_enabled and current_time - self._last_ping_time_stamp > PING_INTERVAL:
+            self._last_ping_time_stamp = current_time
+            self._send_message(Message.Ping(current_time))
+
     def _send_message(self, message):
-        self._output_queue.put(OutputPack(message, self._endpoint))
+        self.enqueue_output(OutputPack(message, self._endpoint))
 
     def _end_communication(self):
-        self._output_queue.put(OutputPack(None, self._endpoint))
-
+        self.enqueue_output(OutputPack(None, self._endpoint))
@@ -22,7 +22,7 @@ class TermPencil:
 
 
     def set_move(self, movement):
-        self._origin += movement
+        self._origin = self._origin + movement
 
 
     def set_color(self, color):
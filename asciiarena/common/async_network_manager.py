@@ -0,0 +1,451 @@
+from common.logging import logger
+from common.package_factory import PackageFactory
+from common.package_queue import InputPack, OutputPack
+from common.datagram_channel import DatagramChannel, HANDSHAKE_INTERVAL, HANDSHAKE_ATTEMPTS
+from common.input_limiter import InputLimiter
+from common.idle_tracker import IdleTracker, CHECK_INTERVAL
+from common.socket_options import SocketOptions
+from common import netstring as Netstring
+from common import message as Message, stream_compression as StreamCompression
+
+import asyncio
+import collections
+import threading
+
+MAX_OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+MAX_MESSAGES_PER_FLUSH = 64
+
+class AsyncNetworkManager:
+    class _ConnectionProtocol(asyncio.BufferedProtocol):
+        def __init__(self, network):
+            self._network = network
+            self._transport = None
+
+
+        def connection_made(self, transport):
+            self._transport = transport
+            self._network._register_connection(transport)
+
+
+        def get_buffer(self, size_hint):
+            return self._network._package_factory.get_input_buffer(self._transport)
+
+
+        def buffer_updated(self, size):
+            self._network._read_connection(self._transport, size)
+
+
+        def connection_lost(self, exception):
+            self._network._close_connection(self._transport)
+
+
+        def pause_writing(self):
+            self._network._paused_connection_set.add(self._transport)
+
+
+        def resume_writing(self):
+            self._network._resume_connection(self._transport)
+
+
+    class _DatagramProtocol(asyncio.DatagramProtocol):
+        def __init__(self, network):
+            self._network = network
+
+
+        def datagram_received(self, data, address):
+            self._network._read_datagram(data, address)
+
+
+    def __init__(self, package_queue, datagram = False, input_limiter = None, idle_timeout = None, socket_options = None):
+        self._loop = asyncio.new_event_loop()
+        self._package_factory = PackageFactory(input_limiter.get_max_message_size() if input_limiter else Netstring.MAX_MESSAGE_SIZE)
+        self._package_queue = package_queue
+        self._input_limiter = input_limiter
+        self._idle_tracker = IdleTracker(idle_timeout) if idle_timeout else None
+        self._socket_options = socket_options or SocketOptions()
+        self._running = False
+        self._server_list = []
+        self._connection_set = set()
+
+        # While a connection has unsent data, only its latest frame is kept: it is written when the data is sent.
+        self._paused_connection_set = set()
+        self._pending_frame_dict = {}
+        self._compressor_dict = {}
+
+        # The data of every connection is gathered while the output is processed and written at once.
+        self._pending_output_dict = {}
+
+        # The loop never waits for input slots: while the input queue is full, the input waits here in order
+        # and the connections that receive more stop reading until the server takes it.
+        self._pending_input_list = collections.deque()
+        self._reading_paused_connection_set = set()
+
+        self._datagram_enabled = datagram
+        self._datagram_transport = None
+        self._datagram_channel = DatagramChannel()
+
+        # The output is processed when it is enqueued, there is no polling.
+        self._package_queue.set_output_listener(lambda: self._loop.call_soon_threadsafe(self._process_output))
+        self._package_queue.set_input_slot_listener(lambda: self._loop.call_soon_threadsafe(self._process_pending_input))
+
+
+    def run(self):
+        self._running = True
+
+        if self._idle_tracker:
+            self._loop.call_soon(self._check_idle_connections)
+
+        self._loop_thread = threading.Thread(target = self._loop.run_forever)
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+
+
+    # Called from outside the loop: it waits until the connections are closed before closing the loop.
+    def stop(self):
+        self._running = False
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+
+
+    def is_running(self):
+        return self._running
+
+
+    def call_later(self, delay, callback):
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, callback)
+
+
+    def listen(self, port):
+        try:
+            create_server = self._loop.create_server(lambda: self._ConnectionProtocol(self), "0.0.0.0", port, reuse_address = True)
+            server = self._loop.run_until_complete(create_server)
+            for server_socket in server.sockets:
+                self._socket_options.apply(server_socket) # The accepted connections inherit the buffer sizes.
+            self._server_list.append(server)
+
+            if self._datagram_enabled:
+                self._open_datagram_transport(port)
+
+            logger.info("Listening on port: {}".format(port))
+            return server
+
+        except OSError as error:
+            logger.critical("Problem initializing the server on port {}, error: {}".format(port, error.errno))
+            if(98 == error.errno):
+                logger.critical("Port {} is already in use".format(port))
+            return None
+
+
+    def connect(self, ip, port):
+        try:
+            create_connection = self._loop.create_connection(lambda: self._ConnectionProtocol(self), ip, port)
+            connection, protocol = self._loop.run_until_complete(create_connection)
+
+            if self._datagram_enabled:
+                self._open_datagram_transport(0)
+
+            logger.info("New connection to {}:{}".format(ip, port))
+            return connection
+
+        except OSError as error:
+            logger.critical("Can not connect to {}:{}, error: {}".format(ip, port, error.errno))
+            return None
+
+
+    async def _shutdown(self):
+        for server in self._server_list:
+            server.close()
+
+        if self._datagram_transport:
+            self._datagram_transport.close()
+
+        for connection in list(self._connection_set):
+            connection.abort()
+
+        # abort() only schedules the close of the socket: connection_lost() is called when it has been done.
+        while self._connection_set:
+            await asyncio.sleep(0)
+
+        for server in self._server_list:
+            await server.wait_closed()
+
+
+    def _process_output(self):
+        # All the messages already queued are gathered before flushing: each connection is written once per flush.
+        for buffered_messages in range(MAX_MESSAGES_PER_FLUSH):
+            output_pack = self._package_queue.dequeue_output()
+            if not output_pack:
+                break
+
+            if output_pack.message:
+                output_pack = self._process_output_datagrams(output_pack)
+                for data, connection in self._package_factory.process_output_package(output_pack):
+                    if connection not in self._connection_set:
+                        continue
+
+                    if connection.get_write_buffer_size() + len(data) > MAX_OUTPUT_BUFFER_SIZE:
+                        logger.warning("Output buffer overflow, the connection is too slow")
+                        connection.abort()
+                        continue
+
+                    if isinstance(output_pack.message, Message.Frame) and connection in self._paused_connection_set:
+                        if connection in self._pending_frame_dict:
+                            self._package_queue.get_counters().add("frames_replaced_in_buffer")
+                        self._pending_frame_dict[connection] = data
+                    else:
+                        self._write(connection, data)
+
+                    ip, port = connection.get_extra_info("peername")
+                    logger.debug_message("Message - {} - to {}:{}".format(output_pack.message.__class__.__name__, ip, port))
+                    self._check_datagram_offer(output_pack.message, connection)
+                    self._check_handshake(output_pack.message, connection)
+            else:
+                for connection in output_pack.endpoint_list:
+                    if connection in self._connection_set:
+                        self._flush(connection)
+                        connection.close()
+
+        else:
+            self._loop.call_soon(self._process_output) # The rest of the queue is processed after the other events.
+
+        self._flush_all()
+
+
+    def _write(self, connection, data):
+        self._pending_output_dict.setdefault(connection, []).append(data)
+
+
+    def _flush(self, connection):
+        data_list = self._pending_output_dict.pop(connection, None)
+        if not data_list or connection.is_closing():
+            return
+
+        data = b"".join(data_list)
+        compressor = self._compressor_dict.get(connection)
+        if compressor:
+            data = compressor.compress(data)
+        connection.write(data)
+
+
+    def _flush_all(self):
+        if self._pending_output_dict:
+            self._package_queue.get_counters().add("output_flushes", len(self._pending_output_dict))
+
+        for connection in list(self._pending_output_dict):
+            self._flush(connection)
+
+
+    def _check_handshake(self, message, connection):
+        # As the codec, the compression starts after the CheckedVersion message in both directions.
+        if isinstance(message, Message.CheckedVersion):
+            self._flush(connection)
+            compressor = StreamCompression.create_compressor(message.compression)
+            if compressor:
+                self._compressor_dict[connection] = compressor
+            if self._idle_tracker:
+                self._idle_tracker.notify_handshake(connection)
+
+
+    def _send_heartbeat(self, connection, request):
+        output_pack = OutputPack(Message.Heartbeat(request), connection)
+        for data, endpoint in self._package_factory.process_output_package(output_pack):
+            self._write(endpoint, data)
+            self._flush(endpoint)
+
+
+    def _check_idle_connections(self):
+        heartbeat_list, idle_list = self._idle_tracker.check()
+        for connection in heartbeat_list:
+            if connection in self._connection_set:
+                self._send_heartbeat(connection, True)
+
+        for connection in idle_list:
+            logger.info("Idle connection timeout, closing the connection")
+            self._package_queue.get_counters().add("connections_dropped_idle")
+            connection.abort()
+            self._close_connection(connection)
+
+        self._loop.call_later(CHECK_INTERVAL, self._check_idle_connections)
+
+
+    def _register_connection(self, connection):
+        self._connection_set.add(connection)
+        connection.set_write_buffer_limits(high = 0)
+        self._socket_options.apply(connection.get_extra_info("socket"))
+        if self._idle_tracker:
+            self._idle_tracker.track(connection)
+
+        ip, port = connection.get_extra_info("peername")
+        logger.debug("New connection to {}:{}".format(ip, port))
+
+
+    def _resume_connection(self, connection):
+        self._paused_connection_set.discard(connection)
+        data = self._pending_frame_dict.pop(connection, None)
+        if data:
+            self._write(connection, data)
+            self._flush(connection)
+
+
+    def _read_connection(self, connection, size):
+        try:
+            input_pack_list = self._package_factory.create_input_packages(size, connection)
+        except:
+            self._package_queue.get_counters().add("connections_dropped_invalid_input")
+            connection.abort()
+            return
+
+        if self._idle_tracker:
+            self._idle_tracker.notify_input(connection)
+
+        ip, port = connection.get_extra_info("peername")
+        for input_pack in input_pack_list:
+            logger.debug_message("Message - {} - from {}:{}".format(input_pack.message.__class__.__name__, ip, port))
+            if not self._check_input_limits(input_pack):
+                if connection.is_closing():
+                    return # Closed by flood
+            elif isinstance(input_pack.message, Message.UdpChannel):
+                self._open_datagram_channel(input_pack.message.token, connection)
+            elif isinstance(input_pack.message, Message.Heartbeat):
+                if input_pack.message.request:
+                    self._send_heartbeat(connection, False)
+            else:
+                self._check_handshake(input_pack.message, connection)
+                self._enqueue_input(input_pack)
+
+        if self._pending_input_list and not connection.is_closing():
+            connection.pause_reading()
+            self._reading_paused_connection_set.add(connection)
+
+
+    def _enqueue_input(self, input_pack):
+        if self._pending_input_list or not self._package_queue.try_enqueue_input(input_pack):
+            self._pending_input_list.append(input_pack)
+
+
+    def _process_pending_input(self):
+        while self._pending_input_list:
+            if not self._package_queue.try_enqueue_input(self._pending_input_list[0]):
+                return # Called again when an input slot is released
+
+            self._pending_input_list.popleft()
+
+        for connection in self._reading_paused_connection_set:
+            if not connection.is_closing():
+                connection.resume_reading()
+        self._reading_paused_connection_set.clear()
+
+
+    def _check_input_limits(self, input_pack):
+        if not self._input_limiter:
+            return True
+
+        verdict = self._input_limiter.check(input_pack.message, input_pack.endpoint)
+        if InputLimiter.Verdict.THROTTLE == verdict:
+            self._package_queue.get_counters().add("input_throttled_{}".format(input_pack.message.__class__.__name__))
+            return False
+
+        if InputLimiter.Verdict.DISCONNECT == verdict:
+            logger.warning("Input flood from {}:{}, closing the connection".format(*input_pack.endpoint.get_extra_info("peername")))
+            self._package_queue.get_counters().add("connections_dropped_flood")
+            input_pack.endpoint.abort()
+            return False
+
+        return True
+
+
+    def _open_datagram_transport(self, port):
+        create_endpoint = self._loop.create_datagram_endpoint(lambda: self._DatagramProtocol(self), local_addr = ("0.0.0.0", port))
+        self._datagram_transport, protocol = self._loop.run_until_complete(create_endpoint)
+
+
+    def _check_datagram_offer(self, message, connection):
+        # After the login, the server offers the datagram channel to the client through the stream.
+        if self._datagram_transport and isinstance(message, Message.LoginStatus):
+            if message.status in [Message.LoginStatus.LOGGED, Message.LoginStatus.RECONNECTION, Message.LoginStatus.RESUMED]:
+                token = self._datagram_channel.create_token(connection)
+                output_pack = OutputPack(Message.UdpChannel(token), connection)
+                for data, endpoint in self._package_factory.process_output_package(output_pack):
+                    self._write(endpoint, data)
+
+
+    def _open_datagram_channel(self, token, connection):
+        if self._datagram_transport:
+            self._datagram_channel.open(connection, token, connection.get_extra_info("peername"))
+            self._send_datagram_handshakes(HANDSHAKE_ATTEMPTS)
+
+
+    def _send_datagram_handshakes(self, attempts):
+        for datagram, address in self._datagram_channel.create_handshake_list():
+            self._datagram_transport.sendto(datagram, address)
+
+        if attempts > 1:
+            self._loop.call_later(HANDSHAKE_INTERVAL, self._send_datagram_handshakes, attempts - 1)
+
+
+    def _process_output_datagrams(self, output_pack):
+        stream_endpoint_list = []
+        datagram_endpoint_list = []
+        for endpoint in output_pack.endpoint_list:
+            if self._datagram_channel.accepts(output_pack.message, endpoint):
+                datagram_endpoint_list.append(endpoint)
+            else:
+                stream_endpoint_list.append(endpoint)
+
+        if not datagram_endpoint_list:
+            return output_pack
+
+        for message_data, endpoint in self._package_factory.process_output_datagrams(output_pack.message, datagram_endpoint_list):
+            datagram, address = self._datagram_channel.create_datagram(endpoint, message_data)
+            if datagram:
+                self._datagram_transport.sendto(datagram, address)
+            else:
+                stream_endpoint_list.append(endpoint) # Too big for a datagram
+
+        return OutputPack(output_pack.message, stream_endpoint_list)
+
+
+    def _read_datagram(self, data, address):
+        endpoint, message_data, reply = self._datagram_channel.process_datagram(data, address)
+        if reply:
+            self._datagram_transport.sendto(reply, address)
+
+        if endpoint in self._connection_set:
+            if self._idle_tracker:
+                self._idle_tracker.notify_input(endpoint)
+
+            try:
+                input_pack = self._package_factory.create_input_datagram(message_data, endpoint)
+            except:
+                return # Corrupted datagram
+
+            if not self._check_input_limits(input_pack):
+                return
+
+            # Unlike the streams, the datagrams can not be paused: they are dropped while the input queue is full.
+            if self._pending_input_list or not self._package_queue.try_enqueue_input(input_pack):
+                self._package_queue.get_counters().add("input_datagrams_dropped")
+
+
+    def _close_connection(self, connection):
+        if connection not in self._connection_set:
+            return
+
+        self._connection_set.remove(connection)
+        self._paused_connection_set.discard(connection)
+        self._reading_paused_connection_set.discard(connection)
+        self._pending_frame_dict.pop(connection, None)
+        self._pending_output_dict.pop(connection, None)
+        self._compressor_dict.pop(connection, None)
+        self._datagram_channel.remove(connection)
+        if self._input_limiter:
+            self._input_limiter.untrack_endpoint(connection)
+        if self._idle_tracker:
+            self._idle_tracker.untrack(connection)
+        self._enqueue_input(InputPack(None, connection))
+        self._package_factory.untrack_endpoint(connection)
+
+        ip, port = connection.get_extra_info("peername")
+        logger.debug("Connection closed with {}:{}".format(ip, port))
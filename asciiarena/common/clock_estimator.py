@@ -0,0 +1,48 @@
+import collections
+
+SAMPLE_WINDOW_SIZE = 16
+RTT_SMOOTHING = 0.125
+
+
+class ClockEstimator:
+    def __init__(self):
+        self._sample_list = collections.deque(maxlen = SAMPLE_WINDOW_SIZE)
+        self._rtt = None
+
+
+    def has_samples(self):
+        return None != self._rtt
+
+
+    def add_sample(self, origin_time_stamp, remote_time_stamp, time_stamp):
+        rtt = max(0, time_stamp - origin_time_stamp)
+        offset = remote_time_stamp - (origin_time_stamp + rtt / 2)
+        self._sample_list.append((rtt, offset))
+
+        if None == self._rtt:
+            self._rtt = rtt
+        else:
+            self._rtt += RTT_SMOOTHING * (rtt - self._rtt)
+
+
+    # Smoothed round trip time in seconds.
+    def get_rtt(self):
+        return self._rtt or 0
+
+
+    # Remote clock minus local clock in seconds.
+    # The sample with the lowest rtt of the window is the one with the lowest queuing error.
+    def get_offset(self):
+        if not self._sample_list:
+            return 0
+
+        rtt, offset = min(self._sample_list)
+        return offset
+
+
+    def to_remote_time(self, time_stamp):
+        return time_stamp + self.get_offset()
+
+
+    def format(self):
+        return "rtt: {:.2f}ms, offset: {:.2f}ms".format(self.get_rtt() * 1000, self.get_offset() * 1000)
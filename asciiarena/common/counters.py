@@ -0,0 +1,34 @@
+import threading
+
+class Counters:
+    def __init__(self):
+        self._counter_dict = {}
+        self._mutex = threading.Lock()
+
+
+    def add(self, name, value = 1):
+        with self._mutex:
+            self._counter_dict[name] = self._counter_dict.get(name, 0) + value
+
+
+    def update_max(self, name, value):
+        with self._mutex:
+            self._counter_dict[name] = max(self._counter_dict.get(name, value), value)
+
+
+    def get(self, name):
+        return self._counter_dict.get(name, 0)
+
+
+    def get_dict(self):
+        with self._mutex:
+            return dict(self._counter_dict)
+
+
+    def format(self):
+        return ", ".join("{}: {}".format(name, Counters._format_value(value)) for name, value in sorted(self.get_dict().items()))
+
+
+    @staticmethod
+    def _format_value(value):
+        return "{:.2f}".format(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,134 @@
+from common import message as Message
+
+import secrets
+import struct
+import threading
+import time
+
+# The player input is sent only when it changes: it must not be lost.
+UNRELIABLE_MESSAGE_LIST = [Message.Frame]
+MAX_DATAGRAM_SIZE = 1200
+HANDSHAKE_INTERVAL = 0.25 #seconds
+HANDSHAKE_ATTEMPTS = 10
+
+_SEQUENCE = struct.Struct("<I")
+_HANDSHAKE = struct.Struct("<IQ")
+_HANDSHAKE_SEQUENCE = 0
+
+class DatagramChannel:
+    class Peer:
+        def __init__(self, token, address, initiator):
+            self.token = token
+            self.address = address
+            self.initiator = initiator
+            self.active = False
+            self.output_sequence = _HANDSHAKE_SEQUENCE
+            self.input_sequence = _HANDSHAKE_SEQUENCE
+            self.handshake_attempts = 0
+            self.handshake_time_stamp = 0
+
+
+    def __init__(self):
+        self._peer_dict = {}
+        self._token_dict = {}
+        self._address_dict = {}
+        self._mutex = threading.Lock()
+
+
+    def create_token(self, endpoint):
+        with self._mutex:
+            token = secrets.randbits(64)
+            self._peer_dict[endpoint] = DatagramChannel.Peer(token, None, False)
+            self._token_dict[token] = endpoint
+            return token
+
+
+    def open(self, endpoint, token, address):
+        with self._mutex:
+            self._peer_dict[endpoint] = DatagramChannel.Peer(token, address, True)
+            self._token_dict[token] = endpoint
+            self._address_dict[address] = endpoint
+
+
+    def remove(self, endpoint):
+        with self._mutex:
+            peer = self._peer_dict.pop(endpoint, None)
+            if peer:
+                self._token_dict.pop(peer.token, None)
+                self._address_dict.pop(peer.address, None)
+
+
+    def is_active(self, endpoint):
+        peer = self._peer_dict.get(endpoint)
+        return peer != None and peer.active
+
+
+    def accepts(self, message, endpoint):
+        return message.__class__ in UNRELIABLE_MESSAGE_LIST and self.is_active(endpoint)
+
+
+    def create_datagram(self, endpoint, message_data):
+        with self._mutex:
+            peer = self._peer_dict.get(endpoint)
+            if not peer or not peer.active or _SEQUENCE.size + len(message_data) > MAX_DATAGRAM_SIZE:
+                return None, None
+
+            peer.output_sequence += 1
+            return _SEQUENCE.pack(peer.output_sequence) + message_data, peer.address
+
+
+    def create_handshake_list(self):
+        handshake_list = []
+        current_time = time.time()
+        with self._mutex:
+            for peer in self._peer_dict.values():
+                if peer.initiator and not peer.active and peer.handshake_attempts < HANDSHAKE_ATTEMPTS:
+                    if current_time - peer.handshake_time_stamp > HANDSHAKE_INTERVAL:
+                        peer.handshake_attempts += 1
+                        peer.handshake_time_stamp = current_time
+                        handshake_list.append((_HANDSHAKE.pack(_HANDSHAKE_SEQUENCE, peer.token), peer.address))
+
+        return handshake_list
+
+
+    # Returns the endpoint and the message data of the datagram, and an optional reply to send back.
+    def process_datagram(self, data, address):
+        if len(data) < _SEQUENCE.size:
+            return None, None, None
+
+        sequence, = _SEQUENCE.unpack_from(data, 0)
+        with self._mutex:
+            if _HANDSHAKE_SEQUENCE == sequence:
+                return self._process_handshake(data, address)
+
+            endpoint = self._address_dict.get(address)
+            peer = self._peer_dict.get(endpoint)
+            if not peer or not peer.active or sequence <= peer.input_sequence:
+                return None, None, None # Unknown origin or late datagram
+
+            peer.input_sequence = sequence
+            return endpoint, memoryview(data)[_SEQUENCE.size:], None
+
+
+    def _process_handshake(self, data, address):
+        if len(data) != _HANDSHAKE.size:
+            return None, None, None
+
+        sequence, token = _HANDSHAKE.unpack(data)
+        endpoint = self._token_dict.get(token)
+        peer = self._peer_dict.get(endpoint)
+        if not peer:
+            return None, None, None
+
+        if peer.initiator:
+            peer.active = peer.address == address
+            return None, None, None
+
+        if peer.address != address:
+            self._address_dict.pop(peer.address, None)
+            self._address_dict[address] = endpoint
+            peer.address = address
+            peer.input_sequence = _HANDSHAKE_SEQUENCE
+
+        peer.active = True
+        return None, None, data
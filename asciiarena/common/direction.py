@@ -19,6 +19,7 @@ class Direction:
     DIAGONAL_LIST = [LEFT_UP, LEFT_DOWN, RIGHT_UP, RIGHT_DOWN]
     ALL_LIST = ORTHOGONAL_LIST + DIAGONAL_LIST
 
+    # The vectors are immutable: the same instances are shared by all the users.
     _TO_VEC2 = {
         NONE:       Vec2(0, 0),
         UP:         Vec2(0, -1),
@@ -48,7 +49,7 @@ class Direction:
 
     @staticmethod
     def as_vector(direction):
-        return Direction._TO_VEC2.get(direction, Direction.NONE)
+        return Direction._TO_VEC2.get(direction, Direction._TO_VEC2[Direction.NONE])
 
 
     @staticmethod
@@ -0,0 +1,102 @@
+from common import message as Message
+
+HISTORY_SIZE = 120 #frames
+
+class FrameSnapshot:
+    def __init__(self, step, entity_dict, spell_dict):
+        self._step = step
+        self._entity_dict = entity_dict
+        self._spell_dict = spell_dict
+
+
+    @staticmethod
+    def from_lists(step, entity_list, spell_list):
+        entity_dict = {entity.key: entity for entity in entity_list}
+        spell_dict = {spell.key: spell for spell in spell_list}
+        return FrameSnapshot(step, entity_dict, spell_dict)
+
+
+    def get_step(self):
+        return self._step
+
+
+    def get_entity_list(self):
+        return list(self._entity_dict.values())
+
+
+    def get_spell_list(self):
+        return list(self._spell_dict.values())
+
+
+    def create_frame(self, base = None):
+        if not base:
+            return Message.Frame(self._step, self.get_entity_list(), self.get_spell_list(), Message.Frame.KEYFRAME, [])
+
+        entity_list = FrameSnapshot._changed_list(self._entity_dict, base._entity_dict, FrameSnapshot._entity_state)
+        spell_list = FrameSnapshot._changed_list(self._spell_dict, base._spell_dict, FrameSnapshot._spell_state)
+
+        removed_key_list = [key for key in base._entity_dict if key not in self._entity_dict]
+        removed_key_list += [key for key in base._spell_dict if key not in self._spell_dict]
+
+        return Message.Frame(self._step, entity_list, spell_list, base._step, removed_key_list)
+
+
+    def apply_frame(self, frame):
+        entity_dict = self._entity_dict.copy()
+        spell_dict = self._spell_dict.copy()
+
+        for key in frame.removed_key_list:
+            entity_dict.pop(key, None)
+            spell_dict.pop(key, None)
+
+        for entity in frame.entity_list:
+            entity_dict[entity.key] = entity
+
+        for spell in frame.spell_list:
+            spell_dict[spell.key] = spell
+
+        return FrameSnapshot(frame.step, entity_dict, spell_dict)
+
+
+    @staticmethod
+    def _changed_list(element_dict, base_element_dict, state):
+        changed_list = []
+        for key, element in element_dict.items():
+            base_element = base_element_dict.get(key)
+            if not base_element or state(element) != state(base_element):
+                changed_list.append(element)
+
+        return changed_list
+
+
+    @staticmethod
+    def _entity_state(entity):
+        return entity.character, entity.position, entity.direction
+
+
+    @staticmethod
+    def _spell_state(spell):
+        return spell.spec_id, spell.position, spell.direction
+
+
+class SnapshotHistory:
+    def __init__(self, size = HISTORY_SIZE):
+        self._snapshot_dict = {}
+        self._size = size
+
+
+    def add(self, snapshot):
+        self._snapshot_dict[snapshot.get_step()] = snapshot
+
+        # Steps are added in increasing order, so the oldest snapshots are always at the beginning.
+        oldest_step = snapshot.get_step() - self._size
+        while next(iter(self._snapshot_dict)) <= oldest_step:
+            del self._snapshot_dict[next(iter(self._snapshot_dict))]
+
+
+    def get(self, step):
+        return self._snapshot_dict.get(step)
+
+
+    def clear(self):
+        self._snapshot_dict.clear()
@@ -0,0 +1,63 @@
+import threading
+import time
+
+DEFAULT_IDLE_TIMEOUT = 10 #seconds
+HEARTBEAT_INTERVAL = 1.0 #seconds
+CHECK_INTERVAL = 0.25 #seconds
+
+class IdleTracker:
+    def __init__(self, idle_timeout):
+        self._idle_timeout = idle_timeout
+        self._input_time_stamp_dict = {}
+        self._heartbeat_time_stamp_dict = {}
+        self._handshake_set = set()
+        self._last_check_time_stamp = 0
+        self._mutex = threading.Lock()
+
+
+    def track(self, connection):
+        with self._mutex:
+            self._input_time_stamp_dict[connection] = time.time()
+
+
+    def untrack(self, connection):
+        with self._mutex:
+            self._input_time_stamp_dict.pop(connection, None)
+            self._heartbeat_time_stamp_dict.pop(connection, None)
+            self._handshake_set.discard(connection)
+
+
+    def notify_input(self, connection):
+        with self._mutex:
+            if connection in self._input_time_stamp_dict:
+                self._input_time_stamp_dict[connection] = time.time()
+
+
+    # Heartbeats can not be sent before the CheckedVersion message: the stream could change its compression.
+    def notify_handshake(self, connection):
+        with self._mutex:
+            if connection in self._input_time_stamp_dict:
+                self._handshake_set.add(connection)
+
+
+    # Returns the connections that must be asked for a heartbeat and the connections that must be closed.
+    def check(self):
+        current_time = time.time()
+        if current_time - self._last_check_time_stamp < CHECK_INTERVAL:
+            return [], []
+
+        self._last_check_time_stamp = current_time
+        heartbeat_list = []
+        idle_list = []
+        with self._mutex:
+            for connection, time_stamp in self._input_time_stamp_dict.items():
+                idle_time = current_time - time_stamp
+                if idle_time > self._idle_timeout:
+                    idle_list.append(connection)
+
+                elif idle_time > HEARTBEAT_INTERVAL and connection in self._handshake_set:
+                    if current_time - self._heartbeat_time_stamp_dict.get(connection, 0) > HEARTBEAT_INTERVAL:
+                        self._heartbeat_time_stamp_dict[connection] = current_time
+                        heartbeat_list.append(connection)
+
+        return heartbeat_list, idle_list
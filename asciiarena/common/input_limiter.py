@@ -0,0 +1,106 @@
+from common import message as Message
+
+import enum
+import time
+
+MAX_MESSAGE_SIZE = 4 * 1024
+
+# (messages per second, burst) allowed for each message type.
+# PlayerMovement is not throttled: every message is a change of the held direction, so dropping a release would keep
+# the player moving. A movement flood is limited by the connection rate.
+RATE_DICT = {
+    Message.Version: (1, 2),
+    Message.Login: (1, 4),
+    Message.Resume: (1, 2),
+    Message.PlayerCast: (10, 10),
+    Message.Ping: (5, 5),
+    Message.Pong: (5, 5),
+    Message.Heartbeat: (5, 5),
+}
+
+# (messages per tick, burst in ticks) of the message types that follow the frames: a client acknowledges every frame.
+TICK_RATE_DICT = {
+    Message.FrameAck: (2, 2),
+}
+
+# Exceeding the connection rate is considered a flood: the connection is dropped.
+# (messages per tick, burst in ticks) for the acks and the movements, plus (messages per second, burst) for the rest.
+CONNECTION_TICK_RATE = (4, 8)
+CONNECTION_RATE = (10, 20)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._time_stamp = time.time()
+
+
+    def consume(self, time_stamp):
+        self._tokens = min(self._burst, self._tokens + (time_stamp - self._time_stamp) * self._rate)
+        self._time_stamp = time_stamp
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+
+class InputLimiter:
+    class Verdict(enum.Enum):
+        ACCEPT = enum.auto()
+        THROTTLE = enum.auto()
+        DISCONNECT = enum.auto()
+
+
+    # The rates of the messages sent once per frame follow the tick rate of the server.
+    def __init__(self, tick_rate, max_message_size = MAX_MESSAGE_SIZE):
+        self._rate_dict = dict(RATE_DICT)
+        for message_class, (rate, burst) in TICK_RATE_DICT.items():
+            self._rate_dict[message_class] = (rate * tick_rate, burst * tick_rate)
+
+        rate, burst = CONNECTION_RATE
+        tick_rate_factor, tick_burst_factor = CONNECTION_TICK_RATE
+        self._connection_rate = (rate + tick_rate_factor * tick_rate, burst + tick_burst_factor * tick_rate)
+        self._max_message_size = max_message_size
+        self._bucket_dict = {}
+
+
+    def get_max_message_size(self):
+        return self._max_message_size
+
+
+    def get_rate(self, message_class):
+        return self._rate_dict.get(message_class)
+
+
+    def get_connection_rate(self):
+        return self._connection_rate
+
+
+    def check(self, message, endpoint):
+        bucket_dict = self._bucket_dict.get(endpoint)
+        if None == bucket_dict:
+            bucket_dict = {None: TokenBucket(*self._connection_rate)}
+            self._bucket_dict[endpoint] = bucket_dict
+
+        time_stamp = time.time()
+        if not bucket_dict[None].consume(time_stamp):
+            return InputLimiter.Verdict.DISCONNECT
+
+        rate = self._rate_dict.get(message.__class__)
+        if rate:
+            bucket = bucket_dict.get(message.__class__)
+            if not bucket:
+                bucket = TokenBucket(*rate)
+                bucket_dict[message.__class__] = bucket
+
+            if not bucket.consume(time_stamp):
+                return InputLimiter.Verdict.THROTTLE
+
+        return InputLimiter.Verdict.ACCEPT
+
+
+    def untrack_endpoint(self, endpoint):
+        self._bucket_dict.pop(endpoint, None)
@@ -1,12 +1,16 @@
 class Version:
-    def __init__(self, value):
+    def __init__(self, value, codec_list, compression_list):
         self.value = value
+        self.codec_list = codec_list
+        self.compression_list = compression_list
 
 
 class CheckedVersion:
-    def __init__(self, value, validation):
+    def __init__(self, value, validation, codec, compression):
         self.value = value
         self.validation = validation
+        self.codec = codec
+        self.compression = compression
 
 
 class GameInfo:
@@ -29,9 +33,14 @@ class LoginStatus:
     ROOM_COMPLETED = 3
     ALREADY_EXISTS = 4
     INVALID_CHARACTER = 5
+    RESUMED = 6
+    INVALID_SESSION = 7
 
-    def __init__(self, status):
+    NO_SESSION_TOKEN = 0
+
+    def __init__(self, status, session_token):
         self.status = status
+        self.session_token = session_token
 
 
 class PlayersInfo:
@@ -54,29 +63,69 @@ class Frame:
             self.direction = direction
 
     class Spell:
-        def __init__(self, key, spell_spec_class, position, direction):
+        def __init__(self, key, spec_id, position, direction):
             self.key = key
-            self.spell_spec_class = spell_spec_class
+            self.spec_id = spec_id
             self.position = position
             self.direction = direction
 
-    def __init__(self, step, entity_list, spell_list):
+    KEYFRAME = -1
+
+    def __init__(self, step, entity_list, spell_list, base_step, removed_key_list):
         self.step = step
         self.entity_list = entity_list
         self.spell_list = spell_list
+        self.base_step = base_step
+        self.removed_key_list = removed_key_list
+
+
+class FrameAck:
+    def __init__(self, step):
+        self.step = step
 
 
 class PlayerMovement:
-    def __init__(self, direction):
+    def __init__(self, direction, step):
         self.direction = direction
+        self.step = step
 
 
 class PlayerCast:
-    def __init__(self, skill_id):
+    def __init__(self, skill_id, step):
         self.skill_id = skill_id
+        self.step = step
 
 
 class PointsInfo:
     def __init__(self):
         pass
 
+
+class UdpChannel:
+    def __init__(self, token):
+        self.token = token
+
+
+class Ping:
+    def __init__(self, time_stamp):
+        self.time_stamp = time_stamp
+
+
+class Pong:
+    def __init__(self, origin_time_stamp, time_stamp):
+        self.origin_time_stamp = origin_time_stamp
+        self.time_stamp = time_stamp
+
+
+class Heartbeat:
+    def __init__(self, request):
+        self.request = request
+
+
+class Resume:
+    def __init__(self, value, codec_list, compression_list, session_token, seed):
+        self.value = value
+        self.codec_list = codec_list
+        self.compression_list = compression_list
+        self.session_token = session_token
+        self.seed = seed
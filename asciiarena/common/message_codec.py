@@ -0,0 +1,211 @@
+from common import message as Message
+from common.util.vec2 import Vec2
+
+import _pickle as pickle
+import struct
+
+BINARY = "binary"
+
+DEFAULT = BINARY
+PREFERENCE_LIST = [BINARY]
+
+
+class CodecError(Exception):
+    pass
+
+
+# Only for local measurements: unpickling received data would run any code chosen by the peer,
+# so this codec is never negotiated nor returned by get_codec().
+class PickleCodec:
+    def encode(self, message):
+        return pickle.dumps(message)
+
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+class BinaryCodec:
+    class Field:
+        def __init__(self, pack, unpack):
+            self.pack = pack
+            self.unpack = unpack
+
+
+    def __init__(self, schema_list):
+        self._schema_list = schema_list
+        self._type_id_dict = {}
+        for type_id, (message_class, field_list) in enumerate(schema_list):
+            self._type_id_dict[message_class] = type_id
+
+
+    def encode(self, message):
+        type_id = self._type_id_dict.get(message.__class__)
+        if None == type_id:
+            raise CodecError("Message without binary schema: {}".format(message.__class__.__name__))
+
+        message_class, field_list = self._schema_list[type_id]
+        data = bytearray(_TYPE_ID.pack(type_id))
+        for name, field in field_list:
+            field.pack(data, getattr(message, name))
+
+        return bytes(data)
+
+
+    def decode(self, data):
+        data = memoryview(data)
+        type_id, = _TYPE_ID.unpack_from(data, 0)
+        if type_id >= len(self._schema_list):
+            raise CodecError("Unknown message type id: {}".format(type_id))
+
+        message_class, field_list = self._schema_list[type_id]
+        offset = _TYPE_ID.size
+        value_list = []
+        for name, field in field_list:
+            value, offset = field.unpack(data, offset)
+            value_list.append(value)
+
+        return message_class(*value_list)
+
+
+def negotiate(codec_list):
+    for codec in PREFERENCE_LIST:
+        if codec in codec_list:
+            return codec
+
+    return DEFAULT
+
+
+def get_codec(name):
+    codec = _CODEC_DICT.get(name)
+    if None == codec:
+        raise CodecError("Unknown codec: {}".format(name))
+
+    return codec
+
+
+_TYPE_ID = struct.Struct("<B")
+_LENGTH = struct.Struct("<I")
+_FRAME_ENTITY = struct.Struct("<QcHHB")
+_FRAME_SPELL = struct.Struct("<QBHHB")
+_FRAME_KEY = struct.Struct("<Q")
+
+
+def _scalar_field(format):
+    value_struct = struct.Struct(format)
+
+    def pack(data, value):
+        data += value_struct.pack(value)
+
+    def unpack(data, offset):
+        return value_struct.unpack_from(data, offset)[0], offset + value_struct.size
+
+    return BinaryCodec.Field(pack, unpack)
+
+
+def _pack_bytes(data, value):
+    data += _LENGTH.pack(len(value))
+    data += value
+
+
+def _unpack_bytes(data, offset):
+    length, = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    return bytes(data[offset:offset + length]), offset + length
+
+
+def _pack_string(data, value):
+    _pack_bytes(data, value.encode())
+
+
+def _unpack_string(data, offset):
+    value, offset = _unpack_bytes(data, offset)
+    return value.decode(), offset
+
+
+def _pack_string_list(data, value):
+    data += _LENGTH.pack(len(value))
+    for string in value:
+        _pack_string(data, string)
+
+
+def _unpack_string_list(data, offset):
+    length, = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    value = []
+    for i in range(0, length):
+        string, offset = _unpack_string(data, offset)
+        value.append(string)
+
+    return value, offset
+
+
+def _struct_list_field(item_struct, to_tuple, from_tuple):
+    def pack(data, value):
+        data += _LENGTH.pack(len(value))
+        for item in value:
+            data += item_struct.pack(*to_tuple(item))
+
+    def unpack(data, offset):
+        length, = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        end = offset + length * item_struct.size
+        value = [from_tuple(*item) for item in item_struct.iter_unpack(data[offset:end])]
+        return value, end
+
+    return BinaryCodec.Field(pack, unpack)
+
+
+def _frame_entity_to_tuple(entity):
+    return entity.key, entity.character.encode(), entity.position.x, entity.position.y, entity.direction
+
+
+def _frame_entity_from_tuple(key, character, x, y, direction):
+    return Message.Frame.Entity(key, character.decode(), Vec2(x, y), direction)
+
+
+def _frame_spell_to_tuple(spell):
+    return spell.key, spell.spec_id, spell.position.x, spell.position.y, spell.direction
+
+
+def _frame_spell_from_tuple(key, spec_id, x, y, direction):
+    return Message.Frame.Spell(key, spec_id, Vec2(x, y), direction)
+
+
+_UINT8 = _scalar_field("<B")
+_UINT16 = _scalar_field("<H")
+_UINT32 = _scalar_field("<I")
+_INT32 = _scalar_field("<i")
+_UINT64 = _scalar_field("<Q")
+_FLOAT64 = _scalar_field("<d")
+_STRING = BinaryCodec.Field(_pack_string, _unpack_string)
+_STRING_LIST = BinaryCodec.Field(_pack_string_list, _unpack_string_list)
+_BYTES = BinaryCodec.Field(_pack_bytes, _unpack_bytes)
+_FRAME_ENTITY_LIST = _struct_list_field(_FRAME_ENTITY, _frame_entity_to_tuple, _frame_entity_from_tuple)
+_FRAME_SPELL_LIST = _struct_list_field(_FRAME_SPELL, _frame_spell_to_tuple, _frame_spell_from_tuple)
+_FRAME_KEY_LIST = _struct_list_field(_FRAME_KEY, lambda key: (key,), lambda key: key)
+
+# The position in the list is the message type id: append new messages at the end.
+_SCHEMA_LIST = [
+    (Message.Version, [("value", _STRING), ("codec_list", _STRING_LIST), ("compression_list", _STRING_LIST)]),
+    (Message.CheckedVersion, [("value", _STRING), ("validation", _UINT8), ("codec", _STRING), ("compression", _STRING)]),
+    (Message.GameInfo, [("character_list", _STRING_LIST), ("players", _UINT16), ("points", _UINT32), ("arena_size", _UINT16), ("seed", _STRING)]),
+    (Message.Login, [("character", _STRING)]),
+    (Message.LoginStatus, [("status", _UINT8), ("session_token", _UINT64)]),
+    (Message.PlayersInfo, [("character_list", _STRING_LIST)]),
+    (Message.ArenaInfo, [("seed", _STRING), ("ground", _BYTES)]),
+    (Message.Frame, [("step", _UINT32), ("entity_list", _FRAME_ENTITY_LIST), ("spell_list", _FRAME_SPELL_LIST), ("base_step", _INT32), ("removed_key_list", _FRAME_KEY_LIST)]),
+    (Message.PlayerMovement, [("direction", _UINT8), ("step", _INT32)]),
+    (Message.PlayerCast, [("skill_id", _UINT8), ("step", _INT32)]),
+    (Message.PointsInfo, []),
+    (Message.FrameAck, [("step", _INT32)]),
+    (Message.UdpChannel, [("token", _UINT64)]),
+    (Message.Ping, [("time_stamp", _FLOAT64)]),
+    (Message.Pong, [("origin_time_stamp", _FLOAT64), ("time_stamp", _FLOAT64)]),
+    (Message.Heartbeat, [("request", _UINT8)]),
+    (Message.Resume, [("value", _STRING), ("codec_list", _STRING_LIST), ("compression_list", _STRING_LIST), ("session_token", _UINT64), ("seed", _STRING)]),
+]
+
+_CODEC_DICT = {
+    BINARY: BinaryCodec(_SCHEMA_LIST),
+}
@@ -0,0 +1,97 @@
+MIN_FREE_SIZE = 1024
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+_COLON = ord(":")
+_COMMA = ord(",")
+
+class NetstringError(Exception):
+    pass
+
+
+def encode(data):
+    return b"%d:%s," % (len(data), data)
+
+
+class Deframer:
+    def __init__(self, buffer_size, max_message_size = MAX_MESSAGE_SIZE):
+        self._buffer = bytearray(buffer_size)
+        self._begin = 0
+        self._end = 0
+        self._required_size = 0
+        self._max_message_size = max_message_size
+        self._max_header_size = len(str(max_message_size)) + 1
+
+
+    def get_buffer(self):
+        # Makes room for the pending message at once, so big messages are received in one pass.
+        free_size = max(MIN_FREE_SIZE, self._required_size - (self._end - self._begin))
+        if len(self._buffer) - self._end < free_size:
+            self._reserve(self._end - self._begin + free_size)
+
+        return memoryview(self._buffer)[self._end:]
+
+
+    def buffer_updated(self, size):
+        self._end += size
+
+
+    def feed(self, data):
+        view = self.get_buffer()
+        while len(view) < len(data):
+            self._required_size = self._end - self._begin + len(data)
+            view = self.get_buffer()
+
+        view[:len(data)] = data
+        self.buffer_updated(len(data))
+
+
+    def drain(self):
+        data = bytes(self._buffer[self._begin:self._end])
+        self._begin = self._end = self._required_size = 0
+        return data
+
+
+    # The returned message is a view of the internal buffer: it is valid until the buffer is requested again.
+    def next_message(self):
+        colon = self._buffer.find(_COLON, self._begin, min(self._end, self._begin + self._max_header_size))
+        if -1 == colon:
+            if self._end - self._begin >= self._max_header_size:
+                raise NetstringError("Invalid netstring header")
+            return None
+
+        header = self._buffer[self._begin:colon]
+        if not header.isdigit():
+            raise NetstringError("Invalid netstring length")
+
+        length = int(header)
+        if length > self._max_message_size:
+            raise NetstringError("Message of {} bytes exceeds the maximum size".format(length))
+
+        data_begin = colon + 1
+        data_end = data_begin + length
+        if data_end >= self._end:
+            self._required_size = data_end + 1 - self._begin
+            return None
+
+        if self._buffer[data_end] != _COMMA:
+            raise NetstringError("Invalid netstring terminator")
+
+        self._begin = data_end + 1
+        self._required_size = 0
+        if self._begin == self._end:
+            self._begin = self._end = 0
+
+        return memoryview(self._buffer)[data_begin:data_end]
+
+
+    def _reserve(self, size):
+        pending_size = self._end - self._begin
+        if size <= len(self._buffer):
+            self._buffer[0:pending_size] = self._buffer[self._begin:self._end]
+        else:
+            buffer = bytearray(max(size, 2 * len(self._buffer)))
+            buffer[0:pending_size] = self._buffer[self._begin:self._end]
+            self._buffer = buffer
+
+        self._begin = 0
+        self._end = pending_size
@@ -1,6 +1,13 @@
 from common.logging import logger
 from common.package_factory import PackageFactory
-from common.package_queue import InputPack
+from common.package_queue import InputPack, OutputPack
+from common.output_buffer import OutputBuffer
+from common.datagram_channel import DatagramChannel, MAX_DATAGRAM_SIZE
+from common.input_limiter import InputLimiter
+from common.idle_tracker import IdleTracker
+from common.socket_options import SocketOptions
+from common import netstring as Netstring
+from common import message as Message, stream_compression as StreamCompression
 
 import enum
 import selectors
@@ -8,21 +15,46 @@ import socket
 import threading
 
 MAX_BUFFER_SIZE = 4096
+MAX_OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
 BLOCKING_TIME = 0.05
+MAX_MESSAGES_PER_FLUSH = 64
+UNKNOWN_ADDRESS = ("?", 0)
 
 class NetworkManager:
     class Operation(enum.Enum):
         ACCEPT = 1
         READ = 2
         WRITE = 3
+        WAKEUP = 4
+        DATAGRAM = 5
 
 
-    def __init__(self, package_queue):
+    def __init__(self, package_queue, datagram = False, input_limiter = None, idle_timeout = None, socket_options = None):
         self._selector = selectors.DefaultSelector()
-        self._package_factory = PackageFactory()
+        self._package_factory = PackageFactory(input_limiter.get_max_message_size() if input_limiter else Netstring.MAX_MESSAGE_SIZE)
         self._package_queue = package_queue
+        self._input_limiter = input_limiter
+        self._idle_tracker = IdleTracker(idle_timeout) if idle_timeout else None
+        self._socket_options = socket_options or SocketOptions()
         self._running = False
 
+        self._output_buffer_dict = {}
+        # The address is stored at the connection: getpeername() fails once the peer has reset the connection.
+        self._address_dict = {}
+        self._flush_request_set = set()
+        self._close_request_set = set()
+        self._request_mutex = threading.Lock()
+
+        # Only the selector thread modifies the selector: the output thread wakes it up with its requests.
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ, self.Operation.WAKEUP)
+
+        self._datagram_enabled = datagram
+        self._datagram_socket = None
+        self._datagram_channel = DatagramChannel()
+
 
     def run(self):
         self._running = True
@@ -38,29 +70,53 @@ class NetworkManager:
 
     def stop(self):
         self._running = False
+        self._wakeup()
         self._input_thread.join()
         self._output_thread.join()
         current_connection_list = []
         for key, value in self._selector.get_map().items():
-            current_connection_list.append(value.fileobj)
+            if self.Operation.ACCEPT == value.data:
+                current_connection_list.append(value.fileobj)
+
+        for server_socket in current_connection_list:
+            self._selector.unregister(server_socket)
+            server_socket.close()
 
-        for connection in current_connection_list:
+        if self._datagram_socket:
+            self._selector.unregister(self._datagram_socket)
+            self._datagram_socket.close()
+
+        for connection in list(self._output_buffer_dict):
             self._close_connection(connection)
 
+        self._selector.unregister(self._wakeup_reader)
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
 
     def is_running(self):
         return self._running
 
 
+    def call_later(self, delay, callback):
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+
     def listen(self, port):
         try:
             server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket_options.apply(server_socket) # The accepted connections inherit the buffer sizes.
             server_socket.setblocking(False)
             server_socket.bind(("0.0.0.0", port))
             server_socket.listen()
             self._selector.register(server_socket, selectors.EVENT_READ, self.Operation.ACCEPT)
 
+            if self._datagram_enabled:
+                self._open_datagram_socket(port)
+
             logger.info("Listening on port: {}".format(port))
             return server_socket
 
@@ -74,9 +130,14 @@ class NetworkManager:
     def connect(self, ip, port):
         try:
             connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket_options.apply(connection)
             connection.connect((ip, port))
             connection.setblocking(False)
-            self._selector.register(connection, selectors.EVENT_READ, self.Operation.READ)
+            # The resolved address, as the accepted connections: the datagram channel compares it with the sender address.
+            self._register_connection(connection, connection.getpeername())
+
+            if self._datagram_enabled:
+                self._open_datagram_socket(0)
 
             logger.info("New connection to {}:{}".format(ip, port))
             return connection
@@ -90,25 +151,32 @@ class NetworkManager:
         while self._running:
             for key, event in self._selector.select(timeout = BLOCKING_TIME):
                 if self.Operation.ACCEPT == key.data:
-                    connection, (ip, port) = key.fileobj.accept()
+                    connection, address = key.fileobj.accept()
                     connection.setblocking(False)
-                    logger.debug("New connection to {}:{}".format(ip, port))
-                    self._selector.register(connection, selectors.EVENT_READ, self.Operation.READ)
+                    self._socket_options.apply(connection)
+                    logger.debug("New connection to {}:{}".format(*address))
+                    self._register_connection(connection, address)
 
-                elif self.Operation.READ == key.data:
+                elif self.Operation.WAKEUP == key.data:
+                    self._process_requests()
+
+                elif self.Operation.DATAGRAM == key.data:
+                    self._read_datagrams()
+
+                else:
                     connection = key.fileobj
-                    try:
-                        data = connection.recv(MAX_BUFFER_SIZE)
-                    except:
-                        self._close_connection(connection)
-                    else:
-                        if data:
-                            ip, port = connection.getpeername()
-                            for input_pack in self._package_factory.create_input_packages(data, connection):
-                                logger.debug_message("Message - {} - from {}:{}".format(input_pack.message.__class__.__name__, ip, port))
-                                self._package_queue.enqueue_input(input_pack)
-                        else:
-                            self._close_connection(connection)
+                    if event & selectors.EVENT_READ:
+                        self._read_connection(connection)
+
+                    if event & selectors.EVENT_WRITE and connection in self._output_buffer_dict:
+                        self._flush_connection(connection)
+
+            if self._datagram_socket:
+                for datagram, address in self._datagram_channel.create_handshake_list():
+                    self._send_datagram(datagram, address)
+
+            if self._idle_tracker:
+                self._check_idle_connections()
 
 
     def _output_process(self):
@@ -117,28 +185,307 @@ class NetworkManager:
             if not output_pack:
                 continue
 
-            if output_pack.message:
-                data, connection_list = self._package_factory.process_output_package(output_pack)
-                for connection in connection_list:
-                    try:
-                        connection.sendall(data)
-                        ip, port = connection.getpeername()
-                        logger.debug_message("Message - {} - to {}:{}".format(output_pack.message.__class__.__name__, ip, port))
-                    except OSError:
-                        pass
+            # All the messages already queued are buffered before flushing: each connection is written once per flush.
+            pending_connection_dict = {}
+            buffered_messages = 0
+            while output_pack:
+                if output_pack.message:
+                    self._buffer_output_package(output_pack, pending_connection_dict)
+                else:
+                    self._flush_pending_connections(pending_connection_dict)
+                    for connection in output_pack.endpoint_list:
+                        self._request(self._close_request_set, connection)
+
+                buffered_messages += 1
+                if buffered_messages == MAX_MESSAGES_PER_FLUSH:
+                    break
+
+                output_pack = self._package_queue.dequeue_output()
+
+            self._flush_pending_connections(pending_connection_dict)
+
+
+    def _buffer_output_package(self, output_pack, pending_connection_dict):
+        output_pack = self._process_output_datagrams(output_pack)
+        for data, connection in self._package_factory.process_output_package(output_pack):
+            output_buffer = self._output_buffer_dict.get(connection)
+            if not output_buffer:
+                continue
+
+            if output_buffer.append(data, isinstance(output_pack.message, Message.Frame)):
+                pending_connection_dict[connection] = output_buffer
+                self._check_handshake(output_pack.message, connection, output_buffer)
+                ip, port = self._get_address(connection)
+                logger.debug_message("Message - {} - to {}:{}".format(output_pack.message.__class__.__name__, ip, port))
+                self._check_datagram_offer(output_pack.message, connection)
             else:
-                for connection in output_pack.endpoint_list:
-                    self._close_connection(connection)
+                logger.warning("Output buffer overflow, the connection is too slow")
+                self._request(self._close_request_set, connection)
+
+
+    def _flush_pending_connections(self, pending_connection_dict):
+        if not pending_connection_dict:
+            return
+
+        for connection, output_buffer in pending_connection_dict.items():
+            self._try_flush(connection, output_buffer)
+            self._count_dropped_frames(output_buffer)
+
+        self._package_queue.get_counters().add("output_flushes", len(pending_connection_dict))
+        pending_connection_dict.clear()
+
+
+    def _count_dropped_frames(self, output_buffer):
+        dropped_frames = output_buffer.pop_dropped_frames()
+        if dropped_frames:
+            self._package_queue.get_counters().add("frames_replaced_in_buffer", dropped_frames)
+
+
+    def _try_flush(self, connection, output_buffer):
+        # Sending directly saves the selector thread wakeup in the common case of an empty socket buffer.
+        try:
+            if output_buffer.flush(connection):
+                return
+        except OSError:
+            self._request(self._close_request_set, connection)
+            return
+
+        self._request(self._flush_request_set, connection)
+
+
+    def _request(self, request_set, connection):
+        with self._request_mutex:
+            request_set.add(connection)
+        self._wakeup()
+
+
+    def _wakeup(self):
+        try:
+            self._wakeup_writer.send(b"\0")
+        except BlockingIOError:
+            pass # There is a wakeup pending already.
+
+
+    def _process_requests(self):
+        try:
+            while self._wakeup_reader.recv(MAX_BUFFER_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self._request_mutex:
+            flush_request_list = list(self._flush_request_set)
+            close_request_list = list(self._close_request_set)
+            self._flush_request_set.clear()
+            self._close_request_set.clear()
+
+        for connection in flush_request_list:
+            if connection in self._output_buffer_dict:
+                self._flush_connection(connection)
+
+        for connection in close_request_list:
+            if connection in self._output_buffer_dict:
+                self._close_connection(connection)
+
+
+    def _read_connection(self, connection):
+        try:
+            size = connection.recv_into(self._package_factory.get_input_buffer(connection))
+            input_pack_list = self._package_factory.create_input_packages(size, connection) if size else None
+        except OSError:
+            self._close_connection(connection)
+        except:
+            self._package_queue.get_counters().add("connections_dropped_invalid_input")
+            self._close_connection(connection)
+        else:
+            if size:
+                if self._idle_tracker:
+                    self._idle_tracker.notify_input(connection)
+
+                ip, port = self._get_address(connection)
+                for input_pack in input_pack_list:
+                    logger.debug_message("Message - {} - from {}:{}".format(input_pack.message.__class__.__name__, ip, port))
+                    if not self._check_input_limits(input_pack):
+                        if connection not in self._output_buffer_dict:
+                            return # Closed by flood
+                    elif isinstance(input_pack.message, Message.UdpChannel):
+                        self._open_datagram_channel(input_pack.message.token, connection)
+                    elif isinstance(input_pack.message, Message.Heartbeat):
+                        if input_pack.message.request:
+                            self._send_heartbeat(connection, False)
+                    else:
+                        self._check_handshake(input_pack.message, connection, self._output_buffer_dict[connection])
+                        self._package_queue.enqueue_input(input_pack)
+            else:
+                self._close_connection(connection)
+
+
+    def _check_input_limits(self, input_pack):
+        if not self._input_limiter:
+            return True
+
+        verdict = self._input_limiter.check(input_pack.message, input_pack.endpoint)
+        if InputLimiter.Verdict.THROTTLE == verdict:
+            self._package_queue.get_counters().add("input_throttled_{}".format(input_pack.message.__class__.__name__))
+            return False
+
+        if InputLimiter.Verdict.DISCONNECT == verdict:
+            logger.warning("Input flood from {}:{}, closing the connection".format(*self._get_address(input_pack.endpoint)))
+            self._package_queue.get_counters().add("connections_dropped_flood")
+            self._close_connection(input_pack.endpoint)
+            return False
+
+        return True
+
+
+    def _check_handshake(self, message, connection, output_buffer):
+        # As the codec, the compression starts after the CheckedVersion message in both directions.
+        if isinstance(message, Message.CheckedVersion):
+            output_buffer.set_compressor(StreamCompression.create_compressor(message.compression))
+            if self._idle_tracker:
+                self._idle_tracker.notify_handshake(connection)
+
+
+    def _send_heartbeat(self, connection, request):
+        output_pack = OutputPack(Message.Heartbeat(request), connection)
+        for data, endpoint in self._package_factory.process_output_package(output_pack):
+            if self._output_buffer_dict[endpoint].append(data):
+                self._flush_connection(endpoint)
+
+
+    def _check_idle_connections(self):
+        heartbeat_list, idle_list = self._idle_tracker.check()
+        for connection in heartbeat_list:
+            if connection in self._output_buffer_dict:
+                self._send_heartbeat(connection, True)
+
+        for connection in idle_list:
+            logger.info("Idle connection timeout, closing the connection")
+            self._package_queue.get_counters().add("connections_dropped_idle")
+            self._close_connection(connection)
+
+
+    def _open_datagram_socket(self, port):
+        self._datagram_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._datagram_socket.setblocking(False)
+        self._datagram_socket.bind(("0.0.0.0", port))
+        self._selector.register(self._datagram_socket, selectors.EVENT_READ, self.Operation.DATAGRAM)
+
+
+    def _check_datagram_offer(self, message, connection):
+        # After the login, the server offers the datagram channel to the client through the stream.
+        if self._datagram_socket and isinstance(message, Message.LoginStatus):
+            if message.status in [Message.LoginStatus.LOGGED, Message.LoginStatus.RECONNECTION, Message.LoginStatus.RESUMED]:
+                token = self._datagram_channel.create_token(connection)
+                output_pack = OutputPack(Message.UdpChannel(token), connection)
+                for data, endpoint in self._package_factory.process_output_package(output_pack):
+                    self._output_buffer_dict[endpoint].append(data) # Flushed with the LoginStatus message.
+
+
+    def _open_datagram_channel(self, token, connection):
+        if self._datagram_socket:
+            self._datagram_channel.open(connection, token, self._get_address(connection))
+
+
+    def _process_output_datagrams(self, output_pack):
+        stream_endpoint_list = []
+        datagram_endpoint_list = []
+        for endpoint in output_pack.endpoint_list:
+            if self._datagram_channel.accepts(output_pack.message, endpoint):
+                datagram_endpoint_list.append(endpoint)
+            else:
+                stream_endpoint_list.append(endpoint)
+
+        if not datagram_endpoint_list:
+            return output_pack
+
+        for message_data, endpoint in self._package_factory.process_output_datagrams(output_pack.message, datagram_endpoint_list):
+            datagram, address = self._datagram_channel.create_datagram(endpoint, message_data)
+            if datagram:
+                self._send_datagram(datagram, address)
+            else:
+                stream_endpoint_list.append(endpoint) # Too big for a datagram
+
+        return OutputPack(output_pack.message, stream_endpoint_list)
+
+
+    def _send_datagram(self, datagram, address):
+        try:
+            self._datagram_socket.sendto(datagram, address)
+        except OSError:
+            pass # Unreliable channel: the datagram is lost.
+
+
+    def _read_datagrams(self):
+        while True:
+            try:
+                data, address = self._datagram_socket.recvfrom(MAX_DATAGRAM_SIZE)
+            except OSError:
+                return
+
+            endpoint, message_data, reply = self._datagram_channel.process_datagram(data, address)
+            if reply:
+                self._send_datagram(reply, address)
+
+            if endpoint in self._output_buffer_dict:
+                if self._idle_tracker:
+                    self._idle_tracker.notify_input(endpoint)
+
+                try:
+                    input_pack = self._package_factory.create_input_datagram(message_data, endpoint)
+                except:
+                    continue # Corrupted datagram
+
+                if self._check_input_limits(input_pack):
+                    self._package_queue.enqueue_input(input_pack)
+
+
+    def _flush_connection(self, connection):
+        output_buffer = self._output_buffer_dict[connection]
+        was_waiting = self.Operation.WRITE == self._selector.get_key(connection).data
+        try:
+            flushed = output_buffer.flush(connection)
+        except OSError:
+            self._close_connection(connection)
+            return
+
+        # Only the connections with pending data are listened for write events.
+        if flushed and was_waiting:
+            self._selector.modify(connection, selectors.EVENT_READ, self.Operation.READ)
+        elif not flushed and not was_waiting:
+            self._selector.modify(connection, selectors.EVENT_READ | selectors.EVENT_WRITE, self.Operation.WRITE)
+
+
+    def _register_connection(self, connection, address):
+        self._address_dict[connection] = address
+        self._output_buffer_dict[connection] = OutputBuffer(MAX_OUTPUT_BUFFER_SIZE)
+        if self._idle_tracker:
+            self._idle_tracker.track(connection)
+        self._selector.register(connection, selectors.EVENT_READ, self.Operation.READ)
 
 
     def _close_connection(self, connection):
+        if not self._output_buffer_dict.pop(connection, None):
+            return
+
+        self._datagram_channel.remove(connection)
+        if self._input_limiter:
+            self._input_limiter.untrack_endpoint(connection)
+        if self._idle_tracker:
+            self._idle_tracker.untrack(connection)
+
         self._package_queue.enqueue_input(InputPack(None, connection))
         self._package_factory.untrack_endpoint(connection)
         self._selector.unregister(connection)
+        ip, port = self._address_dict.pop(connection)
         try:
-            ip, port = connection.getpeername()
             connection.close()
             logger.debug("Connection closed with {}:{}".format(ip, port))
-        except:
+        except OSError:
             pass
 
+
+    # Called from both threads: the connection may have been closed already.
+    def _get_address(self, connection):
+        return self._address_dict.get(connection, UNKNOWN_ADDRESS)
+
@@ -0,0 +1,108 @@
+import collections
+import threading
+
+MAX_CHUNKS_PER_WRITE = 64
+
+class OutputBuffer:
+    def __init__(self, max_size):
+        # Each chunk is stored in a cell, so the unsent frame can be replaced in its position.
+        self._cell_list = collections.deque()
+        self._frame_cell = None
+        self._compressor = None
+        self._final_cells = 0 # Leading cells that are already in the form to be sent.
+        self._size = 0
+        self._max_size = max_size
+        self._dropped_frames = 0
+        self._mutex = threading.Lock()
+
+
+    def append(self, data, frame = False):
+        with self._mutex:
+            if frame and self._frame_cell:
+                self._size += len(data) - len(self._frame_cell[0])
+                self._frame_cell[0] = memoryview(data)
+                self._dropped_frames += 1
+                return True
+
+            if self._size + len(data) > self._max_size:
+                return False
+
+            cell = [memoryview(data)]
+            self._cell_list.append(cell)
+            self._size += len(data)
+            if frame:
+                self._frame_cell = cell
+
+            return True
+
+
+    def get_size(self):
+        return self._size
+
+
+    def is_empty(self):
+        return 0 == self._size
+
+
+    def set_compressor(self, compressor):
+        with self._mutex:
+            # The pending data was produced before the negotiation: it is sent uncompressed.
+            self._compressor = compressor
+            self._final_cells = len(self._cell_list)
+
+
+    def pop_dropped_frames(self):
+        with self._mutex:
+            dropped_frames = self._dropped_frames
+            self._dropped_frames = 0
+            return dropped_frames
+
+
+    def flush(self, connection):
+        with self._mutex:
+            self._compress_pending()
+            while self._cell_list:
+                chunk_list = [cell[0] for cell in list(self._cell_list)[:MAX_CHUNKS_PER_WRITE]]
+                try:
+                    sent = connection.sendmsg(chunk_list)
+                except (BlockingIOError, InterruptedError):
+                    break
+
+                self._consume(sent)
+                if sent < sum(len(chunk) for chunk in chunk_list):
+                    break # The socket buffer is full, wait for the next write event.
+
+            return 0 == self._size
+
+
+    # The data is compressed when it is going to be sent, so the frames can be replaced until then.
+    def _compress_pending(self):
+        if not self._compressor or self._final_cells == len(self._cell_list):
+            return
+
+        pending_cell_list = list(self._cell_list)[self._final_cells:]
+        data = self._compressor.compress(b"".join(cell[0] for cell in pending_cell_list))
+        for cell in pending_cell_list:
+            self._cell_list.pop()
+            self._size -= len(cell[0])
+
+        self._cell_list.append([memoryview(data)])
+        self._size += len(data)
+        self._frame_cell = None
+        self._final_cells = len(self._cell_list)
+
+
+    def _consume(self, sent):
+        self._size -= sent
+        while sent > 0:
+            cell = self._cell_list[0]
+            if cell is self._frame_cell:
+                self._frame_cell = None # Partially sent: it can not be replaced anymore.
+
+            if sent < len(cell[0]):
+                cell[0] = cell[0][sent:]
+                return
+
+            sent -= len(cell[0])
+            self._cell_list.popleft()
+            self._final_cells = max(0, self._final_cells - 1)
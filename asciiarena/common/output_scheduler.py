@@ -0,0 +1,118 @@
+from common import message as Message
+
+import collections
+import enum
+import time
+
+class Priority(enum.IntEnum):
+    CONTROL = 0
+    EVENT = 1
+    SNAPSHOT = 2
+
+
+# A message without class priority (as the connection close request) is considered a control message.
+PRIORITY_DICT = {
+    Message.Version: Priority.CONTROL,
+    Message.CheckedVersion: Priority.CONTROL,
+    Message.GameInfo: Priority.CONTROL,
+    Message.Login: Priority.CONTROL,
+    Message.Resume: Priority.CONTROL,
+    Message.LoginStatus: Priority.CONTROL,
+    Message.UdpChannel: Priority.CONTROL,
+    Message.Ping: Priority.CONTROL,
+    Message.Pong: Priority.CONTROL,
+    Message.Heartbeat: Priority.CONTROL,
+    Message.PlayersInfo: Priority.EVENT,
+    Message.ArenaInfo: Priority.EVENT,
+    Message.PointsInfo: Priority.EVENT,
+    Message.PlayerMovement: Priority.EVENT,
+    Message.PlayerCast: Priority.EVENT,
+    Message.FrameAck: Priority.EVENT,
+    Message.Frame: Priority.SNAPSHOT,
+}
+
+
+class OutputScheduler:
+    def __init__(self, counters):
+        # Reliable classes keep a queue per endpoint, served in round robin. Snapshots only keep the latest one.
+        self._queue_dict_list = [collections.OrderedDict() for priority in [Priority.CONTROL, Priority.EVENT]]
+        self._snapshot_slot_dict = collections.OrderedDict()
+        self._reliable_size = 0
+        self._counters = counters
+
+
+    def get_reliable_size(self):
+        return self._reliable_size
+
+
+    def is_empty(self):
+        return 0 == self._reliable_size and not self._snapshot_slot_dict
+
+
+    def push(self, package):
+        priority = OutputScheduler.get_priority(package.message)
+        time_stamp = time.time()
+        if Priority.SNAPSHOT == priority:
+            for endpoint in package.endpoint_list:
+                if endpoint in self._snapshot_slot_dict:
+                    self._counters.add("frames_replaced_in_queue")
+                self._snapshot_slot_dict[endpoint] = (package.message, time_stamp)
+        else:
+            queue_dict = self._queue_dict_list[priority]
+            for endpoint in package.endpoint_list:
+                queue_dict.setdefault(endpoint, collections.deque()).append((package, time_stamp))
+            self._reliable_size += len(package.endpoint_list)
+
+
+    def pop(self):
+        for priority, queue_dict in enumerate(self._queue_dict_list):
+            if queue_dict:
+                message, endpoint_list, time_stamp = self._pop_reliable(queue_dict)
+                self._reliable_size -= len(endpoint_list)
+                return self._schedule(Priority(priority), message, endpoint_list, time_stamp)
+
+        if self._snapshot_slot_dict:
+            message, endpoint_list, time_stamp = self._pop_snapshot()
+            return self._schedule(Priority.SNAPSHOT, message, endpoint_list, time_stamp)
+
+        return None
+
+
+    def _pop_reliable(self, queue_dict):
+        # The endpoints with the same package at the head of their queues are served together, so it is encoded once.
+        package, time_stamp = next(iter(queue_dict.values()))[0]
+        endpoint_list = []
+        for endpoint, endpoint_queue in list(queue_dict.items()):
+            if endpoint_queue[0][0] is package:
+                endpoint_queue.popleft()
+                endpoint_list.append(endpoint)
+                if endpoint_queue:
+                    queue_dict.move_to_end(endpoint)
+                else:
+                    del queue_dict[endpoint]
+
+        return package.message, endpoint_list, time_stamp
+
+
+    def _pop_snapshot(self):
+        endpoint, (message, time_stamp) = self._snapshot_slot_dict.popitem(last = False)
+        endpoint_list = [endpoint]
+        for endpoint in [endpoint for endpoint, (pending, _) in self._snapshot_slot_dict.items() if pending is message]:
+            del self._snapshot_slot_dict[endpoint]
+            endpoint_list.append(endpoint)
+
+        return message, endpoint_list, time_stamp
+
+
+    def _schedule(self, priority, message, endpoint_list, time_stamp):
+        name = priority.name.lower()
+        wait_time = (time.time() - time_stamp) * 1000
+        self._counters.add("output_{}_messages".format(name))
+        self._counters.add("output_{}_wait_ms".format(name), wait_time)
+        self._counters.update_max("output_{}_max_wait_ms".format(name), wait_time)
+        return message, endpoint_list
+
+
+    @staticmethod
+    def get_priority(message):
+        return PRIORITY_DICT.get(message.__class__, Priority.CONTROL)
@@ -1,34 +1,105 @@
 from .package_queue import InputPack, OutputPack
+from . import message as Message, message_codec as MessageCodec, netstring as Netstring, stream_compression as StreamCompression
 
-import _pickle as pickle
-import pynetstring
 import threading
 
+INPUT_BUFFER_SIZE = 4096
+MAX_INFLATED_MESSAGES = 4 # maximum size messages that a received chunk can be decompressed to
+
 class PackageFactory:
-    def __init__(self):
-        self._decoder_dict = {}
+    def __init__(self, max_message_size = Netstring.MAX_MESSAGE_SIZE):
+        self._max_message_size = max_message_size
+        self._deframer_dict = {}
+        self._codec_dict = {}
+        self._decompressor_dict = {}
         self._mutex = threading.Lock()
 
-    def create_input_packages(self, data, endpoint):
+    def get_input_buffer(self, endpoint):
         with self._mutex:
-            decoder = self._decoder_dict.get(endpoint, pynetstring.Decoder())
+            # A compressed stream is received in a separate buffer and inflated into the deframer.
+            decompressor = self._decompressor_dict.get(endpoint)
+            if decompressor:
+                return decompressor.get_buffer()
+
+            deframer = self._deframer_dict.get(endpoint)
+            if not deframer:
+                deframer = Netstring.Deframer(INPUT_BUFFER_SIZE, self._max_message_size)
+                self._deframer_dict[endpoint] = deframer
+
+            return deframer.get_buffer()
+
+    def create_input_packages(self, size, endpoint):
+        with self._mutex:
+            deframer = self._deframer_dict[endpoint]
+            decompressor = self._decompressor_dict.get(endpoint)
+            if decompressor:
+                deframer.feed(decompressor.decompress(decompressor.get_buffer()[:size]))
+            else:
+                deframer.buffer_updated(size)
 
             input_pack_list = []
-            message_data_list = decoder.feed(data)
-            for message_data in message_data_list:
-                message = pickle.loads(message_data)
+            message_data = deframer.next_message()
+            while None != message_data:
+                message = self._get_codec(endpoint).decode(message_data)
                 input_pack_list.append(InputPack(message, endpoint))
+                self._check_negotiation(message, endpoint)
+                message_data = deframer.next_message()
 
             return input_pack_list
 
     def process_output_package(self, output_package):
         data_endpoint_list = []
-        message_data = pickle.dumps(output_package.message)
-        data = pynetstring.encode(message_data)
-        return data, output_package.endpoint_list
+        data_dict = {}
+        for endpoint in output_package.endpoint_list:
+            codec = self._get_codec(endpoint)
+            data = data_dict.get(codec)
+            if not data:
+                message_data = codec.encode(output_package.message)
+                data = Netstring.encode(message_data)
+                data_dict[codec] = data
+
+            data_endpoint_list.append((data, endpoint))
+            with self._mutex:
+                self._check_negotiation(output_package.message, endpoint)
+
+        return data_endpoint_list
+
+    def create_input_datagram(self, message_data, endpoint):
+        message = self._get_codec(endpoint).decode(message_data)
+        return InputPack(message, endpoint)
+
+    def process_output_datagrams(self, message, endpoint_list):
+        message_data_endpoint_list = []
+        message_data_dict = {}
+        for endpoint in endpoint_list:
+            codec = self._get_codec(endpoint)
+            message_data = message_data_dict.get(codec)
+            if not message_data:
+                message_data = codec.encode(message)
+                message_data_dict[codec] = message_data
+
+            message_data_endpoint_list.append((message_data, endpoint))
+
+        return message_data_endpoint_list
 
     def untrack_endpoint(self, endpoint):
         with self._mutex:
-            if self._decoder_dict.get(endpoint, None):
-                del self._decoder_dict[endpoint]
+            self._deframer_dict.pop(endpoint, None)
+            self._codec_dict.pop(endpoint, None)
+            self._decompressor_dict.pop(endpoint, None)
+
+    def _get_codec(self, endpoint):
+        return self._codec_dict.get(endpoint, MessageCodec.get_codec(MessageCodec.DEFAULT))
+
+    def _check_negotiation(self, message, endpoint):
+        # The CheckedVersion message is the last one encoded with the default codec and uncompressed in both directions.
+        if isinstance(message, Message.CheckedVersion):
+            self._codec_dict[endpoint] = MessageCodec.get_codec(message.codec)
 
+            max_output_size = MAX_INFLATED_MESSAGES * self._max_message_size
+            decompressor = StreamCompression.create_decompressor(message.compression, INPUT_BUFFER_SIZE, max_output_size)
+            if decompressor:
+                self._decompressor_dict[endpoint] = decompressor
+                deframer = self._deframer_dict.get(endpoint)
+                if deframer:
+                    deframer.feed(decompressor.decompress(deframer.drain()))
@@ -1,4 +1,11 @@
+from common.counters import Counters
+from common.output_scheduler import OutputScheduler, Priority
+
 import queue
+import threading
+
+MAX_INPUT_QUEUE_SIZE = 1024
+MAX_OUTPUT_QUEUE_SIZE = 1024
 
 class InputPack:
     def __init__(self, message, endpoint):
@@ -14,16 +21,77 @@ class OutputPack:
             self.endpoint_list = [endpoint]
 
 class PackageQueue():
-    def __init__(self):
+    def __init__(self, max_input_size = MAX_INPUT_QUEUE_SIZE, max_output_size = MAX_OUTPUT_QUEUE_SIZE):
+        # Internal signals (without endpoint) do not use input slots: the consumer can enqueue them without blocking.
         self._input_queue = queue.Queue()
-        self._output_queue = queue.Queue()
+        self._input_slot_semaphore = threading.BoundedSemaphore(max_input_size)
+        self._input_slot_wanted = False
+        self._input_slot_listener = None
+
+        self._counters = Counters()
+
+        self._output_scheduler = OutputScheduler(self._counters)
+        self._max_output_size = max_output_size
+        self._output_condition = threading.Condition()
+        self._output_listener = None
 
     def enqueue_input(self, package):
+        if None != package.endpoint:
+            self._input_slot_semaphore.acquire()
         self._input_queue.put(package)
 
-    def dequeue_output(self, timeout = 0):
+    # Never blocks: without a free input slot the package is not queued, and the input slot listener is called
+    # once a slot is released.
+    def try_enqueue_input(self, package):
+        if None != package.endpoint and not self._input_slot_semaphore.acquire(False):
+            # Wanted before trying again: a slot released in between is either taken now or notified.
+            self._input_slot_wanted = True
+            if not self._input_slot_semaphore.acquire(False):
+                return False
+        self._input_queue.put(package)
+        return True
+
+    def dequeue_input(self, timeout = None):
         try:
-            return self._output_queue.get(True, timeout)
+            package = self._input_queue.get(True, timeout)
         except queue.Empty:
             return None
 
+        if None != package.endpoint:
+            self._input_slot_semaphore.release()
+            if self._input_slot_wanted:
+                self._input_slot_wanted = False
+                if self._input_slot_listener:
+                    self._input_slot_listener()
+        return package
+
+    def has_input(self):
+        return not self._input_queue.empty()
+
+    def enqueue_output(self, package):
+        with self._output_condition:
+            if Priority.SNAPSHOT != OutputScheduler.get_priority(package.message):
+                self._output_condition.wait_for(lambda: self._output_scheduler.get_reliable_size() < self._max_output_size)
+            self._output_scheduler.push(package)
+            self._output_condition.notify_all()
+
+        if self._output_listener:
+            self._output_listener()
+
+    def dequeue_output(self, timeout = 0):
+        with self._output_condition:
+            if not self._output_condition.wait_for(lambda: not self._output_scheduler.is_empty(), timeout):
+                return None
+
+            message, endpoint_list = self._output_scheduler.pop()
+            self._output_condition.notify_all()
+            return OutputPack(message, endpoint_list)
+
+    def set_output_listener(self, listener):
+        self._output_listener = listener
+
+    def set_input_slot_listener(self, listener):
+        self._input_slot_listener = listener
+
+    def get_counters(self):
+        return self._counters
@@ -0,0 +1,23 @@
+from common.logging import logger
+
+import socket
+
+class SocketOptions:
+    def __init__(self, no_delay = True, send_buffer_size = 0, receive_buffer_size = 0):
+        # A buffer size of 0 keeps the system default.
+        self._no_delay = no_delay
+        self._send_buffer_size = send_buffer_size
+        self._receive_buffer_size = receive_buffer_size
+
+
+    def apply(self, connection):
+        try:
+            # The messages are coalesced by the network manager, Nagle's algorithm would only delay them.
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if self._no_delay else 0)
+            if self._send_buffer_size:
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._send_buffer_size)
+            if self._receive_buffer_size:
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._receive_buffer_size)
+
+        except OSError as error:
+            logger.warning("Can not set the socket options, error: {}".format(error.errno))
@@ -0,0 +1,64 @@
+import zlib
+
+NONE = "none"
+ZLIB = "zlib"
+
+PREFERENCE_LIST = [ZLIB]
+COMPRESSION_LEVEL = 6
+
+
+class StreamCompressionError(Exception):
+    pass
+
+
+class ZlibCompressor:
+    def __init__(self):
+        # Raw deflate: the stream is never finished, so the zlib header and checksum are useless.
+        self._context = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+    # The sync flush makes all the data available to the peer, keeping the history for the next data.
+    def compress(self, data):
+        return self._context.compress(data) + self._context.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ZlibDecompressor:
+    def __init__(self, buffer_size, max_output_size):
+        self._context = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._buffer = bytearray(buffer_size)
+        self._max_output_size = max_output_size
+
+
+    def get_buffer(self):
+        return memoryview(self._buffer)
+
+
+    # The output is limited: a few compressed bytes can be inflated to any size before the deframer checks the message size.
+    def decompress(self, data):
+        output = self._context.decompress(data, self._max_output_size)
+        if self._context.unconsumed_tail:
+            raise StreamCompressionError("The decompressed data exceeds {} bytes".format(self._max_output_size))
+
+        return output
+
+
+def negotiate(compression_list):
+    for compression in PREFERENCE_LIST:
+        if compression in compression_list:
+            return compression
+
+    return NONE
+
+
+def create_compressor(name):
+    if ZLIB == name:
+        return ZlibCompressor()
+
+    return None
+
+
+def create_decompressor(name, buffer_size, max_output_size):
+    if ZLIB == name:
+        return ZlibDecompressor(buffer_size, max_output_size)
+
+    return None
@@ -0,0 +1,34 @@
+import struct
+
+_HEADER = struct.Struct("<BI")
+_BITS_LIST = [1, 2, 4, 8]
+
+def pack(value_list):
+    max_value = max(value_list, default = 0)
+    bits = next(bits for bits in _BITS_LIST if max_value < 1 << bits)
+    values_per_byte = 8 // bits
+
+    padded_value_list = list(value_list) + [0] * (-len(value_list) % values_per_byte)
+    packed = bytearray(len(padded_value_list) // values_per_byte)
+    for i in range(0, values_per_byte):
+        shift = i * bits
+        for j, value in enumerate(padded_value_list[i::values_per_byte]):
+            packed[j] |= value << shift
+
+    return _HEADER.pack(bits, len(value_list)) + packed
+
+
+def unpack(data):
+    bits, size = _HEADER.unpack_from(data, 0)
+    table = _UNPACK_TABLE_DICT[bits]
+    value_data = b"".join(table[byte] for byte in memoryview(data)[_HEADER.size:])
+    return value_data[:size]
+
+
+def _create_unpack_table(bits):
+    mask = (1 << bits) - 1
+    shift_list = range(0, 8, bits)
+    return [bytes((byte >> shift) & mask for shift in shift_list) for byte in range(256)]
+
+
+_UNPACK_TABLE_DICT = {bits: _create_unpack_table(bits) for bits in _BITS_LIST}
@@ -1,34 +1,48 @@
+import collections
 import math
 
 
-class Vec2:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
+# Immutable: the operations create new vectors, so a vector can be shared (as positions in snapshots or cached directions).
+# As a tuple, the hash and the comparisons are computed natively and the hash mixes both coordinates.
+# Only the unpacking of the coordinates is kept from the tuple behaviour: a vector is equal only to another vector,
+# and it is neither ordered nor repeated.
+class Vec2(collections.namedtuple("Vec2", ["x", "y"])):
+    __slots__ = ()
 
     def copy(self):
-        return Vec2(self.x, self.y)
+        return self
 
 
     def __str__(self):
         return "Vec2({}, {})".format(self.x, self.y)
 
 
-    def __hash__(self):
-        return hash(self.x ^ self.y)
-
-
     def __eq__(self, v):
-        if isinstance(v, Vec2):
-            return self.x == v.x and self.y == v.y
-        return False
+        return isinstance(v, Vec2) and tuple.__eq__(self, v)
 
 
     def __ne__(self, v):
         return not self.__eq__(v)
 
 
+    # Defining __eq__ removes the inherited hash.
+    __hash__ = tuple.__hash__
+
+
+    def __lt__(self, v):
+        return NotImplemented
+
+
+    __le__ = __gt__ = __ge__ = __lt__
+
+
+    def __mul__(self, v):
+        return NotImplemented
+
+
+    __rmul__ = __mul__
+
+
     def __add__(self, v):
         return Vec2(self.x + v.x, self.y + v.y)
 
@@ -37,20 +51,18 @@ class Vec2:
         return Vec2(self.x - v.x, self.y - v.y)
 
 
-    def __iadd__(self, v):
-        self.x = self.x + v.x
-        self.y = self.y + v.y
-        return self
+    def get_length(self):
+        return math.sqrt(self.x**2 + self.y**2)
 
 
-    def __isub__(self, v):
-        self.x = self.x - v.x
-        self.y = self.y - v.y
-        return self
+    # Packs the position as an integer index of a row-major grid, as the ground and the arena grid store their cells.
+    def to_index(self, width):
+        return self.y * width + self.x
 
 
-    def get_length(self):
-        return math.sqrt(self.x**2 + self.y**2)
+    @staticmethod
+    def from_index(index, width):
+        return Vec2(index % width, index // width)
 
 
     @staticmethod
@@ -60,4 +72,7 @@ class Vec2:
 
     @staticmethod
     def zero():
-        return Vec2(0, 0)
+        return ZERO
+
+
+ZERO = Vec2(0, 0)
@@ -3,17 +3,34 @@ from .entity import Entity
 from .control import PlayerControl
 from .arena_state import ArenaState
 from .arena_grid import ArenaGrid
+from .projectile import Projectile
+from .projectile_engine import ProjectileEngine
 
 from common.direction import Direction
 from common.util.vec2 import Vec2
 
+DEFAULT_TICK_RATE = 60 #per second
+
+# The arena is updated only by ticks: it does not read the clock, so it can be simulated faster than real time and replayed.
 class Arena:
-    def __init__(self, dimension, seed):
+    def __init__(self, dimension, seed, tick_rate = DEFAULT_TICK_RATE):
+        self._tick_rate = tick_rate
         self._ground = Ground.fromSeed(dimension, seed)
         self._player_list = []
         self._entity_list = []
         self._spell_list = []
+
+        # Only the awake elements are updated: the idle ones sleep until an input or a collision wakes them.
+        self._awake_entity_list = []
+        self._awake_spell_list = []
+        self._woken_list = []
+        self._removed_list = []
+        self._order_dict = {} # element: order in which it was added to the arena
+        self._element_count = 0
         self._grid = ArenaGrid(Vec2(dimension, dimension))
+
+        # Without numpy, the projectiles are updated as the other spells.
+        self._projectile_engine = ProjectileEngine(self._ground, self._grid, tick_rate) if ProjectileEngine.is_available() else None
         self._step = 0
 
 
@@ -53,34 +70,102 @@ class Arena:
 
 
     def update(self):
-        state = ArenaState(self._step, self._ground, self._grid)
+        state = ArenaState(self._step, self._tick_rate, self._ground, self._grid)
 
         if self._step == 0:
             for player in self._player_list:
                 state.add_entity(player)
 
-        for element in self._entity_list + self._spell_list:
-            self._grid.remove(element)
-            element.update(state)
-            self._grid.add(element)
+        self._insert_woken_elements()
+
+        self._update_awake_list(self._awake_entity_list, state)
+        self._update_awake_list(self._awake_spell_list, state)
+        if self._projectile_engine:
+            self._projectile_engine.update(state)
 
-        self._entity_list = self._update_element_list(self._entity_list, state.get_new_entity_list())
-        self._spell_list = self._update_element_list(self._spell_list, state.get_new_spell_list())
+        self._add_new_elements(state.get_new_entity_list(), self._entity_list, self._awake_entity_list)
+        self._add_new_elements(state.get_new_spell_list(), self._spell_list, self._awake_spell_list)
+
+        if self._removed_list:
+            self._remove_elements()
 
         self._step += 1
 
 
-    def _update_element_list(self, old_element_list, new_element_list):
-        next_element_list = []
-        for element in old_element_list:
-            if not element.must_be_removed():
-                next_element_list.append(element);
+    def on_element_woken(self, element):
+        self._woken_list.append(element)
+
+
+    def on_element_removed(self, element):
+        self._removed_list.append(element)
+
+
+    # The woken elements are updated in the order they were added to the arena, as if they had never slept.
+    def _insert_woken_elements(self):
+        if self._woken_list:
+            for element in self._woken_list:
+                if not element.must_be_removed():
+                    if isinstance(element, Entity):
+                        self._awake_entity_list.append(element)
+                    else:
+                        self._awake_spell_list.append(element)
+
+            self._awake_entity_list.sort(key = self._order_dict.__getitem__)
+            self._awake_spell_list.sort(key = self._order_dict.__getitem__)
+            self._woken_list.clear()
+
+
+    # The grid is updated at once when an element moves, so the next elements collide with it as in the old remove and add.
+    # The list is compacted in place: the idle elements go to sleep and leave it.
+    def _update_awake_list(self, awake_list, state):
+        count = 0
+        for element in awake_list:
+            previous_position = element.get_position()
+            element.update(state)
+            if element.get_position() != previous_position:
+                self._grid.move(element, previous_position)
+
+            if not element.must_be_removed() and element.is_idle():
+                element.sleep()
             else:
-                self._grid.remove(element)
+                awake_list[count] = element
+                count += 1
+
+        del awake_list[count:]
 
+
+    def _add_new_elements(self, new_element_list, element_list, awake_list):
         for element in new_element_list:
             if not element.must_be_removed():
-                next_element_list.append(element)
+                element.set_listener(self)
+                self._order_dict[element] = self._element_count
+                self._element_count += 1
+                element_list.append(element)
+                if self._projectile_engine and isinstance(element, Projectile):
+                    self._projectile_engine.add(element)
+                else:
+                    awake_list.append(element)
+            else:
+                self._grid.remove(element)
 
-        return next_element_list
 
+    def _remove_elements(self):
+        for element in self._removed_list:
+            self._grid.remove(element)
+            del self._order_dict[element]
+
+        for element_list in (self._entity_list, self._spell_list, self._awake_entity_list, self._awake_spell_list):
+            Arena._compact(element_list)
+
+        self._removed_list.clear()
+
+
+    @staticmethod
+    def _compact(element_list):
+        count = 0
+        for element in element_list:
+            if not element.must_be_removed():
+                element_list[count] = element
+                count += 1
+
+        del element_list[count:]
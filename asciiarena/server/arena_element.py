@@ -4,21 +4,50 @@ class ArenaElement(Mobile):
     def __init__(self, position):
         Mobile.__init__(self, position)
         self._remove = False
+        self._sleeping = False
+        self._listener = None
+
+
+    # The listener (the arena) is notified when the element is removed or woken, so it does not look for them every tick.
+    def set_listener(self, listener):
+        self._listener = listener
 
 
     def remove(self):
-        self._remove = True
+        if not self._remove:
+            self._remove = True
+            if self._listener:
+                self._listener.on_element_removed(self)
 
 
     def must_be_removed(self):
         return self._remove
 
 
+    def is_sleeping(self):
+        return self._sleeping
+
+
+    def sleep(self):
+        self._sleeping = True
+
+
+    # Called when something could change the element: an input or a collision.
+    def wake(self):
+        if self._sleeping:
+            self._sleeping = False
+            if self._listener:
+                self._listener.on_element_woken(self)
+
+
+    # An idle element would not change with an update, so it can sleep until it is woken.
+    def is_idle(self):
+        return False
+
+
     def on_added_to_arena(self, arena_state):
         raise NotImplementedError()
 
 
     def update(self, arena_state):
         raise NotImplementedError()
-
-
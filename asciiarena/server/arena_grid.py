@@ -3,47 +3,187 @@ from .spell import Spell
 
 from common.util.vec2 import Vec2
 
-class ArenaGrid:
-    class GridElement:
-        def __init__(self):
-            self.entity = None
-            self.spell_list = []
-
+import math
 
+class ArenaGrid:
     def __init__(self, dimension):
+        # The cells are stored as the ground: in flat arrays indexed by y * dimension.x + x.
         self._dimension = dimension
-        self._grid = {}
+        self._entity_grid = [None] * (dimension.x * dimension.y)
 
-        for y in range(0, dimension.y):
-            for x in range(0, dimension.x):
-                self._grid[Vec2(x, y)] = ArenaGrid.GridElement()
+        # The same cells as a buffer of bytes (1 if there is an entity), to be read as an array without copies.
+        self._occupancy = bytearray(dimension.x * dimension.y)
 
+        # Only a few cells contain spells at the same time: just those ones have a spell list.
+        self._spell_list_dict = {}
 
-    def get(self, position):
-        return self._grid[position]
+
+    def get_dimension(self):
+        return self._dimension
 
 
     def get_entity(self, position):
-        return self._grid[position].entity
+        return self._entity_grid[position.y * self._dimension.x + position.x]
+
+
+    def get_occupancy(self):
+        return self._occupancy
 
 
     def get_spell_list(self, position):
-        return self._grid[position].spell_list
+        return self._spell_list_dict.get(position.y * self._dimension.x + position.x, [])
 
 
     def add(self, element):
-        if element.__class__ == Entity:
-            self._grid[element.get_position()].entity = element
-
-        elif element.__class__ == Spell:
-            self._grid[element.get_position()].spell_list.append(element)
+        self._add_at(self._index(element.get_position()), element)
 
 
     def remove(self, element):
-        if element.__class__ == Entity:
-            self._grid[element.get_position()].entity = None
-
-        elif element.__class__ == Spell:
-            self._grid[element.get_position()].spell_list.remove(element)
-
-
+        self._remove_at(self._index(element.get_position()), element)
+
+
+    # Updates the cell of an element that has moved from previous_position.
+    def move(self, element, previous_position):
+        self._remove_at(self._index(previous_position), element)
+        self._add_at(self._index(element.get_position()), element)
+
+
+    # The queries only visit the cells of the queried area: the empty cells of a row are skipped by searching the occupancy bytes.
+    # The entities are returned in row-major order.
+    def get_entity_list_in_rectangle(self, position, dimension):
+        entity_list = []
+        for y in range(max(0, position.y), min(self._dimension.y, position.y + dimension.y)):
+            self._find_entities_in_row(y, position.x, position.x + dimension.x, entity_list)
+
+        return entity_list
+
+
+    # Entities at a distance (as Vec2.distance) less or equal than radius from center.
+    def get_entity_list_in_radius(self, center, radius):
+        entity_list = []
+        radius_squared = radius * radius
+        for y in range(max(0, center.y - int(radius)), min(self._dimension.y, center.y + int(radius) + 1)):
+            half_width = int(math.sqrt(radius_squared - (y - center.y) ** 2))
+            self._find_entities_in_row(y, center.x - half_width, center.x + half_width + 1, entity_list)
+
+        return entity_list
+
+
+    # Searches by rings of cells around the position, until no ring can be nearer than the found entity.
+    # The ties are resolved by the row-major order. Returns None if there is no entity within max_distance.
+    def get_nearest_entity(self, position, max_distance = None, ignored_entity = None):
+        width = self._dimension.x
+        last_ring = max(position.x, width - 1 - position.x, position.y, self._dimension.y - 1 - position.y)
+        if None != max_distance:
+            last_ring = min(last_ring, int(max_distance))
+            max_distance_squared = max_distance * max_distance
+
+        nearest_entity = None
+        nearest_key = None
+        for ring in range(last_ring + 1):
+            if nearest_entity and nearest_key[0] < ring * ring:
+                break
+
+            ring_entity_list = []
+            for y in (position.y - ring, position.y + ring) if ring else (position.y,):
+                if 0 <= y < self._dimension.y:
+                    self._find_entities_in_row(y, position.x - ring, position.x + ring + 1, ring_entity_list)
+
+            for y in range(max(0, position.y - ring + 1), min(self._dimension.y, position.y + ring)):
+                for x in (position.x - ring, position.x + ring):
+                    if 0 <= x < width and self._occupancy[y * width + x]:
+                        ring_entity_list.append(self._entity_grid[y * width + x])
+
+            for entity in ring_entity_list:
+                entity_position = entity.get_position()
+                distance_squared = (entity_position.x - position.x) ** 2 + (entity_position.y - position.y) ** 2
+                key = (distance_squared, entity_position.to_index(width))
+                if entity is not ignored_entity and (None == nearest_key or key < nearest_key):
+                    if None == max_distance or distance_squared <= max_distance_squared:
+                        nearest_entity = entity
+                        nearest_key = key
+
+        return nearest_entity
+
+
+    # Walks the cells of the line from origin to target (Bresenham), without the origin.
+    # Returns the first entity in the line, or None if it reaches the target, the limits or a blocked cell of the ground before.
+    def raycast(self, origin, target, ground = None):
+        width = self._dimension.x
+        x, y = origin
+        delta_x = abs(target.x - origin.x)
+        delta_y = -abs(target.y - origin.y)
+        step_x = 1 if origin.x < target.x else -1
+        step_y = 1 if origin.y < target.y else -1
+        error = delta_x + delta_y
+        while x != target.x or y != target.y:
+            double_error = 2 * error
+            if double_error >= delta_y:
+                error += delta_y
+                x += step_x
+            if double_error <= delta_x:
+                error += delta_x
+                y += step_y
+
+            if not (0 <= x < width and 0 <= y < self._dimension.y):
+                return None
+
+            if ground and ground.is_blocked(Vec2(x, y)):
+                return None
+
+            if self._occupancy[y * width + x]:
+                return self._entity_grid[y * width + x]
+
+        return None
+
+
+    # The same as move, for a spell whose cell indexes are already known.
+    def move_spell(self, spell, previous_index, index):
+        spell_list = self._spell_list_dict[previous_index]
+        spell_list.remove(spell)
+        if not spell_list:
+            del self._spell_list_dict[previous_index]
+
+        spell_list = self._spell_list_dict.get(index)
+        if spell_list:
+            spell_list.append(spell)
+        else:
+            self._spell_list_dict[index] = [spell]
+
+
+    def _add_at(self, index, element):
+        if isinstance(element, Entity):
+            self._entity_grid[index] = element
+            self._occupancy[index] = 1
+
+        elif isinstance(element, Spell):
+            spell_list = self._spell_list_dict.get(index)
+            if spell_list:
+                spell_list.append(element)
+            else:
+                self._spell_list_dict[index] = [element]
+
+
+    def _remove_at(self, index, element):
+        if isinstance(element, Entity):
+            self._entity_grid[index] = None
+            self._occupancy[index] = 0
+
+        elif isinstance(element, Spell):
+            spell_list = self._spell_list_dict[index]
+            spell_list.remove(element)
+            if not spell_list:
+                del self._spell_list_dict[index]
+
+
+    def _find_entities_in_row(self, y, x_begin, x_end, entity_list):
+        row_index = y * self._dimension.x
+        end = row_index + max(0, min(self._dimension.x, x_end))
+        index = self._occupancy.find(1, row_index + max(0, x_begin), end)
+        while -1 != index:
+            entity_list.append(self._entity_grid[index])
+            index = self._occupancy.find(1, index + 1, end)
+
+
+    def _index(self, position):
+        return position.y * self._dimension.x + position.x
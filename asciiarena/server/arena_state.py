@@ -1,6 +1,7 @@
 class ArenaState:
-    def __init__(self, step, ground, grid):
+    def __init__(self, step, tick_rate, ground, grid):
         self._step = step
+        self._tick_rate = tick_rate
         self._ground = ground
         self._grid = grid
         self._new_entity_list = []
@@ -11,6 +12,10 @@ class ArenaState:
         return self._step
 
 
+    def get_tick_rate(self):
+        return self._tick_rate
+
+
     def get_ground(self):
         return self._ground
 
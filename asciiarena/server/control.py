@@ -22,6 +22,11 @@ class EntityControl:
         return spell
 
 
+    # Nothing pending to be done in the next update.
+    def is_idle(self):
+        raise NotImplementedError()
+
+
     def on_init(self, state):
         raise NotImplementedError()
 
@@ -37,19 +42,27 @@ class EntityControl:
 class PlayerControl(EntityControl):
     def __init__(self, entity):
         EntityControl.__init__(self, entity)
-        self._last_step_position = entity.get_position().copy()
+        self._last_step_position = entity.get_position()
         self._last_cast_skill = None
 
 
+    # The direction is held until the client releases it with Direction.NONE.
     def move(self, direction):
-        self._entity.enable_movement(True)
-        if direction != self._entity.get_direction():
+        self._entity.enable_movement(Direction.NONE != direction)
+        if Direction.NONE != direction and direction != self._entity.get_direction():
             self._entity.set_direction(direction)
-            self._entity.reset_movement_time_stamp()
+            self._entity.reset_movement_accumulator()
+
+        self._entity.wake()
 
 
     def cast(self, skill):
         self._last_cast_skill = skill
+        self._entity.wake()
+
+
+    def is_idle(self):
+        return None == self._last_cast_skill and self._entity.get_position() == self._last_step_position
 
 
     def on_init(self, state):
@@ -57,16 +70,14 @@ class PlayerControl(EntityControl):
 
 
     def on_update(self, state):
-        self._entity.enable_movement(False)
         last_movement = self._entity.get_position() - self._last_step_position
         if last_movement != Vec2.zero():
-            self._last_step_position = self._entity.get_position().copy()
+            self._last_step_position = self._entity.get_position()
             logger.debug("Player '{}' at step {} moves {}".format(self._entity.get_character(), state.get_step(), last_movement))
 
         if self._last_cast_skill != None:
             spell = super().register_cast(state, self._last_cast_skill)
             if spell:
-                state.add_spell(spell)
                 logger.debug("Player '{}' at step {} casts {}".format(self._entity.get_character(), state.get_step(), self._last_cast_skill))
 
             self._last_cast_skill = None
@@ -2,6 +2,8 @@ from .arena_element import ArenaElement
 
 from .spells.fire_ball import FireBall # remove when skill works properly
 
+SKILL_ID_LIST = [1, 2] # skills of the client keys: every skill casts a FireBall until the skills are implemented
+
 class Entity(ArenaElement):
     def __init__(self, character, position):
         ArenaElement.__init__(self, position)
@@ -31,7 +33,7 @@ class Entity(ArenaElement):
 
 
     def cast(self, skill):
-        return FireBall(int, self, self.get_cast_position())
+        return FireBall(skill, self, self.get_cast_position())
 
 
     def add_buff(self, buff):
@@ -42,6 +44,10 @@ class Entity(ArenaElement):
         pass
 
 
+    def is_idle(self):
+        return self.is_still() and (not self._control or self._control.is_idle())
+
+
     def on_added_to_arena(self, state):
         collide = state.get_ground().is_blocked(self._position) or state.get_grid().get_entity(self._position)
         if not collide:
@@ -54,9 +60,9 @@ class Entity(ArenaElement):
 
 
     def update(self, state):
-        previous_position = self._position.copy()
+        previous_position = self._position
 
-        super().compute_movement()
+        super().compute_movement(state.get_tick_rate())
         if self._position != previous_position:
             if state.get_ground().is_blocked(self._position):
                 self._position = previous_position
@@ -66,6 +72,7 @@ class Entity(ArenaElement):
             else:
                 entity = state.get_grid().get_entity(self._position)
                 if entity:
+                    entity.wake()
                     self._position = previous_position
                     if self._control:
                         self._control.on_collision(state, self._position)
@@ -50,7 +50,7 @@ class Ground:
 
 
     def get_grid_coordinates_of(self, index):
-        return Vec2(index % self._dimension, index // self._dimension)
+        return Vec2.from_index(index, self._dimension)
 
 
     def is_inside(self, position):
@@ -97,8 +97,8 @@ class Ground:
     def get_neighbour_list(self, position, filter_terrain_list, direction_list):
         neighbour_list = []
 
-        for direction_vec in Direction.as_vector_list(direction_list):
-            neighbour = position + direction_vec
+        for direction in direction_list:
+            neighbour = position + Direction.as_vector(direction)
             if self.is_terrain(neighbour, filter_terrain_list):
                 neighbour_list.append(neighbour)
 
@@ -117,8 +117,8 @@ class Ground:
 
 
     def has_any_neighbours(self, position, filter_terrain_list, direction_list):
-        for direction_vec in Direction.as_vector_list(direction_list):
-            neighbour = position + direction_vec
+        for direction in direction_list:
+            neighbour = position + Direction.as_vector(direction)
             if self.is_terrain(neighbour, filter_terrain_list):
                 return True
 
@@ -126,8 +126,8 @@ class Ground:
 
 
     def has_all_neighbours(self, position, filter_terrain_list, direction_list):
-        for direction_vec in Direction.as_vector_list(direction_list):
-            neighbour = position + direction_vec
+        for direction in direction_list:
+            neighbour = position + Direction.as_vector(direction)
             if not self.is_terrain(neighbour, filter_terrain_list):
                 return False
 
@@ -140,13 +140,16 @@ class Ground:
         up = -distance * int(direction != Direction.DOWN)
         down = distance * int(direction != Direction.UP) + 1
 
-        for x in range(left, right):
-            for y in range(up, down):
-                if x == 0 and y == 0:
+        # Called for every cell while generating: the cells are checked by index, without creating vectors.
+        dimension = self._dimension
+        for y in range(center.y + up, center.y + down):
+            inside_y = 0 <= y and y < dimension
+            for x in range(center.x + left, center.x + right):
+                if x == center.x and y == center.y:
                     continue
 
-                position = center + Vec2(x, y)
-                if not self.is_terrain(position, filter_terrain_list):
+                terrain = self._grid[y * dimension + x] if inside_y and 0 <= x and x < dimension else Terrain.OUTSIDE
+                if terrain not in filter_terrain_list:
                     return False
 
         return True
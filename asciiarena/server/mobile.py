@@ -1,9 +1,7 @@
 from common.direction import Direction
 from common.util.vec2 import Vec2
 
-import time
-
-DEFAULT_SPEED = 8
+DEFAULT_SPEED = 8 #cells per second
 
 
 class Mobile:
@@ -12,7 +10,8 @@ class Mobile:
         self._direction = Direction.NONE
         self._speed = DEFAULT_SPEED
         self._has_movement = False
-        self._last_movement_time_stamp = 0
+        # Movement progress measured in speed units per tick: a cell is advanced when it reaches the tick rate.
+        self._movement_accumulator = None
 
     def get_position(self):
         return self._position
@@ -34,6 +33,11 @@ class Mobile:
         return self._has_movement
 
 
+    # Without movement and with a full accumulator, computing the movement does not change anything.
+    def is_still(self):
+        return not self._has_movement and None == self._movement_accumulator
+
+
     def set_direction(self, direction):
         self._direction = direction
 
@@ -43,7 +47,7 @@ class Mobile:
 
 
     def displace(self, displacement):
-        self._position += displacement
+        self._position = self._position + displacement
 
 
     def set_speed(self, speed):
@@ -54,16 +58,25 @@ class Mobile:
         self._has_movement = value
 
 
-    def reset_movement_time_stamp(self):
-        self._last_movement_time_stamp = 0
+    # The next computed movement advances a cell.
+    def reset_movement_accumulator(self):
+        self._movement_accumulator = None
 
 
-    def compute_movement(self):
-        if self._has_movement:
-            current = time.time()
+    # Integer arithmetic over the ticks: the result does not depend on the clock and it is reproducible.
+    # The accumulator is also filled while stopped, so a stopped element starts moving at once, as with the old wall-clock check.
+    # At most a cell per tick is advanced, so a speed over the tick rate is limited to it.
+    def compute_movement(self, tick_rate):
+        if None == self._movement_accumulator:
+            self._movement_accumulator = tick_rate
+        else:
+            self._movement_accumulator = min(tick_rate, self._movement_accumulator + self._speed)
 
-            if current - self._last_movement_time_stamp > 1.0 / self._speed:
-                self._last_movement_time_stamp = current
-                movement = Direction.as_vector(self._direction)
-                self._position += movement
+        if self._movement_accumulator >= tick_rate:
+            if self._has_movement:
+                self._movement_accumulator -= tick_rate
+                self._position = self._position + Direction.as_vector(self._direction)
+            else:
+                # A full accumulator behaves as a new one: the element is still.
+                self._movement_accumulator = None
 
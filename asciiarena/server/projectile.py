@@ -0,0 +1,111 @@
+from .mobile import Mobile
+from .spell import Spell
+
+
+# A spell that only flies: its behaviour is its movement, its lifetime and its collisions, without an on_update by tick.
+# So the projectiles of an arena can be simulated all together by a ProjectileEngine, which owns their movement while attached.
+class Projectile(Spell):
+    def __init__(self, spell_spec, entity, position):
+        Spell.__init__(self, spell_spec, entity, position)
+        self._lifetime = None # seconds, None for unlimited
+        self._remaining_ticks = None
+        self._engine = None
+        self._slot = None
+
+
+    def get_lifetime(self):
+        return self._lifetime
+
+
+    def set_lifetime(self, lifetime):
+        self._lifetime = lifetime
+        self._remaining_ticks = None
+        if self._engine:
+            self._engine.set_remaining_ticks(self._slot, self.get_remaining_ticks(self._engine.get_tick_rate()))
+
+
+    # Ticks to live, or -1 if unlimited.
+    def get_remaining_ticks(self, tick_rate):
+        if None == self._lifetime:
+            return -1
+
+        if None == self._remaining_ticks:
+            self._remaining_ticks = max(1, round(self._lifetime * tick_rate))
+
+        return self._remaining_ticks
+
+
+    def get_slot(self):
+        return self._slot
+
+
+    def attach(self, engine, slot):
+        self._engine = engine
+        self._slot = slot
+
+
+    def detach(self):
+        self._engine = None
+        self._slot = None
+
+
+    def set_direction(self, direction):
+        super().set_direction(direction)
+        if self._engine:
+            self._engine.set_direction(self._slot, direction)
+
+
+    def set_position(self, position):
+        super().set_position(position)
+        if self._engine:
+            self._engine.set_position(self._slot, position)
+
+
+    def displace(self, displacement):
+        self.set_position(self._position + displacement)
+
+
+    def set_speed(self, speed):
+        super().set_speed(speed)
+        if self._engine:
+            self._engine.set_speed(self._slot, speed)
+
+
+    def enable_movement(self, value):
+        super().enable_movement(value)
+        if self._engine:
+            self._engine.enable_movement(self._slot, value)
+
+
+    def reset_movement_accumulator(self):
+        super().reset_movement_accumulator()
+        if self._engine:
+            self._engine.reset_movement_accumulator(self._slot)
+
+
+    def remove(self):
+        super().remove()
+        if self._engine:
+            self._engine.remove(self)
+
+
+    # Called by the engine: the position is only written back, it is already in the engine.
+    def move_to(self, position):
+        Mobile.set_position(self, position)
+
+
+    # Used without engine: the same steps that the engine runs by tick.
+    def update(self, state):
+        super().update(state)
+        if None != self._lifetime and not self.must_be_removed():
+            self._remaining_ticks = self.get_remaining_ticks(state.get_tick_rate()) - 1
+            if 0 == self._remaining_ticks:
+                self.on_lifetime_end(state)
+
+
+    def on_update(self, state):
+        pass
+
+
+    def on_lifetime_end(self, state):
+        self.remove()
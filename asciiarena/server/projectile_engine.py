@@ -0,0 +1,229 @@
+from common.direction import Direction
+from common.terrain import Terrain
+from common.util.vec2 import Vec2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None # The projectiles are updated one by one as the other spells.
+
+INITIAL_CAPACITY = 64
+
+
+# Simulates all the projectiles of an arena in a batch: their movement state is stored as arrays (one slot by projectile),
+# so the accumulators, the movements, the walls and the entities are computed at once for all of them by tick.
+# The projectile objects are kept for the callbacks and the snapshots: only the positions that change are written back to them.
+class ProjectileEngine:
+    @staticmethod
+    def is_available():
+        return None != numpy
+
+
+    def __init__(self, ground, grid, tick_rate):
+        self._tick_rate = tick_rate
+        self._grid = grid
+        self._dimension = ground.get_dimension()
+
+        # The ground does not change after its generation.
+        self._blocked = numpy.array([Terrain.is_blocked(terrain) for terrain in ground.get_grid()], dtype = bool)
+        self._occupancy = numpy.frombuffer(grid.get_occupancy(), dtype = bool)
+
+        # Arrays indexed by slot. The slots of the removed projectiles are reused.
+        self._x = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int32)
+        self._y = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int32)
+        self._dx = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int32)
+        self._dy = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int32)
+        self._speed = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int32)
+        self._accumulator = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int64)
+        self._remaining_ticks = numpy.full(INITIAL_CAPACITY, -1, dtype = numpy.int64) # -1 if unlimited
+        self._moving = numpy.zeros(INITIAL_CAPACITY, dtype = bool)
+        self._active = numpy.zeros(INITIAL_CAPACITY, dtype = bool)
+        self._order = numpy.zeros(INITIAL_CAPACITY, dtype = numpy.int64)
+        self._projectile_list = [None] * INITIAL_CAPACITY
+
+        self._free_slot_list = []
+        self._size = 0 # slots in use, including the free ones below it
+        self._active_count = 0
+        self._limited_count = 0 # projectiles with lifetime: without them the lifetimes are not computed
+        self._added_count = 0
+
+
+    def get_tick_rate(self):
+        return self._tick_rate
+
+
+    def get_active_count(self):
+        return self._active_count
+
+
+    def add(self, projectile):
+        if self._free_slot_list:
+            slot = self._free_slot_list.pop()
+        else:
+            if self._size == len(self._projectile_list):
+                self._grow()
+            slot = self._size
+            self._size += 1
+
+        position = projectile.get_position()
+        vector = projectile.get_direction_vec()
+        self._x[slot] = position.x
+        self._y[slot] = position.y
+        self._dx[slot] = vector.x
+        self._dy[slot] = vector.y
+        self._speed[slot] = projectile.get_speed()
+        self._accumulator[slot] = self._tick_rate # as a new accumulator: the first movement is done at once
+        self.set_remaining_ticks(slot, projectile.get_remaining_ticks(self._tick_rate))
+        self._moving[slot] = projectile.has_movement()
+        self._active[slot] = True
+        self._order[slot] = self._added_count # the callbacks are run in the order the projectiles were added
+
+        self._added_count += 1
+        self._active_count += 1
+        self._projectile_list[slot] = projectile
+        projectile.attach(self, slot)
+
+
+    def remove(self, projectile):
+        slot = projectile.get_slot()
+        self.set_remaining_ticks(slot, -1)
+        self._active[slot] = False
+        self._projectile_list[slot] = None
+        self._free_slot_list.append(slot)
+        self._active_count -= 1
+        projectile.detach()
+
+        if 0 == self._active_count:
+            self._size = 0
+            self._free_slot_list.clear()
+
+
+    def set_position(self, slot, position):
+        self._x[slot] = position.x
+        self._y[slot] = position.y
+
+
+    def set_direction(self, slot, direction):
+        vector = Direction.as_vector(direction)
+        self._dx[slot] = vector.x
+        self._dy[slot] = vector.y
+
+
+    def set_speed(self, slot, speed):
+        self._speed[slot] = speed
+
+
+    def enable_movement(self, slot, value):
+        self._moving[slot] = value
+
+
+    def reset_movement_accumulator(self, slot):
+        self._accumulator[slot] = self._tick_rate
+
+
+    def set_remaining_ticks(self, slot, ticks):
+        self._limited_count += int(ticks >= 0) - int(self._remaining_ticks[slot] >= 0)
+        self._remaining_ticks[slot] = ticks
+
+
+    # The same steps as Projectile.update, for all the projectiles at once.
+    def update(self, state):
+        if 0 == self._active_count:
+            return
+
+        size = self._size
+        tick_rate = self._tick_rate
+
+        accumulator = self._accumulator[:size]
+        numpy.minimum(accumulator + self._speed[:size], tick_rate, out = accumulator)
+        slot_array = numpy.flatnonzero(self._active[:size] & self._moving[:size] & (accumulator >= tick_rate))
+        if slot_array.size:
+            accumulator[slot_array] -= tick_rate
+            self._move(state, slot_array)
+
+        if self._limited_count:
+            self._update_lifetimes(state)
+
+
+    def _move(self, state, slot_array):
+        dimension = self._dimension
+        x = self._x[slot_array] + self._dx[slot_array]
+        y = self._y[slot_array] + self._dy[slot_array]
+        inside = (0 <= x) & (x < dimension) & (0 <= y) & (y < dimension)
+        cell = numpy.where(inside, y * dimension + x, 0)
+        free = inside & ~self._blocked[cell]
+
+        moved_slot_array = slot_array[free]
+        moved_x = x[free]
+        moved_y = y[free]
+        previous_cell = self._y[moved_slot_array] * dimension + self._x[moved_slot_array]
+        moved_cell = cell[free]
+        self._x[moved_slot_array] = moved_x
+        self._y[moved_slot_array] = moved_y
+        hit = self._occupancy[moved_cell]
+
+        # The grid and the objects are updated before any callback, as if each projectile had moved before the others collide.
+        projectile_list = self._projectile_list
+        move_spell = self._grid.move_spell
+        for slot, position_x, position_y, previous_index, index in zip(moved_slot_array.tolist(), moved_x.tolist(), moved_y.tolist(), previous_cell.tolist(), moved_cell.tolist()):
+            projectile = projectile_list[slot]
+            projectile.move_to(Vec2(position_x, position_y))
+            move_spell(projectile, previous_index, index)
+
+        wall_slot_array = slot_array[~free]
+        entity_slot_array = moved_slot_array[hit]
+        if wall_slot_array.size or entity_slot_array.size:
+            collision_slot_array = numpy.concatenate((wall_slot_array, entity_slot_array))
+            is_wall_array = numpy.arange(collision_slot_array.size) < wall_slot_array.size
+            sorted_order = numpy.argsort(self._order[collision_slot_array], kind = "stable")
+            for slot, is_wall in zip(collision_slot_array[sorted_order].tolist(), is_wall_array[sorted_order].tolist()):
+                projectile = self._projectile_list[slot]
+                if projectile:
+                    self._collide(state, projectile, is_wall)
+
+
+    def _collide(self, state, projectile, is_wall):
+        position = projectile.get_position()
+        if is_wall:
+            projectile.on_wall_collision(state, position)
+        else:
+            entity = self._grid.get_entity(position)
+            entity.wake()
+            projectile.on_entity_collision(state, entity)
+
+
+    def _update_lifetimes(self, state):
+        size = self._size
+        remaining_ticks = self._remaining_ticks[:size]
+        limited = self._active[:size] & (remaining_ticks > 0)
+        numpy.subtract(remaining_ticks, 1, out = remaining_ticks, where = limited)
+
+        expired_slot_array = numpy.flatnonzero(limited & (0 == remaining_ticks))
+        if expired_slot_array.size:
+            sorted_order = numpy.argsort(self._order[expired_slot_array], kind = "stable")
+            for slot in expired_slot_array[sorted_order].tolist():
+                projectile = self._projectile_list[slot]
+                if projectile:
+                    projectile.on_lifetime_end(state)
+
+
+    def _grow(self):
+        capacity = 2 * len(self._projectile_list)
+        self._x = ProjectileEngine._resize(self._x, capacity)
+        self._y = ProjectileEngine._resize(self._y, capacity)
+        self._dx = ProjectileEngine._resize(self._dx, capacity)
+        self._dy = ProjectileEngine._resize(self._dy, capacity)
+        self._speed = ProjectileEngine._resize(self._speed, capacity)
+        self._accumulator = ProjectileEngine._resize(self._accumulator, capacity)
+        self._remaining_ticks = ProjectileEngine._resize(self._remaining_ticks, capacity, -1)
+        self._moving = ProjectileEngine._resize(self._moving, capacity)
+        self._active = ProjectileEngine._resize(self._active, capacity)
+        self._order = ProjectileEngine._resize(self._order, capacity)
+        self._projectile_list.extend([None] * (capacity - len(self._projectile_list)))
+
+
+    @staticmethod
+    def _resize(array, capacity, fill = 0):
+        new_array = numpy.full(capacity, fill, dtype = array.dtype)
+        new_array[:array.size] = array
+        return new_array
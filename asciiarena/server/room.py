@@ -6,6 +6,7 @@ class Player:
         self._endpoint = endpoint
         self._control = None
         self._points = 0
+        self._session_token = None
 
 
     def get_character(self):
@@ -24,6 +25,14 @@ class Player:
         return self._control
 
 
+    def set_session_token(self, session_token):
+        self._session_token = session_token
+
+
+    def get_session_token(self):
+        return self._session_token
+
+
     def set_control(self, control):
         self._control = control
 
@@ -40,6 +49,9 @@ class Room:
 
     def __init__(self, size, points_to_win):
         self._player_dict = {}
+        # Indexes of the connected players, updated only when a player joins or leaves.
+        self._endpoint_player_dict = {}
+        self._endpoint_list = []
         self._size = size
         self._points_to_win = points_to_win
 
@@ -48,7 +60,7 @@ class Room:
         player = self.get_player(character)
         if player:
             if None == player.get_endpoint():
-                player.set_endpoint(endpoint)
+                self.set_player_endpoint(player, endpoint)
                 return Room.ADDITION_REUSE
 
             else:
@@ -58,11 +70,22 @@ class Room:
             return Room.ADDITION_ERR_COMPLETE
 
         else:
-            new_player = Player(character, endpoint)
+            new_player = Player(character, None)
             self._player_dict[character] = new_player
+            self.set_player_endpoint(new_player, endpoint)
             return Room.ADDITION_SUCCESSFUL
 
 
+    def set_player_endpoint(self, player, endpoint):
+        self._endpoint_player_dict.pop(player.get_endpoint(), None)
+        player.set_endpoint(endpoint)
+        if None != endpoint:
+            self._endpoint_player_dict[endpoint] = player
+
+        # A new list is created: the previous one could be still referenced by a pending output package.
+        self._endpoint_list = [player.get_endpoint() for player in self._player_dict.values() if None != player.get_endpoint()]
+
+
     def is_complete(self):
         return len(self._player_dict) == self._size
 
@@ -94,12 +117,9 @@ class Room:
         return winner_list
 
 
+    # The returned list is shared: it must not be modified.
     def get_endpoint_list(self):
-        endpoint_list = []
-        for player in self._player_dict.values():
-            if player.get_endpoint() != None:
-                endpoint_list.append(player.get_endpoint())
-        return endpoint_list
+        return self._endpoint_list
 
 
     def get_points_to_win(self):
@@ -107,8 +127,12 @@ class Room:
 
 
     def get_player_with_endpoint(self, endpoint):
+        return self._endpoint_player_dict.get(endpoint, None)
+
+
+    def get_player_with_session_token(self, session_token):
         for player in self._player_dict.values():
-            if player.get_endpoint() == endpoint:
+            if player.get_session_token() == session_token:
                 return player
         return None
 
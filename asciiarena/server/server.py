@@ -1,15 +1,19 @@
 from common.network_manager import NetworkManager
+from common.input_limiter import InputLimiter
 from common.logging import logger
 from common import version
-from .server_manager import ServerManager
+from .server_manager import ServerManager, DEFAULT_TICK_RATE
+from .tick_scheduler import TickScheduler
 
 class Server:
-    def __init__(self, players, points, arena_size, seed):
+    def __init__(self, players, points, arena_size, seed, network_factory = NetworkManager, tick_rate = DEFAULT_TICK_RATE, tick_policy = TickScheduler.Policy.CATCH_UP):
         logger.info("Server version: {}".format(version.CURRENT))
-        self._server_manager = ServerManager(players, points, arena_size, seed)
+        self._server_manager = ServerManager(players, points, arena_size, seed, tick_rate, tick_policy)
+        self._network_factory = network_factory
 
     def run(self, port):
-        network = NetworkManager(self._server_manager)
+        network = self._network_factory(self._server_manager, input_limiter = InputLimiter(self._server_manager.get_tick_rate()))
+        self._server_manager.set_scheduler(network.call_later)
 
         if network.listen(port):
             network.run()
@@ -1,31 +1,40 @@
 from .room import Room
-from .arena import Arena
+from .arena import Arena, DEFAULT_TICK_RATE
+from .entity import SKILL_ID_LIST
+from .snapshot_rate import SnapshotRateController
+from .tick_scheduler import TickScheduler
 
 from common.package_queue import PackageQueue, InputPack, OutputPack
 from common.logging import logger
 from common.direction import Direction
-from common import version as Version, message as Message
+from common import version as Version, message as Message, message_codec as MessageCodec, stream_compression as StreamCompression
+from common.frame_snapshot import FrameSnapshot, SnapshotHistory
+from common.clock_estimator import ClockEstimator
 from common.util.vec2 import Vec2
+from common.util import bit_packing as BitPacking
 
 import enum
 import threading
 import time
 import string
 import random
+import secrets
 
 WAITING_TO_INIT_ARENA = 1.0 #seconds
-FRAME_MAX_RATE = 60 #per second
 RANDOM_SEED_SIZE = 6
+STATS_LOG_INTERVAL = 5 #seconds
+PING_INTERVAL = 1.0 #seconds
 
 
 class ServerSignal(enum.Enum):
     NEW_ARENA_SIGNAL = enum.auto()
     ARENA_CREATED_SIGNAL = enum.auto()
     COMPUTE_FRAME_SIGNAL = enum.auto()
+    PING_SIGNAL = enum.auto()
 
 
 class ServerManager(PackageQueue):
-    def __init__(self, players, points, arena_size, seed):
+    def __init__(self, players, points, arena_size, seed, tick_rate = DEFAULT_TICK_RATE, tick_policy = TickScheduler.Policy.CATCH_UP):
         PackageQueue.__init__(self)
         self._active = True
         self._room = Room(players, points)
@@ -33,87 +42,190 @@ class ServerManager(PackageQueue):
         self._seed = seed
 
         self._arena = None
+        self._arena_info_message = None
         self._arena_enabled = False
-
-        self._last_frame_time_stamp = 0
-        self._last_waiting_time = 0
+        self._snapshot_history = SnapshotHistory()
+        self._frame_ack_dict = {}
+        self._snapshot_rate_dict = {}
+        self._clock_estimator_dict = {}
+
+        # Every tick computes a frame. The scheduler only enqueues the signal: the frame is computed in this thread.
+        compute_frame_signal = lambda: self.enqueue_input(InputPack(ServerSignal.COMPUTE_FRAME_SIGNAL, None))
+        self._tick_scheduler = TickScheduler(tick_rate, compute_frame_signal, self.get_counters(), tick_policy)
+        self._last_stats_time_stamp = time.time()
+        self._call_later = None
+
+        # Handler and dispatch counter names of each message type and signal.
+        self._request_handler_dict = {
+            Message.Version: ServerManager._handler_entry(self._info_server_request, "version"),
+            Message.Login: ServerManager._handler_entry(self._login_request, "login"),
+            Message.Resume: ServerManager._handler_entry(self._resume_request, "resume"),
+            Message.PlayerMovement: ServerManager._handler_entry(self._player_movement_request, "player_movement"),
+            Message.PlayerCast: ServerManager._handler_entry(self._player_cast_request, "player_cast"),
+            Message.FrameAck: ServerManager._handler_entry(self._frame_ack_request, "frame_ack"),
+            Message.Ping: ServerManager._handler_entry(self._ping_request, "ping"),
+            Message.Pong: ServerManager._handler_entry(self._pong_request, "pong"),
+        }
+
+        self._signal_handler_dict = {
+            ServerSignal.NEW_ARENA_SIGNAL: ServerManager._handler_entry(self._new_arena_signal, "new_arena_signal"),
+            ServerSignal.ARENA_CREATED_SIGNAL: ServerManager._handler_entry(self._arena_created_signal, "arena_created_signal"),
+            ServerSignal.COMPUTE_FRAME_SIGNAL: ServerManager._handler_entry(self._compute_frame_signal, "compute_frame_signal"),
+            ServerSignal.PING_SIGNAL: ServerManager._handler_entry(self._ping_signal, "ping_signal"),
+        }
 
         logger.info("Required players: {} - Points to win: {}".format(players, points))
 
 
-    def process_requests(self):
-        while self._active:
-            input_pack = self._input_queue.get()
-            if input_pack.message:
-                if isinstance(input_pack.message, Message.Version):
-                    self._info_server_request(input_pack.message, input_pack.endpoint)
+    def set_scheduler(self, call_later):
+        self._call_later = call_later
 
-                elif isinstance(input_pack.message, Message.Login):
-                    self._login_request(input_pack.message, input_pack.endpoint)
 
-                elif isinstance(input_pack.message, Message.PlayerMovement):
-                    self._player_movement_request(input_pack.message, input_pack.endpoint)
+    def get_tick_rate(self):
+        return self._tick_scheduler.get_rate()
 
-                elif isinstance(input_pack.message, Message.PlayerCast):
-                    self._player_cast_request(input_pack.message, input_pack.endpoint)
 
-                elif isinstance(input_pack.message, ServerSignal):
-                    if ServerSignal.NEW_ARENA_SIGNAL == input_pack.message:
-                        self._new_arena_signal()
+    def get_clock_estimator(self, endpoint):
+        return self._clock_estimator_dict.get(endpoint)
 
-                    elif ServerSignal.COMPUTE_FRAME_SIGNAL == input_pack.message:
-                        self._compute_frame_signal()
-
-                    elif ServerSignal.ARENA_CREATED_SIGNAL == input_pack.message:
-                        self._arena_created_signal()
 
+    def process_requests(self):
+        self._server_signal(ServerSignal.PING_SIGNAL, PING_INTERVAL)
+        while self._active:
+            input_pack = self.dequeue_input()
+            if None == input_pack.endpoint:
+                self._dispatch(self._signal_handler_dict[input_pack.message])
+
+            elif input_pack.message:
+                handler_entry = self._request_handler_dict.get(input_pack.message.__class__)
+                if handler_entry:
+                    self._dispatch(handler_entry, input_pack.message, input_pack.endpoint)
                 else:
                     logger.error("Unknown message type: {} - Rejecting connection...".format(input_pack.message.__class__));
-                    self._output_queue(OutputPack(None, input_pack.endpoint))
+                    self.enqueue_output(OutputPack(None, input_pack.endpoint))
             else:
                 self._lost_connection(input_pack.endpoint)
 
 
+    def _dispatch(self, handler_entry, *args):
+        handler, calls_name, time_name, max_time_name = handler_entry
+        time_stamp = time.time()
+        handler(*args)
+        handler_time = (time.time() - time_stamp) * 1000
+
+        counters = self.get_counters()
+        counters.add(calls_name)
+        counters.add(time_name, handler_time)
+        counters.update_max(max_time_name, handler_time)
+
+
+    # The counter names are built once.
+    @staticmethod
+    def _handler_entry(handler, name):
+        return handler, "dispatch_{}_calls".format(name), "dispatch_{}_ms".format(name), "dispatch_{}_max_ms".format(name)
+
+
     def _info_server_request(self, version_message, endpoint):
+        self._check_version(version_message, endpoint)
+        self._send_game_info(endpoint)
+
+
+    # The Resume message contains the Version fields: both messages are checked in the same way.
+    def _check_version(self, version_message, endpoint):
         validation = Version.check(version_message.value)
 
-        checked_version_message = Message.CheckedVersion(Version.CURRENT, validation)
-        self._output_queue.put(OutputPack(checked_version_message, endpoint))
+        codec = MessageCodec.negotiate(version_message.codec_list)
+        compression = StreamCompression.negotiate(version_message.compression_list)
+
+        checked_version_message = Message.CheckedVersion(Version.CURRENT, validation, codec, compression)
+        self.enqueue_output(OutputPack(checked_version_message, endpoint))
 
         compatibility = "compatible" if validation else "incompatible"
-        logger.debug("Client with version {} - {}".format(version_message.value, compatibility))
+        logger.debug("Client with version {} - {} - codec: {} - compression: {}".format(version_message.value, compatibility, codec, compression))
+        return validation
 
+
+    def _send_game_info(self, endpoint):
         character_list = self._room.get_character_list()
         players = self._room.get_size()
         points = self._room.get_points_to_win()
 
         game_info_message = Message.GameInfo(character_list, players, points, self._arena_size, self._seed)
-        self._output_queue.put(OutputPack(game_info_message, endpoint))
+        self.enqueue_output(OutputPack(game_info_message, endpoint))
 
 
     def _login_request(self, login_message, endpoint):
         status = self._register_player(login_message.character, endpoint)
 
-        login_status_message = Message.LoginStatus(status)
-        self._output_queue.put(OutputPack(login_status_message, endpoint))
+        session_token = Message.LoginStatus.NO_SESSION_TOKEN
+        if Message.LoginStatus.LOGGED == status or Message.LoginStatus.RECONNECTION == status:
+            session_token = self._create_session_token(self._room.get_player_with_endpoint(endpoint))
+
+        login_status_message = Message.LoginStatus(status, session_token)
+        self.enqueue_output(OutputPack(login_status_message, endpoint))
 
         if Message.LoginStatus.LOGGED == status or Message.LoginStatus.RECONNECTION == status:
             self._log_players()
 
         if Message.LoginStatus.LOGGED == status:
             players_info_message = Message.PlayersInfo(self._room.get_character_list())
-            self._output_queue.put(OutputPack(players_info_message, self._room.get_endpoint_list()))
+            self.enqueue_output(OutputPack(players_info_message, self._room.get_endpoint_list()))
 
             if self._room.is_complete():
                 self._server_signal(ServerSignal.NEW_ARENA_SIGNAL, 0)
 
         elif Message.LoginStatus.RECONNECTION == status:
-            players_info_message = Message.PlayersInfo(self._room.get_character_list())
-            self._output_queue.put(OutputPack(players_info_message, endpoint))
+            self._send_reconnection_info(endpoint)
+
+
+    def _resume_request(self, resume_message, endpoint):
+        validation = self._check_version(resume_message, endpoint)
+
+        player = self._room.get_player_with_session_token(resume_message.session_token)
+        if not validation or Message.LoginStatus.NO_SESSION_TOKEN == resume_message.session_token or not player:
+            logger.debug("Resume attempt with an invalid session")
+            login_status_message = Message.LoginStatus(Message.LoginStatus.INVALID_SESSION, Message.LoginStatus.NO_SESSION_TOKEN)
+            self.enqueue_output(OutputPack(login_status_message, endpoint))
+            self._send_game_info(endpoint)
+            return
+
+        # The token proves the identity, so a previous connection not closed yet (i.e. half-open) is replaced.
+        previous_endpoint = player.get_endpoint()
+        if previous_endpoint:
+            self.enqueue_output(OutputPack(None, previous_endpoint))
+            self._lost_connection(previous_endpoint)
+
+        self._room.set_player_endpoint(player, endpoint)
+        logger.info("Player '{}' resumed its session".format(player.get_character()))
+        self._log_players()
+
+        ground_cached = self._arena_info_message and self._arena_info_message.seed == resume_message.seed
+        status = Message.LoginStatus.RESUMED if ground_cached else Message.LoginStatus.RECONNECTION
 
-            if self._arena:
-                arena_info_message = Message.ArenaInfo(self._arena.get_ground().get_seed(), self._arena.get_ground().get_grid())
-                self._output_queue.put(OutputPack(arena_info_message, endpoint))
+        login_status_message = Message.LoginStatus(status, self._create_session_token(player))
+        self.enqueue_output(OutputPack(login_status_message, endpoint))
+
+        if Message.LoginStatus.RECONNECTION == status:
+            self._send_reconnection_info(endpoint)
+
+        # The last snapshot is sent at once as keyframe. Without frame acks from the new endpoint, the next frames are keyframes too.
+        snapshot = self._snapshot_history.get(self._arena.get_step()) if self._arena_enabled else None
+        if snapshot:
+            self.enqueue_output(OutputPack(snapshot.create_frame(), endpoint))
+
+
+    def _send_reconnection_info(self, endpoint):
+        players_info_message = Message.PlayersInfo(self._room.get_character_list())
+        self.enqueue_output(OutputPack(players_info_message, endpoint))
+
+        if self._arena_info_message:
+            self.enqueue_output(OutputPack(self._arena_info_message, endpoint))
+
+
+    def _create_session_token(self, player):
+        session_token = secrets.randbits(64) or 1
+        player.set_session_token(session_token)
+        return session_token
 
 
     def _register_player(self, character, endpoint):
@@ -145,7 +257,8 @@ class ServerManager(PackageQueue):
         seed = self._seed if "" != self._seed else ServerManager.compute_random_seed(RANDOM_SEED_SIZE)
         logger.info("Load arena - size: {}, seed: {}".format(self._arena_size, seed))
 
-        self._arena = Arena(self._arena_size, seed)
+        self._arena_info_message = None
+        self._arena = Arena(self._arena_size, seed, self._tick_scheduler.get_rate())
 
         position_list = self._arena.compute_player_origins(self._room.get_size())
 
@@ -153,6 +266,10 @@ class ServerManager(PackageQueue):
             control = self._arena.create_player(player.get_character(), position_list[i])
             player.set_control(control)
 
+        # The ground never changes during the arena, so it is packed only once for every (re)joining player.
+        ground = self._arena.get_ground()
+        self._arena_info_message = Message.ArenaInfo(ground.get_seed(), BitPacking.pack(ground.get_grid()))
+
         post_time_stamp = time.time()
         logger.info("Load arena - done! {0:.2}s".format(post_time_stamp - pre_time_stamp))
 
@@ -167,36 +284,74 @@ class ServerManager(PackageQueue):
 
 
     def _arena_created_signal(self):
-        arena_info_message = Message.ArenaInfo(self._arena.get_ground().get_seed(), self._arena.get_ground().get_grid())
-        self._output_queue.put(OutputPack(arena_info_message, self._room.get_endpoint_list()))
+        self.enqueue_output(OutputPack(self._arena_info_message, self._room.get_endpoint_list()))
+
+        self._snapshot_history.clear()
+        self._frame_ack_dict.clear()
+        for snapshot_rate in self._snapshot_rate_dict.values():
+            snapshot_rate.restart(self._arena.get_step())
 
         self._arena_enabled = True
-        self._server_signal(ServerSignal.COMPUTE_FRAME_SIGNAL, 0)
+        self._tick_scheduler.start()
 
 
     def _compute_frame_signal(self):
         self._arena.update()
 
-        frame_message = self._create_frame_message()
-        self._output_queue.put(OutputPack(frame_message, self._room.get_endpoint_list()))
+        snapshot = self._create_frame_snapshot()
+        self._snapshot_history.add(snapshot)
 
-        if not self._arena.has_finished():
-            current_time = time.time()
-            last_frame_time = current_time - self._last_frame_time_stamp
-            last_computation_time = last_frame_time - self._last_waiting_time
-            self._last_frame_time_stamp = current_time
-            self._last_waiting_time = max(0, 1 / FRAME_MAX_RATE - last_computation_time)
+        # Endpoints that acknowledged the same step share the same delta frame.
+        base_endpoint_dict = {}
+        for endpoint in self._room.get_endpoint_list():
+            if not self._check_snapshot_rate(endpoint, snapshot.get_step()):
+                continue
+
+            base = self._snapshot_history.get(self._frame_ack_dict.get(endpoint, Message.Frame.KEYFRAME))
+            base_endpoint_dict.setdefault(base, []).append(endpoint)
 
-            self._server_signal(ServerSignal.COMPUTE_FRAME_SIGNAL, self._last_waiting_time)
+        for base, endpoint_list in base_endpoint_dict.items():
+            frame_message = snapshot.create_frame(base)
+            self.enqueue_output(OutputPack(frame_message, endpoint_list))
 
-        elif [] == self._room.get_winner_list():
-            self._server_signal(ServerSignal.NEW_ARENA_SIGNAL, 0)
+        self._check_stats_log()
+
+        # The tick of a finished arena is not released: a catch-up tick could be run before the scheduler is stopped.
+        # start() releases it for the next arena.
+        if not self._arena.has_finished():
+            self._tick_scheduler.tick_done()
 
         else:
-            pass #TODO: reset signal => clear the room
+            self._tick_scheduler.stop()
+
+            if [] == self._room.get_winner_list():
+                self._server_signal(ServerSignal.NEW_ARENA_SIGNAL, 0)
+
+            else:
+                pass #TODO: reset signal => clear the room
 
 
-    def _create_frame_message(self):
+    def _check_snapshot_rate(self, endpoint, step):
+        snapshot_rate = self._snapshot_rate_dict.get(endpoint)
+        if not snapshot_rate:
+            snapshot_rate = SnapshotRateController(self._tick_scheduler.get_rate(), step)
+            self._snapshot_rate_dict[endpoint] = snapshot_rate
+
+        clock_estimator = self._clock_estimator_dict.get(endpoint)
+        change = snapshot_rate.update(step, clock_estimator.get_rtt() if clock_estimator else 0)
+        if change:
+            player = self._room.get_player_with_endpoint(endpoint)
+            self.get_counters().add("snapshot_rate_increases" if change > 0 else "snapshot_rate_decreases")
+            logger.debug("Player '{}' snapshot rate: {:.2f}fps".format(player.get_character(), snapshot_rate.get_rate()))
+
+        if not snapshot_rate.should_send():
+            self.get_counters().add("frames_skipped_by_rate")
+            return False
+
+        return True
+
+
+    def _create_frame_snapshot(self):
         entity_list = []
         for entity in self._arena.get_entity_list():
             entity = Message.Frame.Entity(id(entity), entity.get_character(), entity.get_position(), entity.get_direction())
@@ -204,31 +359,38 @@ class ServerManager(PackageQueue):
 
         spell_list = []
         for spell in self._arena.get_spell_list():
-            spell = Message.Frame.Spell(id(entity), spell.get_spec().__class__, spell.get_position(), spell.get_direction())
+            spell = Message.Frame.Spell(id(spell), spell.get_spec(), spell.get_position(), spell.get_direction())
             spell_list.append(spell)
 
-        return Message.Frame(self._arena.get_step(), entity_list, spell_list)
+        return FrameSnapshot.from_lists(self._arena.get_step(), entity_list, spell_list)
 
 
     def _player_movement_request(self, player_movement_message, endpoint):
         player = self._check_player_for_event(endpoint)
+        if not player:
+            return
 
-        if not Direction.is_orthogonal(player_movement_message.direction):
+        direction = player_movement_message.direction
+        if Direction.NONE != direction and not Direction.is_orthogonal(direction):
             logger.error("Unexpected movement value from player '{}'".format(player.get_character()))
-            self._output_queue.put(OutputPack("", endpoint))
+            self.enqueue_output(OutputPack("", endpoint))
             return
 
+        logger.debug("Player '{}' input from step {} at step {}".format(player.get_character(), player_movement_message.step, self._arena.get_step()))
+
         control = player.get_control()
         if control:
-            control.move(player_movement_message.direction)
+            control.move(direction)
 
 
     def _player_cast_request(self, player_cast_message, endpoint):
         player = self._check_player_for_event(endpoint)
+        if not player:
+            return
 
-        if False: #Check that the skill exists
+        if player_cast_message.skill_id not in SKILL_ID_LIST:
             logger.error("Unexpected skill from player '{}'".format(player.get_character()))
-            self._output_queue.put(OutputPack("", endpoint))
+            self.enqueue_output(OutputPack("", endpoint))
             return
 
         control = player.get_control()
@@ -236,40 +398,89 @@ class ServerManager(PackageQueue):
             control.cast(player_cast_message.skill_id)
 
 
+    def _frame_ack_request(self, frame_ack_message, endpoint):
+        player = self._check_player_for_event(endpoint)
+        if player:
+            self._frame_ack_dict[endpoint] = frame_ack_message.step
+            snapshot_rate = self._snapshot_rate_dict.get(endpoint)
+            if snapshot_rate:
+                snapshot_rate.notify_ack(frame_ack_message.step)
+
+
+    def _ping_request(self, ping_message, endpoint):
+        pong_message = Message.Pong(ping_message.time_stamp, time.time())
+        self.enqueue_output(OutputPack(pong_message, endpoint))
+
+
+    def _pong_request(self, pong_message, endpoint):
+        clock_estimator = self._clock_estimator_dict.setdefault(endpoint, ClockEstimator())
+        clock_estimator.add_sample(pong_message.origin_time_stamp, pong_message.time_stamp, time.time())
+
+
+    def _ping_signal(self):
+        endpoint_list = self._room.get_endpoint_list()
+        if endpoint_list:
+            self.enqueue_output(OutputPack(Message.Ping(time.time()), endpoint_list))
+
+        self._server_signal(ServerSignal.PING_SIGNAL, PING_INTERVAL)
+
+
     def _check_player_for_event(self, endpoint):
         player = self._room.get_player_with_endpoint(endpoint)
 
         if not player:
             logger.error("Received event from unknown player")
-            self._output_queue.put(OutputPack("", endpoint))
+            self.enqueue_output(OutputPack("", endpoint))
             return
 
         if not self._arena_enabled:
             logger.error("Received player event from '{}' without available arena".format(player.get_character()))
-            self._output_queue.put(OutputPack("", endpoint))
+            self.enqueue_output(OutputPack("", endpoint))
             return
 
         return player
 
 
     def _lost_connection(self, endpoint):
+        self._frame_ack_dict.pop(endpoint, None)
+        self._snapshot_rate_dict.pop(endpoint, None)
+        self._clock_estimator_dict.pop(endpoint, None)
+
         player = self._room.get_player_with_endpoint(endpoint)
         if player:
-            player.set_endpoint(None)
+            # The movement is held until released: nobody would release it.
+            control = player.get_control()
+            if control:
+                control.move(Direction.NONE)
+
+            self._room.set_player_endpoint(player, None)
             logger.info("Player '{}' disconnected".format(player.get_character()))
             self._log_players()
 
 
     def _server_signal(self, signal, time):
-        queue_signal = lambda: self._input_queue.put(InputPack(signal, None))
+        queue_signal = lambda: self.enqueue_input(InputPack(signal, None))
         if time > 0:
-            timer = threading.Timer(time, queue_signal)
-            timer.daemon = True
-            timer.start()
+            self._call_later(time, queue_signal)
         else:
             queue_signal()
 
 
+    def _check_stats_log(self):
+        current_time = time.time()
+        if current_time - self._last_stats_time_stamp > STATS_LOG_INTERVAL:
+            self._last_stats_time_stamp = current_time
+            logger.info("Stats - {}".format(self.get_counters().format() or "no events"))
+            for endpoint, clock_estimator in self._clock_estimator_dict.items():
+                player = self._room.get_player_with_endpoint(endpoint)
+                if player:
+                    logger.info("Latency - player '{}' - {}".format(player.get_character(), clock_estimator.format()))
+            for endpoint, snapshot_rate in self._snapshot_rate_dict.items():
+                player = self._room.get_player_with_endpoint(endpoint)
+                if player:
+                    logger.info("Snapshot rate - player '{}' - {}".format(player.get_character(), snapshot_rate.format()))
+
+
     def _log_players(self):
         connected_players = self._room.get_character_list_with_endpoints()
         logger.info("Logged players: {} - Connected players: {}".format(self._room.get_character_list(), connected_players))
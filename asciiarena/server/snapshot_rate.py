@@ -0,0 +1,114 @@
+import time
+
+MIN_FRAME_RATE = 5 #per second
+RATE_INCREASE = 5 #frames per second, each increase period
+RATE_DECREASE_FACTOR = 0.8
+FRAME_LAG_MARGIN = 4 #steps
+DECREASE_COOLDOWN = 0.5 #seconds
+INCREASE_PERIOD = 0.5 #seconds
+DELIVERY_PERIOD = 0.5 #seconds
+DELIVERY_SMOOTHING = 0.5
+
+
+class SnapshotRateController:
+    def __init__(self, max_rate, step):
+        self._max_rate = max_rate
+        self._rate = max_rate
+        self._credit = 0
+        self._last_change_time_stamp = time.time()
+        self._last_change_lag = 0
+
+        # Frames acknowledged per second: the rate that actually reaches the client.
+        self._delivery_rate = None
+        self._delivery_frames = 0
+        self._delivery_time_stamp = time.time()
+
+        self._sent_frames = 0
+        self._acked_frames = 0
+        self._stats_time_stamp = time.time()
+        self.restart(step)
+
+
+    def restart(self, step):
+        self._last_ack_step = step
+        self._credit = 1
+
+
+    def get_rate(self):
+        return self._rate
+
+
+    def notify_ack(self, step):
+        if step > self._last_ack_step:
+            self._last_ack_step = step
+            self._delivery_frames += 1
+            self._acked_frames += 1
+
+
+    # Returns +1 or -1 when the rate has been increased or decreased, 0 otherwise.
+    def update(self, step, rtt):
+        current_time = time.time()
+        self._update_delivery_rate(current_time)
+
+        # Frames waiting in the queues make the lag between the computed and the acknowledged step grow over the rtt.
+        lag = step - self._last_ack_step
+        expected_lag = (rtt + 2 / self._rate) * self._max_rate + FRAME_LAG_MARGIN
+
+        change_time = current_time - self._last_change_time_stamp
+        if lag > expected_lag:
+            # The effect of a decrease is only visible after a round trip, and the lag needs time to drain.
+            if self._rate > MIN_FRAME_RATE and change_time > max(DECREASE_COOLDOWN, 2 * rtt) and lag > self._last_change_lag:
+                rate = self._rate
+                if self._delivery_rate:
+                    rate = min(rate, self._delivery_rate)
+                self._rate = max(MIN_FRAME_RATE, rate * RATE_DECREASE_FACTOR)
+                self._last_change_time_stamp = current_time
+                self._last_change_lag = lag
+                return -1
+
+        elif self._rate < self._max_rate and change_time > INCREASE_PERIOD:
+            self._rate = min(self._max_rate, self._rate + RATE_INCREASE)
+            self._last_change_time_stamp = current_time
+            self._last_change_lag = 0
+            return 1
+
+        return 0
+
+
+    def _update_delivery_rate(self, current_time):
+        delivery_time = current_time - self._delivery_time_stamp
+        if delivery_time < DELIVERY_PERIOD:
+            return
+
+        delivery_rate = self._delivery_frames / delivery_time
+        if None == self._delivery_rate:
+            self._delivery_rate = delivery_rate
+        else:
+            self._delivery_rate += DELIVERY_SMOOTHING * (delivery_rate - self._delivery_rate)
+
+        self._delivery_frames = 0
+        self._delivery_time_stamp = current_time
+
+
+    # Called once per step: the credit spreads the frames of a reduced rate evenly over the steps.
+    def should_send(self):
+        self._credit = min(1, self._credit + self._rate / self._max_rate)
+        if self._credit < 1:
+            return False
+
+        self._credit -= 1
+        self._sent_frames += 1
+        return True
+
+
+    # The rates are computed from the last call.
+    def format(self):
+        current_time = time.time()
+        elapsed_time = max(current_time - self._stats_time_stamp, 1e-3)
+        text = "target: {:.2f}fps, sent: {:.2f}fps, acked: {:.2f}fps".format(self._rate,
+                self._sent_frames / elapsed_time, self._acked_frames / elapsed_time)
+
+        self._sent_frames = 0
+        self._acked_frames = 0
+        self._stats_time_stamp = current_time
+        return text
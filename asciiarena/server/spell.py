@@ -24,6 +24,7 @@ class Spell(ArenaElement):
             if initialized:
                 entity = state.get_grid().get_entity(self._position)
                 if entity:
+                    entity.wake()
                     self.on_entity_collision(state, entity)
 
             return  initialized
@@ -32,9 +33,9 @@ class Spell(ArenaElement):
 
 
     def update(self, state):
-        previous_position = self._position.copy()
+        previous_position = self._position
 
-        super().compute_movement()
+        super().compute_movement(state.get_tick_rate())
         if self._position != previous_position:
             if state.get_ground().is_blocked(self._position):
                 self._position = previous_position
@@ -43,6 +44,7 @@ class Spell(ArenaElement):
             else:
                 entity = state.get_grid().get_entity(self._position)
                 if entity:
+                    entity.wake()
                     self.on_entity_collision(state, entity)
 
         self.on_update(state)
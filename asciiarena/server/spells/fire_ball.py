@@ -1,8 +1,8 @@
-from ..spell import Spell
+from ..projectile import Projectile
 
 from common.terrain import Terrain
 
-class FireBall(Spell):
+class FireBall(Projectile):
     def __init__(self, spell_spec, entity, position):
         super().__init__(spell_spec, entity, position)
         super().set_direction(entity.get_direction())
@@ -14,10 +14,6 @@ class FireBall(Spell):
         return True
 
 
-    def on_update(self, state):
-        pass
-
-
     def on_wall_collision(self, state, position):
         super().enable_movement(False)
         super().remove()
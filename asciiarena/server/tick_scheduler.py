@@ -0,0 +1,97 @@
+import enum
+import threading
+import time
+
+MAX_CATCH_UP_TICKS = 5
+
+
+class TickScheduler:
+    class Policy(enum.Enum):
+        CATCH_UP = "catch-up" # The late ticks are run one after another until the schedule is recovered.
+        SKIP = "skip" # The late ticks are dropped: the next tick is aligned to the schedule.
+
+
+    def __init__(self, rate, tick_callback, counters, policy = Policy.CATCH_UP):
+        self._rate = rate
+        self._period = 1 / rate
+        self._tick_callback = tick_callback
+        self._counters = counters
+        self._policy = policy
+
+        # A single thread lives along the scheduler: starting and stopping only enables or disables the ticks.
+        self._thread = None
+        self._enabled = False
+        self._tick_pending = False
+        self._next_tick_time = 0
+        self._condition = threading.Condition()
+
+
+    def get_rate(self):
+        return self._rate
+
+
+    def start(self):
+        with self._condition:
+            self._enabled = True
+            self._tick_pending = False
+            self._next_tick_time = time.monotonic()
+            self._condition.notify_all()
+
+        if not self._thread:
+            self._thread = threading.Thread(target = self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+
+    def stop(self):
+        with self._condition:
+            self._enabled = False
+            self._condition.notify_all()
+
+
+    # Called by the consumer when the tick has been processed.
+    def tick_done(self):
+        with self._condition:
+            self._tick_pending = False
+            self._condition.notify_all()
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._wait_next_tick()
+                self._tick_pending = True
+                lateness = time.monotonic() - self._next_tick_time
+
+            self._counters.add("ticks")
+            self._counters.update_max("tick_max_late_ms", lateness * 1000)
+            self._tick_callback()
+
+            with self._condition:
+                self._schedule_next_tick()
+
+
+    def _wait_next_tick(self):
+        while True:
+            self._condition.wait_for(lambda: self._enabled)
+            remaining_time = self._next_tick_time - time.monotonic()
+            if remaining_time > 0:
+                self._condition.wait(remaining_time)
+                continue
+
+            # Overrun: the previous tick is still being processed at the time of this one.
+            if self._tick_pending:
+                self._counters.add("tick_overruns")
+                self._condition.wait_for(lambda: not self._tick_pending or not self._enabled)
+                continue
+
+            return
+
+
+    def _schedule_next_tick(self):
+        # The schedule is computed from the previous deadline, not from the current time: it does not drift.
+        self._next_tick_time += self._period
+        late_ticks = int((time.monotonic() - self._next_tick_time) / self._period)
+        if late_ticks > 0 and (TickScheduler.Policy.SKIP == self._policy or late_ticks > MAX_CATCH_UP_TICKS):
+            self._counters.add("ticks_skipped", late_ticks)
+            self._next_tick_time += late_ticks * self._period
@@ -0,0 +1,101 @@
+from bench_util import ms, us
+from common.util.vec2 import Vec2
+from server.arena_grid import ArenaGrid
+from server.entity import Entity
+
+import argparse
+import random
+import time
+import timeit
+
+OPERATIONS = 20000
+QUERY_GRID_SIZE = 128
+
+# Grid build time, then get_entity and add+remove by operation over random cells.
+# Area queries against a scan of the entity list on a 128x128 grid.
+
+def operation_benchmark():
+    print("dim   build ms  get_entity us  add+remove us")
+    for dimension in [16, 64, 256, 512, 1024]:
+        begin = time.perf_counter()
+        grid = ArenaGrid(Vec2(dimension, dimension))
+        build_time = time.perf_counter() - begin
+
+        rng = random.Random(0)
+        position_list = [Vec2(rng.randrange(dimension), rng.randrange(dimension)) for i in range(OPERATIONS)]
+        entity_list = [Entity("A", position) for position in position_list[:200]]
+
+        begin = time.perf_counter()
+        for position in position_list:
+            grid.get_entity(position)
+        get_time = (time.perf_counter() - begin) / OPERATIONS
+
+        begin = time.perf_counter()
+        for i in range(OPERATIONS // len(entity_list)):
+            for entity in entity_list:
+                grid.add(entity)
+            for entity in entity_list:
+                grid.remove(entity)
+        add_remove_time = (time.perf_counter() - begin) / (2 * OPERATIONS)
+
+        print("{:4} {:9.2f} {:14.2f} {:14.2f}".format(dimension, ms(build_time), us(get_time), us(add_remove_time)))
+
+
+def query_benchmark():
+    size = QUERY_GRID_SIZE
+    print("entities  query         grid us  scan us")
+    for entities in [100, 1000, 5000]:
+        rng = random.Random(1)
+        grid = ArenaGrid(Vec2(size, size))
+        entity_list = []
+        while len(entity_list) < entities:
+            position = Vec2(rng.randrange(size), rng.randrange(size))
+            if not grid.get_entity(position):
+                entity = Entity("A", position)
+                grid.add(entity)
+                entity_list.append(entity)
+
+        center_list = [Vec2(rng.randrange(size), rng.randrange(size)) for i in range(200)]
+
+        def time_query(query):
+            return min(timeit.repeat(lambda: [query(center) for center in center_list], number = 5, repeat = 3)) / 5 / len(center_list)
+
+        def ray_target(center):
+            return Vec2(min(size - 1, center.x + 30), center.y)
+
+        def scan_ray(center):
+            target = ray_target(center)
+            hit_list = [entity for entity in entity_list if entity.get_position().y == center.y and center.x < entity.get_position().x <= target.x]
+            return min(hit_list, key = lambda entity: entity.get_position().x, default = None)
+
+        query_list = [
+            ("radius 5",
+                lambda center: grid.get_entity_list_in_radius(center, 5),
+                lambda center: [entity for entity in entity_list if Vec2.distance(entity.get_position(), center) <= 5]),
+            ("rect 10x10",
+                lambda center: grid.get_entity_list_in_rectangle(center, Vec2(10, 10)),
+                lambda center: [entity for entity in entity_list if center.x <= entity.get_position().x < center.x + 10 and center.y <= entity.get_position().y < center.y + 10]),
+            ("nearest",
+                lambda center: grid.get_nearest_entity(center),
+                lambda center: min(entity_list, key = lambda entity: (entity.get_position().x - center.x) ** 2 + (entity.get_position().y - center.y) ** 2)),
+            ("ray 30 cells",
+                lambda center: grid.raycast(center, ray_target(center)),
+                scan_ray),
+        ]
+
+        for name, query, scan in query_list:
+            print("{:8}  {:12} {:8.1f} {:8.1f}".format(entities, name, us(time_query(query)), us(time_query(scan))))
+
+
+BENCHMARK_DICT = {
+    "operations": operation_benchmark,
+    "queries": query_benchmark,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmark", nargs = "?", default = "all", choices = ["all"] + list(BENCHMARK_DICT), help = "benchmark to run (all by default)")
+    args = parser.parse_args()
+
+    for name in BENCHMARK_DICT if "all" == args.benchmark else [args.benchmark]:
+        BENCHMARK_DICT[name]()
@@ -0,0 +1,81 @@
+from bench_util import us
+from common.direction import Direction
+from server.arena import Arena
+from server import projectile_engine
+
+import argparse
+import hashlib
+import random
+import time
+
+MOVE_LIST = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT, Direction.NONE]
+
+# Headless arena simulations with scripted players. The state digest of a run must not change with an optimization.
+# - replay: two identical runs must give the same states, and their speed.
+# - idle: many players, few of them active.
+# - projectiles: many players casting, with and without the numpy projectile engine.
+
+def simulate(size, players, steps, move_period, cast_period, active = None, origin_step = 7):
+    arena = Arena(size, "SEED")
+    origin_list = arena.get_ground().get_position_list([0])[::origin_step][:players]
+    control_list = [arena.create_player(chr(65 + i % 26), origin) for i, origin in enumerate(origin_list)]
+    active_control_list = control_list[:active]
+
+    rng = random.Random(1)
+    state_list = []
+    spells = 0
+    begin = time.perf_counter()
+    for step in range(steps):
+        if 0 == step % move_period:
+            for control in active_control_list:
+                control.move(rng.choice(MOVE_LIST))
+
+        if 0 == step % cast_period:
+            for control in active_control_list:
+                control.cast(0)
+
+        arena.update()
+        spells += len(arena.get_spell_list())
+        # Coordinates rather than vectors, so the digest does not depend on how a vector is printed.
+        position_list = [element.get_position() for element in arena.get_entity_list() + arena.get_spell_list()]
+        state_list.append(tuple((position.x, position.y) for position in position_list))
+
+    tick_time = (time.perf_counter() - begin) / steps
+    return tick_time, spells / steps, hashlib.md5(repr(state_list).encode()).hexdigest()[:10]
+
+
+def replay_benchmark():
+    first = simulate(32, 2, 6000, 7, 23, origin_step = 97)
+    second = simulate(32, 2, 6000, 7, 23, origin_step = 97)
+    print("replay: identical {}, {:.0f} steps/s, digest {}".format(first[2] == second[2], 1 / second[0], second[2]))
+
+
+def idle_benchmark():
+    for active in [0, 5, 100]:
+        tick_time, spells, digest = simulate(64, 100, 3000, 7, 23, active, origin_step = 37)
+        print("idle: 100 players, {:3} active: {:6.1f} us/tick, digest {}".format(active, us(tick_time), digest))
+
+
+def projectile_benchmark():
+    for size, players, cast_period in [(32, 2, 23), (64, 50, 4), (96, 300, 2)]:
+        tick_time, spells, digest = simulate(size, players, 2000, 11, cast_period)
+        print("projectiles: arena {:3}, {:3} players: {:7.1f} us/tick, {:6.1f} spells alive, digest {}".format(size, players, us(tick_time), spells, digest))
+
+
+BENCHMARK_DICT = {
+    "replay": replay_benchmark,
+    "idle": idle_benchmark,
+    "projectiles": projectile_benchmark,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmark", nargs = "?", default = "all", choices = ["all"] + list(BENCHMARK_DICT), help = "benchmark to run (all by default)")
+    parser.add_argument("--scalar", action = "store_true", help = "update the projectiles one by one, without the numpy engine")
+    args = parser.parse_args()
+
+    if args.scalar:
+        projectile_engine.numpy = None
+
+    for name in BENCHMARK_DICT if "all" == args.benchmark else [args.benchmark]:
+        BENCHMARK_DICT[name]()
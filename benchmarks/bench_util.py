@@ -0,0 +1,22 @@
+import os
+import sys
+import time
+
+# Imported first by every benchmark: the game modules are imported as the application does.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "asciiarena"))
+
+
+def time_per_call(function, number):
+    begin = time.perf_counter()
+    for i in range(number):
+        function()
+
+    return (time.perf_counter() - begin) / number
+
+
+def us(seconds):
+    return seconds * 1e6
+
+
+def ms(seconds):
+    return seconds * 1e3
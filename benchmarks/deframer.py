@@ -0,0 +1,57 @@
+from bench_util import ms
+from common import netstring as Netstring
+
+import time
+
+try:
+    import pynetstring
+except ImportError:
+    pynetstring = None
+
+READ_SIZE = 4096
+
+# Decoding 20000 small messages plus one 300KB message received in 4KB reads.
+# pynetstring, the previous decoder, is measured too when it is installed.
+
+def create_stream():
+    message_list = [b"message %d" % i for i in range(20000)]
+    message_list.insert(10000, b"x" * 300 * 1024)
+    return b"".join(Netstring.encode(message) for message in message_list), len(message_list)
+
+
+def deframe(stream):
+    deframer = Netstring.Deframer(READ_SIZE)
+    messages = 0
+    offset = 0
+    while offset < len(stream):
+        buffer = deframer.get_buffer()
+        size = min(READ_SIZE, len(buffer), len(stream) - offset)
+        buffer[:size] = stream[offset:offset + size]
+        deframer.buffer_updated(size)
+        offset += size
+
+        while None != deframer.next_message():
+            messages += 1
+
+    return messages
+
+
+def decode_with_pynetstring(stream):
+    decoder = pynetstring.Decoder()
+    messages = 0
+    for offset in range(0, len(stream), READ_SIZE):
+        messages += len(decoder.feed(stream[offset:offset + READ_SIZE]))
+
+    return messages
+
+
+if __name__ == "__main__":
+    stream, messages = create_stream()
+    decoder_list = [("deframer", deframe)]
+    if pynetstring:
+        decoder_list.append(("pynetstring", decode_with_pynetstring))
+
+    for name, decode in decoder_list:
+        begin = time.perf_counter()
+        assert messages == decode(stream)
+        print("{}: {:.1f} ms".format(name, ms(time.perf_counter() - begin)))
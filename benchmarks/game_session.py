@@ -0,0 +1,61 @@
+from headless import DEFAULT_PORT, NETWORK_CORE_DICT, HeadlessClient, start_server
+from common import message as Message
+from common.direction import Direction
+
+import argparse
+import threading
+import time
+
+MOVE_LIST = [Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT]
+
+# A full game session over loopback: headless clients log in, move, cast, and apply and acknowledge every frame.
+# It reports the frames received, how many were deltas, the rtt and clock offset measured by the pings
+# and the server counters, for any combination of network core, udp channel and compression.
+
+def play(client, character, frames, compression_list, result_dict):
+    arena_info = client.login(character, compression_list)
+    deltas = 0
+    begin = time.perf_counter()
+    for i in range(frames):
+        frame, snapshot = client.receive_frame()
+        deltas += Message.Frame.KEYFRAME != frame.base_step
+
+        if 0 == i % 10:
+            client.send(Message.PlayerMovement(MOVE_LIST[i // 10 % 4] if i % 20 else Direction.NONE, frame.step))
+        if 0 == i % 30:
+            client.ping()
+        if 5 == i:
+            client.send(Message.PlayerCast(1, frame.step))
+
+    result_dict[character] = (frames, deltas, time.perf_counter() - begin, len(arena_info.ground), client.get_clock_estimator().format())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default = DEFAULT_PORT, type = int)
+    parser.add_argument("--players", default = 2, type = int)
+    parser.add_argument("--frames", default = 300, type = int)
+    parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT))
+    parser.add_argument("--udp", action = "store_true")
+    parser.add_argument("--compression", action = "store_true")
+    args = parser.parse_args()
+
+    server_manager, network = start_server(args.players, 24, args.port, args.network_core, datagram = args.udp)
+
+    compression_list = ["zlib"] if args.compression else []
+    result_dict = {}
+    thread_list = []
+    for i in range(args.players):
+        client = HeadlessClient(args.port, args.network_core, args.udp)
+        thread = threading.Thread(target = play, args = (client, chr(65 + i), args.frames, compression_list, result_dict), daemon = True)
+        thread.start()
+        thread_list.append(thread)
+
+    for thread in thread_list:
+        thread.join(60)
+
+    for character, (frames, deltas, seconds, ground_size, clock) in sorted(result_dict.items()):
+        print("{}: {} frames ({} deltas) in {:.2f} s, ground {} B, {}".format(character, frames, deltas, seconds, ground_size, clock))
+
+    print(server_manager.get_counters().format())
+    assert len(result_dict) == args.players, "Some clients did not finish the session"
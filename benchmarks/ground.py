@@ -0,0 +1,46 @@
+from bench_util import ms
+from common.util import bit_packing as BitPacking
+from server.ground import Ground
+
+import hashlib
+import pickle
+import random
+import sys
+import time
+
+# Ground generation time and ArenaInfo ground payload, pickled list vs bit-packed.
+# The hash of the grid checks that a change keeps the generated grounds identical.
+# Usage: python ground.py [size ...] (32 64 100 by default, the generation time grows quickly with the size)
+
+def ground_benchmark(size_list):
+    print("size  generate ms  grid hash   pickled B  packed B")
+    for size in size_list:
+        begin = time.perf_counter()
+        grid = Ground.fromSeed(size, "SEED").get_grid()
+        generate_time = time.perf_counter() - begin
+
+        grid_hash = hashlib.md5(bytes(grid)).hexdigest()[:10]
+        pickled_size = len(pickle.dumps(list(grid)))
+        packed_size = len(BitPacking.pack(grid))
+        print("{:4} {:12.1f}  {}  {:9} {:9}".format(size, ms(generate_time), grid_hash, pickled_size, packed_size))
+
+
+def packing_benchmark(size):
+    rng = random.Random(0)
+    grid = [rng.randrange(3) for i in range(size * size)]
+
+    begin = time.perf_counter()
+    data = BitPacking.pack(grid)
+    pack_time = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    BitPacking.unpack(data)
+    unpack_time = time.perf_counter() - begin
+
+    print("{0}x{0} random terrain: {1} B, pack {2:.0f} ms, unpack {3:.0f} ms".format(size, len(data), ms(pack_time), ms(unpack_time)))
+
+
+if __name__ == "__main__":
+    ground_benchmark([int(size) for size in sys.argv[1:]] or [32, 64, 100])
+    print("")
+    packing_benchmark(1024)
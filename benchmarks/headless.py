@@ -0,0 +1,106 @@
+import bench_util
+from common import message as Message, message_codec as MessageCodec, version
+from common.clock_estimator import ClockEstimator
+from common.async_network_manager import AsyncNetworkManager
+from common.frame_snapshot import FrameSnapshot, SnapshotHistory
+from common.input_limiter import InputLimiter
+from common.network_manager import NetworkManager
+from common.package_queue import PackageQueue, OutputPack
+from server.server_manager import ServerManager
+
+import threading
+import time
+
+DEFAULT_PORT = 3510
+
+NETWORK_CORE_DICT = {
+    "threads": NetworkManager,
+    "asyncio": AsyncNetworkManager,
+}
+
+# A server as app.py runs it, with its requests processed in a background thread.
+def start_server(players, arena_size, port, network_core = "threads", **network_kwargs):
+    server_manager = ServerManager(players, 10, arena_size, "SEED")
+    network = NETWORK_CORE_DICT[network_core](server_manager, input_limiter = InputLimiter(server_manager.get_tick_rate()), **network_kwargs)
+    server_manager.set_scheduler(network.call_later)
+    network.listen(port)
+    network.run()
+
+    threading.Thread(target = server_manager.process_requests, daemon = True).start()
+    time.sleep(0.2)
+    return server_manager, network
+
+
+# A client without user interface: it answers the pings and applies and acknowledges the frames as the game client does.
+class HeadlessClient(PackageQueue):
+    def __init__(self, port, network_core = "threads", datagram = False):
+        PackageQueue.__init__(self)
+        self._network = NETWORK_CORE_DICT[network_core](self, datagram = datagram)
+        self._endpoint = self._network.connect("127.0.0.1", port)
+        self._network.run()
+        self._history = SnapshotHistory()
+        self._clock_estimator = ClockEstimator()
+
+
+    def get_network(self):
+        return self._network
+
+
+    def get_endpoint(self):
+        return self._endpoint
+
+
+    def get_clock_estimator(self):
+        return self._clock_estimator
+
+
+    def send(self, message):
+        self.enqueue_output(OutputPack(message, self._endpoint))
+
+
+    def ping(self):
+        self.send(Message.Ping(time.time()))
+
+
+    def receive(self, message_class_list, timeout = 10):
+        while True:
+            input_pack = self.dequeue_input(timeout)
+            if not input_pack or None == input_pack.message:
+                raise RuntimeError("Disconnected from the server")
+
+            if isinstance(input_pack.message, Message.Ping):
+                self.send(Message.Pong(input_pack.message.time_stamp, time.time()))
+
+            elif isinstance(input_pack.message, Message.Pong):
+                self._clock_estimator.add_sample(input_pack.message.origin_time_stamp, input_pack.message.time_stamp, time.time())
+
+            elif input_pack.message.__class__ in message_class_list:
+                return input_pack.message
+
+
+    def login(self, character, compression_list = []):
+        self.send(Message.Version(version.CURRENT, MessageCodec.PREFERENCE_LIST, compression_list))
+        self.receive([Message.CheckedVersion])
+        self.receive([Message.GameInfo])
+        self.send(Message.Login(character))
+        self.receive([Message.LoginStatus])
+        return self.receive([Message.ArenaInfo])
+
+
+    def receive_frame(self):
+        while True:
+            frame = self.receive([Message.Frame])
+            if Message.Frame.KEYFRAME == frame.base_step:
+                snapshot = FrameSnapshot.from_lists(frame.step, frame.entity_list, frame.spell_list)
+                break
+
+            base = self._history.get(frame.base_step)
+            if base:
+                snapshot = base.apply_frame(frame)
+                break
+
+            self.send(Message.FrameAck(Message.Frame.KEYFRAME))
+
+        self._history.add(snapshot)
+        self.send(Message.FrameAck(frame.step))
+        return frame, snapshot
@@ -0,0 +1,47 @@
+from bench_util import time_per_call, us
+from common import message as Message, message_codec as MessageCodec
+from common.frame_snapshot import FrameSnapshot
+from common.util.vec2 import Vec2
+
+NUMBER = 20000
+
+# Frame size and encode/decode time, pickle vs binary codec,
+# and keyframe vs delta frame size with the binary codec.
+
+def create_frame(players, spells):
+    entity_list = [Message.Frame.Entity(140000000000 + i, chr(65 + i % 26), Vec2(i, i + 1), 2) for i in range(players)]
+    spell_list = [Message.Frame.Spell(140000000000 + i, 1, Vec2(i, 3), 4) for i in range(spells)]
+    return Message.Frame(1234, entity_list, spell_list, Message.Frame.KEYFRAME, [])
+
+
+def create_snapshot(step, players, moving):
+    entity_list = [Message.Frame.Entity(1000 + i, chr(65 + i % 26), Vec2(i + (step if i < moving else 0), 5), 2) for i in range(players)]
+    return FrameSnapshot.from_lists(step, entity_list, [])
+
+
+def codec_benchmark():
+    print("players spells codec   bytes  encode us  decode us")
+    for players, spells in [(2, 2), (8, 16), (32, 64)]:
+        frame = create_frame(players, spells)
+        for name, codec in [("pickle", MessageCodec.PickleCodec()), (MessageCodec.BINARY, MessageCodec.get_codec(MessageCodec.BINARY))]:
+            data = codec.encode(frame)
+            encode_time = time_per_call(lambda: codec.encode(frame), NUMBER)
+            decode_time = time_per_call(lambda: codec.decode(data), NUMBER)
+            print("{:7} {:6} {:6} {:6} {:10.1f} {:10.1f}".format(players, spells, name, len(data), us(encode_time), us(decode_time)))
+
+
+def delta_benchmark():
+    codec = MessageCodec.get_codec(MessageCodec.BINARY)
+    print("players moving  keyframe B  delta B")
+    for players, moving in [(8, 0), (32, 0), (8, 1), (32, 4)]:
+        base = create_snapshot(1, players, moving)
+        snapshot = create_snapshot(2, players, moving)
+        keyframe_size = len(codec.encode(snapshot.create_frame()))
+        delta_size = len(codec.encode(snapshot.create_frame(base)))
+        print("{:7} {:6} {:11} {:8}".format(players, moving, keyframe_size, delta_size))
+
+
+if __name__ == "__main__":
+    codec_benchmark()
+    print("")
+    delta_benchmark()
@@ -0,0 +1,58 @@
+from headless import DEFAULT_PORT, NETWORK_CORE_DICT
+from common import message as Message
+from common.package_queue import PackageQueue, OutputPack
+
+import argparse
+import statistics
+import threading
+import time
+
+ROUND_TRIPS = 3000
+WARM_UP = 100
+
+# Request/reply round trips through the whole network stack of both sides, and the CPU used while idle.
+
+class EchoServer(PackageQueue):
+    def run(self):
+        while True:
+            input_pack = self.dequeue_input()
+            if input_pack.message:
+                self.enqueue_output(OutputPack(input_pack.message, input_pack.endpoint))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default = DEFAULT_PORT, type = int)
+    parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT))
+    args = parser.parse_args()
+    network_class = NETWORK_CORE_DICT[args.network_core]
+
+    server = EchoServer()
+    server_network = network_class(server)
+    server_network.listen(args.port)
+    server_network.run()
+    threading.Thread(target = server.run, daemon = True).start()
+
+    client = PackageQueue()
+    client_network = network_class(client)
+    endpoint = client_network.connect("127.0.0.1", args.port)
+    client_network.run()
+
+    sample_list = []
+    for i in range(ROUND_TRIPS):
+        begin = time.perf_counter()
+        client.enqueue_output(OutputPack(Message.Login("A"), endpoint))
+        client.dequeue_input()
+        sample_list.append((time.perf_counter() - begin) * 1e6)
+        if 0 == i % 100:
+            time.sleep(0.01)
+
+    sample_list = sorted(sample_list[WARM_UP:])
+    print("{}: round trip median {:.0f} us, p99 {:.0f} us".format(args.network_core, statistics.median(sample_list), sample_list[int(len(sample_list) * 0.99)]))
+
+    begin = time.process_time()
+    time.sleep(1)
+    print("{}: idle CPU {:.2f} ms/s".format(args.network_core, (time.process_time() - begin) * 1000))
+
+    client_network.stop()
+    server_network.stop()
@@ -0,0 +1,56 @@
+import bench_util
+from common import message as Message
+from common.package_queue import PackageQueue, OutputPack
+
+import threading
+import time
+
+ENDPOINTS = 64
+TICKS = 120
+SEND_TIME = 50e-6 # simulated encode and write of every package
+
+# Queue wait of a control message (LoginStatus) while 64 endpoints get one frame and one event by tick.
+# The output thread is simulated: it spends SEND_TIME on every package it dequeues.
+
+def consume(package_queue, enqueue_time_dict, wait_list, stop_event):
+    while not stop_event.is_set():
+        output_pack = package_queue.dequeue_output(0.01)
+        if not output_pack:
+            continue
+
+        begin = time.perf_counter()
+        while time.perf_counter() - begin < SEND_TIME:
+            pass
+
+        if isinstance(output_pack.message, Message.LoginStatus):
+            wait_list.append(time.perf_counter() - enqueue_time_dict[id(output_pack.message)])
+
+
+if __name__ == "__main__":
+    package_queue = PackageQueue()
+    enqueue_time_dict = {}
+    wait_list = []
+    stop_event = threading.Event()
+    consumer = threading.Thread(target = consume, args = (package_queue, enqueue_time_dict, wait_list, stop_event))
+    consumer.start()
+
+    login_status_list = []
+    for tick in range(TICKS):
+        for endpoint in range(ENDPOINTS):
+            package_queue.enqueue_output(OutputPack(Message.Frame(tick, [], [], Message.Frame.KEYFRAME, []), endpoint))
+            package_queue.enqueue_output(OutputPack(Message.PlayersInfo(["A"]), endpoint))
+
+        if 0 == tick % 10:
+            login_status = Message.LoginStatus(Message.LoginStatus.LOGGED, 0)
+            login_status_list.append(login_status) # keeps the ids unique
+            enqueue_time_dict[id(login_status)] = time.perf_counter()
+            package_queue.enqueue_output(OutputPack(login_status, ENDPOINTS + tick))
+
+        time.sleep(1 / 60)
+
+    time.sleep(0.5)
+    stop_event.set()
+    consumer.join()
+
+    print("LoginStatus queue wait: avg {:.2f} ms, max {:.2f} ms".format(bench_util.ms(sum(wait_list) / len(wait_list)), bench_util.ms(max(wait_list))))
+    print(package_queue.get_counters().format())
@@ -0,0 +1,66 @@
+from headless import DEFAULT_PORT, NETWORK_CORE_DICT, HeadlessClient, start_server
+from common import message as Message, message_codec as MessageCodec, version
+
+import argparse
+import collections
+import socket
+import threading
+import time
+
+SEND_METHOD_LIST = ["send", "sendall", "sendmsg", "sendto"]
+
+# Send syscalls of the server while 4 clients log in, then by delivered frame while they play.
+# strace is not needed: the socket send methods are wrapped, and only the network sockets bound to the server port are counted.
+
+def count_server_sends(port, phase, send_count_dict):
+    def wrap(name):
+        method = getattr(socket.socket, name)
+
+        def counted_method(self, *args, **kwargs):
+            if self.family in [socket.AF_INET, socket.AF_INET6] and self.getsockname()[1] == port:
+                send_count_dict[phase[0]] += 1
+            return method(self, *args, **kwargs)
+
+        setattr(socket.socket, name, counted_method)
+
+    for name in SEND_METHOD_LIST:
+        wrap(name)
+
+
+def play(client, character, phase, frame_count_dict):
+    # The login messages are sent at once, so the server can coalesce its replies.
+    client.send(Message.Version(version.CURRENT, MessageCodec.PREFERENCE_LIST, []))
+    client.send(Message.Login(character))
+    client.receive([Message.ArenaInfo])
+    while True:
+        client.receive_frame()
+        phase[0] = "game"
+        frame_count_dict[character] += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default = DEFAULT_PORT, type = int)
+    parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT))
+    parser.add_argument("--players", default = 4, type = int)
+    parser.add_argument("--seconds", default = 3, type = float)
+    args = parser.parse_args()
+
+    phase = ["login"]
+    send_count_dict = collections.Counter()
+    frame_count_dict = collections.Counter()
+    count_server_sends(args.port, phase, send_count_dict)
+    server_manager, network = start_server(args.players, 32, args.port, args.network_core)
+
+    for i in range(args.players):
+        client = HeadlessClient(args.port, args.network_core)
+        threading.Thread(target = play, args = (client, chr(65 + i), phase, frame_count_dict), daemon = True).start()
+
+    while "login" == phase[0]:
+        time.sleep(0.001)
+    login_sends = send_count_dict["login"]
+
+    time.sleep(args.seconds)
+    frames = sum(frame_count_dict.values())
+    print("{}: login phase {} send syscalls for {} clients, game {:.2f} send syscalls by delivered frame".format(args.network_core,
+        login_sends, args.players, send_count_dict["game"] / frames))
@@ -0,0 +1,48 @@
+from bench_util import us
+from common import message as Message
+from common.package_queue import InputPack
+from server.server_manager import ServerManager
+
+import threading
+import time
+
+MESSAGES = 200000
+ROOM_CALLS = 6000
+
+# Dispatch time of FrameAck messages through ServerManager.process_requests, and Room.get_endpoint_list.
+# A final Ping marks the end: its Pong is sent once every previous message has been dispatched.
+# The private attributes set here replace a full login and arena creation.
+
+def dispatch_benchmark(players):
+    server_manager = ServerManager(players, 10, 32, "SEED")
+    server_manager.set_scheduler(lambda delay, callback: None)
+    endpoint_list = [("endpoint", i) for i in range(players)]
+    for i, endpoint in enumerate(endpoint_list):
+        server_manager._room.add_player("P{}".format(i), endpoint)
+    server_manager._arena_enabled = True # the acks are accepted without computing an arena
+
+    input_pack_list = [InputPack(Message.FrameAck(i), endpoint_list[i % players]) for i in range(MESSAGES)]
+    input_pack_list.append(InputPack(Message.Ping(0), endpoint_list[0]))
+
+    # The input is queued before the dispatch starts, so only the dispatch is measured.
+    server_manager._input_slot_semaphore = threading.BoundedSemaphore(len(input_pack_list))
+    for input_pack in input_pack_list:
+        server_manager.enqueue_input(input_pack)
+
+    begin = time.perf_counter()
+    threading.Thread(target = server_manager.process_requests, daemon = True).start()
+    while not isinstance(server_manager.dequeue_output(10).message, Message.Pong):
+        pass
+    dispatch_time = (time.perf_counter() - begin) / MESSAGES
+
+    begin = time.perf_counter()
+    for i in range(ROOM_CALLS):
+        server_manager._room.get_endpoint_list()
+    endpoint_list_time = (time.perf_counter() - begin) / ROOM_CALLS
+
+    print("players {:3}: {:.2f} us/message, get_endpoint_list {:.2f} us".format(players, us(dispatch_time), us(endpoint_list_time)))
+
+
+if __name__ == "__main__":
+    for players in [4, 64]:
+        dispatch_benchmark(players)
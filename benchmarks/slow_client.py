@@ -0,0 +1,39 @@
+from headless import DEFAULT_PORT, NETWORK_CORE_DICT, start_server
+from common import message as Message, message_codec as MessageCodec, netstring as Netstring, version
+from common.network_manager import NetworkManager
+from common.socket_options import SocketOptions
+
+import argparse
+import socket
+import time
+
+# Server output buffered for a client that stops reading: the frames that can not be sent replace each other,
+# so the buffer keeps one frame instead of growing up to the overflow limit. The server send buffer is 1 KiB.
+
+def get_buffered_size_list(network):
+    # Private state of each core: the output buffers of the threaded core, the transports of the asyncio core.
+    if isinstance(network, NetworkManager):
+        return [output_buffer.get_size() for output_buffer in network._output_buffer_dict.values()]
+
+    return [transport.get_write_buffer_size() for transport in network._connection_set]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default = DEFAULT_PORT, type = int)
+    parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT))
+    parser.add_argument("--seconds", default = 6, type = float, help = "time without reading")
+    args = parser.parse_args()
+
+    socket_options = SocketOptions(send_buffer_size = 1024)
+    server_manager, network = start_server(1, 24, args.port, args.network_core, socket_options = socket_options)
+
+    codec = MessageCodec.get_codec(MessageCodec.DEFAULT)
+    connection = socket.create_connection(("127.0.0.1", args.port))
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    connection.sendall(Netstring.encode(codec.encode(Message.Version(version.CURRENT, [MessageCodec.DEFAULT], []))))
+    connection.sendall(Netstring.encode(codec.encode(Message.Login("A"))))
+
+    time.sleep(args.seconds)
+    print("{}: buffered by the server {} B".format(args.network_core, get_buffered_size_list(network)))
+    print(server_manager.get_counters().format())
@@ -0,0 +1,58 @@
+from headless import DEFAULT_PORT, NETWORK_CORE_DICT, HeadlessClient, start_server
+from common import message as Message, message_codec as MessageCodec, netstring as Netstring, version
+
+import argparse
+import socket
+import threading
+import time
+
+# Frames per second received by a fast client and by a client whose reads are capped in bytes per second.
+# The snapshot rate of the slow client adapts to what it can receive, the fast client keeps the full rate.
+
+def play_fast(port, network_core, frame_count_dict):
+    client = HeadlessClient(port, network_core)
+    client.login("A")
+    while True:
+        client.receive_frame()
+        frame_count_dict["fast"] += 1
+
+
+def play_slow(port, bytes_per_second, frame_count_dict):
+    codec = MessageCodec.get_codec(MessageCodec.DEFAULT)
+    connection = socket.create_connection(("127.0.0.1", port))
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2048)
+    connection.sendall(Netstring.encode(codec.encode(Message.Version(version.CURRENT, [MessageCodec.DEFAULT], []))))
+    connection.sendall(Netstring.encode(codec.encode(Message.Login("B"))))
+
+    deframer = Netstring.Deframer(4096)
+    while True:
+        deframer.feed(connection.recv(bytes_per_second // 50))
+        time.sleep(0.02)
+
+        message_data = deframer.next_message()
+        while None != message_data:
+            message = codec.decode(message_data)
+            if isinstance(message, Message.Frame):
+                frame_count_dict["slow"] += 1
+                connection.sendall(Netstring.encode(codec.encode(Message.FrameAck(message.step))))
+            message_data = deframer.next_message()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default = DEFAULT_PORT, type = int)
+    parser.add_argument("--network-core", default = "threads", choices = list(NETWORK_CORE_DICT))
+    parser.add_argument("--bytes-per-second", default = 1000, type = int, help = "read rate of the slow client")
+    parser.add_argument("--seconds", default = 20, type = float)
+    args = parser.parse_args()
+
+    server_manager, network = start_server(2, 24, args.port, args.network_core)
+
+    frame_count_dict = {"fast": 0, "slow": 0}
+    threading.Thread(target = play_fast, args = (args.port, args.network_core, frame_count_dict), daemon = True).start()
+    threading.Thread(target = play_slow, args = (args.port, args.bytes_per_second, frame_count_dict), daemon = True).start()
+
+    time.sleep(args.seconds)
+    print("{}, slow client at {} B/s: fast {:.1f} fps, slow {:.1f} fps".format(args.network_core, args.bytes_per_second,
+        frame_count_dict["fast"] / args.seconds, frame_count_dict["slow"] / args.seconds))
+    print(server_manager.get_counters().format())
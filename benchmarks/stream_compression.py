@@ -0,0 +1,58 @@
+from bench_util import us
+from common import message as Message, message_codec as MessageCodec, netstring as Netstring, stream_compression as StreamCompression
+from common.frame_snapshot import FrameSnapshot
+from common.util.vec2 import Vec2
+
+import random
+import time
+
+TICKS = 600
+
+# Bytes by frame on the wire with and without the zlib stream compression, and its CPU cost.
+# The frames come from a random walk of players and spells, encoded with the binary codec.
+
+def create_stream_chunks(players, delta):
+    codec = MessageCodec.get_codec(MessageCodec.BINARY)
+    rng = random.Random(1)
+    position_dict = {i: Vec2(rng.randrange(40), rng.randrange(40)) for i in range(players)}
+    spell_dict = {}
+    base = None
+    chunk_list = []
+    for step in range(TICKS):
+        for i, position in position_dict.items():
+            if rng.random() < 0.1:
+                position_dict[i] = Vec2(max(0, position.x + rng.choice([-1, 1])), position.y)
+
+        if rng.random() < 0.05 * players:
+            spell_dict[1000 + step] = Vec2(rng.randrange(40), rng.randrange(40))
+
+        for key, position in list(spell_dict.items()):
+            if position.x >= 40:
+                del spell_dict[key]
+            else:
+                spell_dict[key] = Vec2(position.x + 1, position.y)
+
+        entity_list = [Message.Frame.Entity(i * 7919 + 140000000000, chr(65 + i % 26), position, 1) for i, position in position_dict.items()]
+        spell_list = [Message.Frame.Spell(key * 7919 + 140000000000, 1, position, 2) for key, position in spell_dict.items()]
+        snapshot = FrameSnapshot.from_lists(step, entity_list, spell_list)
+        chunk_list.append(Netstring.encode(codec.encode(snapshot.create_frame(base if delta else None))))
+        base = snapshot
+
+    return chunk_list
+
+
+if __name__ == "__main__":
+    print("players frames    raw B/frame  zlib B/frame  saved  CPU us/frame")
+    for players in [2, 4, 8, 16]:
+        for delta in [False, True]:
+            chunk_list = create_stream_chunks(players, delta)
+            compressor = StreamCompression.create_compressor(StreamCompression.ZLIB)
+
+            begin = time.perf_counter()
+            compressed_chunk_list = [compressor.compress(chunk) for chunk in chunk_list]
+            compress_time = (time.perf_counter() - begin) / len(chunk_list)
+
+            raw_size = sum(map(len, chunk_list)) / len(chunk_list)
+            compressed_size = sum(map(len, compressed_chunk_list)) / len(chunk_list)
+            print("{:7} {:9} {:11.1f} {:13.1f} {:5.0%} {:13.1f}".format(players, "delta" if delta else "keyframe",
+                raw_size, compressed_size, 1 - compressed_size / raw_size, us(compress_time)))
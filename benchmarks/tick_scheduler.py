@@ -0,0 +1,56 @@
+import bench_util
+from common.counters import Counters
+from server.tick_scheduler import TickScheduler
+
+import argparse
+import queue
+import statistics
+import threading
+import time
+
+# Tick rate, interval jitter and drift of the TickScheduler driving a consumer thread, as the ServerManager does.
+# The consumer can simulate a load by tick, with a spike every 50 ticks, to show the overruns and the late tick policy.
+
+def consume(tick_queue, tick_scheduler, time_stamp_list, load, stop_event):
+    while not stop_event.is_set():
+        try:
+            tick_queue.get(True, 0.1)
+        except queue.Empty:
+            continue
+
+        time_stamp_list.append(time.monotonic())
+        end = time.perf_counter() + load * (3 if 0 == len(time_stamp_list) % 50 else 1)
+        while time.perf_counter() < end:
+            pass
+
+        tick_scheduler.tick_done()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", default = 5, type = float)
+    parser.add_argument("--tick-rate", default = 60, type = int)
+    parser.add_argument("--load-ms", default = 0, type = float, help = "busy time of the consumer by tick")
+    parser.add_argument("--tick-policy", default = TickScheduler.Policy.CATCH_UP.value, choices = [policy.value for policy in TickScheduler.Policy])
+    args = parser.parse_args()
+
+    counters = Counters()
+    tick_queue = queue.Queue()
+    tick_scheduler = TickScheduler(args.tick_rate, lambda: tick_queue.put(None), counters, TickScheduler.Policy(args.tick_policy))
+    time_stamp_list = []
+    stop_event = threading.Event()
+    consumer = threading.Thread(target = consume, args = (tick_queue, tick_scheduler, time_stamp_list, args.load_ms / 1000, stop_event))
+    consumer.start()
+
+    tick_scheduler.start()
+    time.sleep(args.seconds)
+    tick_scheduler.stop()
+    stop_event.set()
+    consumer.join()
+
+    ticks = len(time_stamp_list) - 1
+    span = time_stamp_list[-1] - time_stamp_list[0]
+    interval_list = [(end - begin) * 1000 for begin, end in zip(time_stamp_list, time_stamp_list[1:])]
+    print("ticks/s {:.2f}, interval mean {:.3f} ms, stdev {:.3f} ms, max {:.2f} ms".format(ticks / span, statistics.mean(interval_list), statistics.stdev(interval_list), max(interval_list)))
+    print("drift after {} ticks: {:+.1f} ms".format(ticks, (span - ticks / args.tick_rate) * 1000))
+    print(counters.format())
@@ -0,0 +1,24 @@
+from bench_util import time_per_call, us
+from common.util.vec2 import Vec2
+
+NUMBER = 300000
+
+# Cost of the basic Vec2 operations, and the hash collisions of the positions of a 64x64 grid.
+
+if __name__ == "__main__":
+    a = Vec2(3, 4)
+    b = Vec2(1, 0)
+    position_dict = {Vec2(x, y): None for y in range(64) for x in range(64)}
+
+    operation_list = [
+        ("construction", lambda: Vec2(3, 4)),
+        ("addition", lambda: a + b),
+        ("attributes", lambda: a.x + a.y),
+        ("equality", lambda: a == b),
+        ("dict lookup", lambda: position_dict[Vec2(7, 9)]),
+    ]
+
+    for name, operation in operation_list:
+        print("{:12} {:.3f} us".format(name, us(time_per_call(operation, NUMBER))))
+
+    print("distinct hashes of the 64x64 positions: {} of {}".format(len({hash(position) for position in position_dict}), len(position_dict)))
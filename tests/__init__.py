@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules are imported as the application does: from the asciiarena directory.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "asciiarena"))
@@ -0,0 +1,46 @@
+from common.direction import Direction
+from server.arena import Arena
+from server import projectile_engine
+from server.projectile_engine import ProjectileEngine
+
+import random
+import unittest
+import unittest.mock
+
+MOVE_LIST = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT, Direction.NONE]
+
+
+def simulate(players, steps):
+    arena = Arena(24, "SEED")
+    origin_list = arena.get_ground().get_position_list([0])[::7][:players]
+    control_list = [arena.create_player(chr(65 + i), origin) for i, origin in enumerate(origin_list)]
+
+    rng = random.Random(1)
+    state_list = []
+    for step in range(steps):
+        if 0 == step % 7:
+            for control in control_list:
+                control.move(rng.choice(MOVE_LIST))
+        if 0 == step % 5:
+            for control in control_list:
+                control.cast(0)
+
+        arena.update()
+        state_list.append((tuple(entity.get_position() for entity in arena.get_entity_list()),
+            tuple(spell.get_position() for spell in arena.get_spell_list())))
+
+    return state_list
+
+
+class ArenaTest(unittest.TestCase):
+    def test_replay(self):
+        state_list = simulate(6, 600)
+        self.assertEqual(state_list, simulate(6, 600))
+        self.assertTrue(any(spell_positions for entity_positions, spell_positions in state_list))
+
+
+    @unittest.skipUnless(ProjectileEngine.is_available(), "numpy is not installed")
+    def test_projectile_engine_matches_scalar_update(self):
+        state_list = simulate(6, 600)
+        with unittest.mock.patch.object(projectile_engine, "numpy", None):
+            self.assertEqual(state_list, simulate(6, 600))
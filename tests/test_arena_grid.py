@@ -0,0 +1,111 @@
+from common.util.vec2 import Vec2
+from server.arena_grid import ArenaGrid
+from server.entity import Entity
+from server.spells.fire_ball import FireBall
+
+import random
+import unittest
+
+
+def distance_key(entity, position):
+    return (entity.get_position().x - position.x) ** 2 + (entity.get_position().y - position.y) ** 2
+
+
+def bresenham_cell_list(origin, target):
+    cell_list = []
+    x, y = origin
+    dx = abs(target.x - origin.x)
+    dy = -abs(target.y - origin.y)
+    step_x = 1 if origin.x < target.x else -1
+    step_y = 1 if origin.y < target.y else -1
+    error = dx + dy
+    while (x, y) != tuple(target):
+        double_error = 2 * error
+        if double_error >= dy:
+            error += dy
+            x += step_x
+        if double_error <= dx:
+            error += dx
+            y += step_y
+        cell_list.append(Vec2(x, y))
+
+    return cell_list
+
+
+class ArenaGridTest(unittest.TestCase):
+    def create_grid(self, rng):
+        dimension = Vec2(rng.randint(1, 30), rng.randint(1, 30))
+        grid = ArenaGrid(dimension)
+        entity_list = []
+        for i in range(rng.randint(0, dimension.x * dimension.y // 3)):
+            position = Vec2(rng.randrange(dimension.x), rng.randrange(dimension.y))
+            if not grid.get_entity(position):
+                entity = Entity("A", position)
+                grid.add(entity)
+                entity_list.append(entity)
+
+        # The queries return the entities in row-major order.
+        entity_list.sort(key = lambda entity: entity.get_position().to_index(dimension.x))
+        return dimension, grid, entity_list
+
+
+    def test_add_remove(self):
+        grid = ArenaGrid(Vec2(8, 6))
+        entity = Entity("A", Vec2(7, 2))
+        grid.add(entity)
+        self.assertIs(entity, grid.get_entity(Vec2(7, 2)))
+        self.assertEqual(None, grid.get_entity(Vec2(2, 5)))
+
+        # Spell subclasses are stored by kind, several by cell.
+        spell_list = [FireBall(None, entity, Vec2(7, 2)) for i in range(2)]
+        for spell in spell_list:
+            grid.add(spell)
+        self.assertEqual(spell_list, grid.get_spell_list(Vec2(7, 2)))
+
+        grid.remove(entity)
+        for spell in spell_list:
+            grid.remove(spell)
+        self.assertEqual(None, grid.get_entity(Vec2(7, 2)))
+        self.assertEqual([], grid.get_spell_list(Vec2(7, 2)))
+
+
+    def test_move(self):
+        grid = ArenaGrid(Vec2(8, 8))
+        entity = Entity("A", Vec2(1, 1))
+        grid.add(entity)
+        entity.set_position(Vec2(5, 6))
+        grid.move(entity, Vec2(1, 1))
+
+        self.assertEqual(None, grid.get_entity(Vec2(1, 1)))
+        self.assertIs(entity, grid.get_entity(Vec2(5, 6)))
+        grid.remove(entity)
+        self.assertEqual(None, grid.get_entity(Vec2(5, 6)))
+
+
+    def test_queries_against_brute_force(self):
+        rng = random.Random(3)
+        for trial in range(100):
+            dimension, grid, entity_list = self.create_grid(rng)
+            for query in range(10):
+                with self.subTest(trial = trial, query = query):
+                    position = Vec2(rng.randint(-3, dimension.x + 3), rng.randint(-3, dimension.y + 3))
+                    size = Vec2(rng.randint(0, 12), rng.randint(0, 12))
+                    expected_list = [entity for entity in entity_list
+                        if position.x <= entity.get_position().x < position.x + size.x and position.y <= entity.get_position().y < position.y + size.y]
+                    self.assertEqual(expected_list, grid.get_entity_list_in_rectangle(position, size))
+
+                    center = Vec2(rng.randrange(dimension.x), rng.randrange(dimension.y))
+                    radius = rng.choice([0, 1, 2.5, 3, 7, 40])
+                    expected_list = [entity for entity in entity_list if Vec2.distance(entity.get_position(), center) <= radius]
+                    self.assertEqual(expected_list, grid.get_entity_list_in_radius(center, radius))
+
+                    max_distance = rng.choice([None, 0, 2, 5.5, 100])
+                    ignored_entity = rng.choice(entity_list + [None])
+                    candidate_list = [entity for entity in entity_list
+                        if entity is not ignored_entity and (None == max_distance or Vec2.distance(entity.get_position(), center) <= max_distance)]
+                    expected = min(candidate_list, key = lambda entity: distance_key(entity, center), default = None)
+                    self.assertIs(expected, grid.get_nearest_entity(center, max_distance, ignored_entity))
+
+                    target = Vec2(rng.randrange(dimension.x), rng.randrange(dimension.y))
+                    hit_list = [grid.get_entity(cell) for cell in bresenham_cell_list(center, target) if grid.get_entity(cell)]
+                    self.assertIs(hit_list[0] if hit_list else None, grid.raycast(center, target))
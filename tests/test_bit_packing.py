@@ -0,0 +1,28 @@
+from common.util import bit_packing as BitPacking
+
+import random
+import unittest
+
+
+class BitPackingTest(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for max_value in [0, 1, 3, 15, 255]:
+            for size in [0, 1, 2, 3, 7, 8, 9, 100, 1023]:
+                with self.subTest(max_value = max_value, size = size):
+                    value_list = [rng.randint(0, max_value) for i in range(size)]
+                    self.assertEqual(value_list, list(BitPacking.unpack(BitPacking.pack(value_list))))
+
+
+    def test_packed_size(self):
+        # Four values of 2 bits by byte, after the header.
+        header_size = len(BitPacking.pack([]))
+        self.assertEqual(header_size + 25, len(BitPacking.pack([3] * 100)))
+        self.assertEqual(header_size + 100, len(BitPacking.pack([255] * 100)))
+
+
+    def test_ground(self):
+        from server.ground import Ground
+
+        grid = Ground.fromSeed(24, "SEED").get_grid()
+        self.assertEqual(grid, list(BitPacking.unpack(BitPacking.pack(grid))))
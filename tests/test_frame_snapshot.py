@@ -0,0 +1,74 @@
+from common import message as Message, message_codec as MessageCodec
+from common.frame_snapshot import FrameSnapshot, SnapshotHistory
+from common.util.vec2 import Vec2
+
+import random
+import unittest
+
+
+def element_state(snapshot):
+    entity_set = {(entity.key, entity.character, entity.position, entity.direction) for entity in snapshot.get_entity_list()}
+    spell_set = {(spell.key, spell.spec_id, spell.position, spell.direction) for spell in snapshot.get_spell_list()}
+    return snapshot.get_step(), entity_set, spell_set
+
+
+def random_snapshot_list(rng, steps):
+    entity_dict = {key: Vec2(key, key) for key in range(8)}
+    spell_dict = {}
+    snapshot_list = []
+    for step in range(steps):
+        for key in entity_dict:
+            if rng.random() < 0.3:
+                entity_dict[key] = entity_dict[key] + Vec2(rng.choice([0, 1]), 1)
+        if rng.random() < 0.3:
+            spell_dict[100 + step] = Vec2(rng.randrange(20), rng.randrange(20))
+        for key in list(spell_dict):
+            if rng.random() < 0.1:
+                del spell_dict[key]
+            else:
+                spell_dict[key] = spell_dict[key] + Vec2(0, 1)
+
+        entity_list = [Message.Frame.Entity(key, chr(65 + key), position, 2) for key, position in entity_dict.items()]
+        spell_list = [Message.Frame.Spell(key, 1, position, 4) for key, position in spell_dict.items()]
+        snapshot_list.append(FrameSnapshot.from_lists(step, entity_list, spell_list))
+
+    return snapshot_list
+
+
+class FrameSnapshotTest(unittest.TestCase):
+    def test_keyframe(self):
+        snapshot = random_snapshot_list(random.Random(0), 5)[-1]
+        frame = snapshot.create_frame()
+        self.assertEqual(Message.Frame.KEYFRAME, frame.base_step)
+        self.assertEqual(element_state(snapshot), element_state(FrameSnapshot(0, {}, {}).apply_frame(frame)))
+
+
+    def test_delta_round_trip(self):
+        snapshot_list = random_snapshot_list(random.Random(1), 60)
+        codec = MessageCodec.get_codec(MessageCodec.BINARY)
+        for distance in [1, 2, 10]:
+            for base, snapshot in zip(snapshot_list, snapshot_list[distance:]):
+                with self.subTest(distance = distance, step = snapshot.get_step()):
+                    frame = codec.decode(codec.encode(snapshot.create_frame(base)))
+                    self.assertEqual(base.get_step(), frame.base_step)
+                    self.assertEqual(element_state(snapshot), element_state(base.apply_frame(frame)))
+
+
+    def test_delta_only_contains_changes(self):
+        entity_list = [Message.Frame.Entity(key, "A", Vec2(key, 0), 2) for key in range(4)]
+        base = FrameSnapshot.from_lists(1, entity_list, [])
+        moved_entity = Message.Frame.Entity(3, "A", Vec2(3, 1), 2)
+        snapshot = FrameSnapshot.from_lists(2, entity_list[:2] + [moved_entity], [])
+
+        frame = snapshot.create_frame(base)
+        self.assertEqual([3], [entity.key for entity in frame.entity_list])
+        self.assertEqual([2], frame.removed_key_list)
+
+
+class SnapshotHistoryTest(unittest.TestCase):
+    def test_size(self):
+        history = SnapshotHistory(3)
+        for step in range(10):
+            history.add(FrameSnapshot(step, {}, {}))
+
+        self.assertEqual([None, 7, 8, 9], [snapshot and snapshot.get_step() for snapshot in map(history.get, range(6, 10))])
@@ -0,0 +1,36 @@
+from common import message as Message
+from common import input_limiter
+from common.direction import Direction
+from common.input_limiter import InputLimiter
+
+import unittest
+import unittest.mock
+
+
+class InputLimiterTest(unittest.TestCase):
+    def play(self, limiter, tick_rate, seconds):
+        # A client that acknowledges every frame, turns on every tick and pings every second.
+        verdict_list = []
+        for tick in range(int(seconds * tick_rate)):
+            message_list = [Message.FrameAck(tick), Message.PlayerMovement(Direction.UP if tick % 2 else Direction.NONE, tick)]
+            if 0 == tick % tick_rate:
+                message_list.append(Message.Ping(tick))
+
+            with unittest.mock.patch.object(input_limiter.time, "time", return_value = 1000 + tick / tick_rate):
+                verdict_list.extend(limiter.check(message, "endpoint") for message in message_list)
+
+        return verdict_list
+
+
+    def test_default_tick_rate(self):
+        limiter = InputLimiter(60)
+        self.assertEqual((250, 500), limiter.get_connection_rate())
+        self.assertEqual((120, 120), limiter.get_rate(Message.FrameAck))
+        self.assertEqual({InputLimiter.Verdict.ACCEPT}, set(self.play(limiter, 60, 3)))
+
+
+    def test_high_tick_rate(self):
+        self.assertEqual({InputLimiter.Verdict.ACCEPT}, set(self.play(InputLimiter(240), 240, 3)))
+
+        # With the limits of a 60 Hz server, the same client would be dropped as a flood.
+        self.assertIn(InputLimiter.Verdict.DISCONNECT, self.play(InputLimiter(60), 240, 3))
@@ -0,0 +1,83 @@
+from common import message as Message, message_codec as MessageCodec
+from common.util.vec2 import Vec2
+
+import unittest
+
+
+def message_state(value):
+    if isinstance(value, list):
+        return [message_state(item) for item in value]
+
+    if hasattr(value, "__dict__"):
+        return value.__class__, {name: message_state(item) for name, item in vars(value).items()}
+
+    return value
+
+
+MESSAGE_LIST = [
+    Message.Version("0.1.0", MessageCodec.PREFERENCE_LIST, ["zlib"]),
+    Message.CheckedVersion("0.1.0", 1, MessageCodec.BINARY, "zlib"),
+    Message.GameInfo(["A", "B"], 4, 20, 32, "SEED"),
+    Message.Login("A"),
+    Message.LoginStatus(2, 2**64 - 1),
+    Message.PlayersInfo(["A", "B", "C"]),
+    Message.ArenaInfo("SEED", bytes(range(256))),
+    Message.Frame(1234,
+        [Message.Frame.Entity(140000000000, "A", Vec2(3, 4), 2), Message.Frame.Entity(140000000001, "B", Vec2(65535, 0), 8)],
+        [Message.Frame.Spell(140000000002, 1, Vec2(5, 6), 4)],
+        1200, [140000000003, 7]),
+    Message.Frame(0, [], [], Message.Frame.KEYFRAME, []),
+    Message.PlayerMovement(4, 1234),
+    Message.PlayerCast(1, -1),
+    Message.PointsInfo(),
+    Message.FrameAck(Message.Frame.KEYFRAME),
+    Message.UdpChannel(12345678901234),
+    Message.Ping(1700000000.25),
+    Message.Pong(1700000000.25, 1700000000.5),
+    Message.Heartbeat(1),
+    Message.Resume("0.1.0", MessageCodec.PREFERENCE_LIST, [], 42, "SEED"),
+]
+
+
+class MessageCodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        for name, codec in [("pickle", MessageCodec.PickleCodec()), (MessageCodec.BINARY, MessageCodec.get_codec(MessageCodec.BINARY))]:
+            for message in MESSAGE_LIST:
+                with self.subTest(codec = name, message = message.__class__.__name__):
+                    decoded = codec.decode(codec.encode(message))
+                    self.assertEqual(message_state(message), message_state(decoded))
+
+
+    def test_binary_is_smaller_than_pickle(self):
+        for message in MESSAGE_LIST:
+            with self.subTest(message = message.__class__.__name__):
+                binary_size = len(MessageCodec.get_codec(MessageCodec.BINARY).encode(message))
+                pickle_size = len(MessageCodec.PickleCodec().encode(message))
+                self.assertLess(binary_size, pickle_size)
+
+
+    def test_unknown_type_id(self):
+        with self.assertRaises(MessageCodec.CodecError):
+            MessageCodec.get_codec(MessageCodec.BINARY).decode(b"\xff")
+
+
+    def test_message_without_schema(self):
+        with self.assertRaises(MessageCodec.CodecError):
+            MessageCodec.get_codec(MessageCodec.BINARY).encode(object())
+
+
+    def test_negotiate(self):
+        self.assertEqual(MessageCodec.BINARY, MessageCodec.DEFAULT)
+        self.assertEqual(MessageCodec.BINARY, MessageCodec.negotiate(["pickle", MessageCodec.BINARY]))
+        self.assertEqual(MessageCodec.DEFAULT, MessageCodec.negotiate(["pickle"]))
+        self.assertEqual(MessageCodec.DEFAULT, MessageCodec.negotiate([]))
+
+
+    def test_pickle_is_not_a_network_codec(self):
+        with self.assertRaises(MessageCodec.CodecError):
+            MessageCodec.get_codec("pickle")
+
+        # Pickled data sent as a handshake is rejected by the default codec instead of being unpickled.
+        data = MessageCodec.PickleCodec().encode(Message.Version("0.1.0", ["pickle"], []))
+        with self.assertRaises(MessageCodec.CodecError):
+            MessageCodec.get_codec(MessageCodec.DEFAULT).decode(data)
@@ -0,0 +1,75 @@
+from common import netstring as Netstring
+
+import unittest
+
+
+def receive(deframer, data, chunk_size):
+    message_list = []
+    begin = 0
+    while begin < len(data):
+        buffer = deframer.get_buffer()
+        chunk = data[begin:begin + min(chunk_size, len(buffer))]
+        buffer[:len(chunk)] = chunk
+        deframer.buffer_updated(len(chunk))
+        begin += len(chunk)
+
+        message = deframer.next_message()
+        while None != message:
+            message_list.append(bytes(message))
+            message = deframer.next_message()
+
+    return message_list
+
+
+class DeframerTest(unittest.TestCase):
+    MESSAGE_LIST = [b"", b"a", b"hello", b"x" * 1000, bytes(range(256)) * 40, b"1:2,", b"last"]
+
+    def test_round_trip_by_chunks(self):
+        data = b"".join(Netstring.encode(message) for message in self.MESSAGE_LIST)
+        for chunk_size in [1, 2, 3, 7, 64, 1000, len(data)]:
+            with self.subTest(chunk_size = chunk_size):
+                self.assertEqual(self.MESSAGE_LIST, receive(Netstring.Deframer(16), data, chunk_size))
+
+
+    def test_feed(self):
+        deframer = Netstring.Deframer(16)
+        deframer.feed(b"".join(Netstring.encode(message) for message in self.MESSAGE_LIST))
+        message_list = []
+        message = deframer.next_message()
+        while None != message:
+            message_list.append(bytes(message))
+            message = deframer.next_message()
+
+        self.assertEqual(self.MESSAGE_LIST, message_list)
+
+
+    def test_drain(self):
+        deframer = Netstring.Deframer(16)
+        deframer.feed(b"5:hel")
+        self.assertEqual(None, deframer.next_message())
+        self.assertEqual(b"5:hel", deframer.drain())
+        deframer.feed(b"3:abc,")
+        self.assertEqual(b"abc", bytes(deframer.next_message()))
+
+
+    def test_message_too_big(self):
+        deframer = Netstring.Deframer(16, max_message_size = 10)
+        deframer.feed(b"11:")
+        with self.assertRaises(Netstring.NetstringError):
+            deframer.next_message()
+
+
+    def test_invalid_header(self):
+        for data in [b"a:b,", b"-1:", b"1234567890123456789"]:
+            with self.subTest(data = data):
+                deframer = Netstring.Deframer(16, max_message_size = 1000)
+                deframer.feed(data)
+                with self.assertRaises(Netstring.NetstringError):
+                    deframer.next_message()
+
+
+    def test_invalid_terminator(self):
+        deframer = Netstring.Deframer(16)
+        deframer.feed(b"3:abc;")
+        with self.assertRaises(Netstring.NetstringError):
+            deframer.next_message()
@@ -0,0 +1,28 @@
+from common.package_queue import PackageQueue, InputPack
+
+import unittest
+
+
+class PackageQueueTest(unittest.TestCase):
+    def test_try_enqueue_input(self):
+        package_queue = PackageQueue(max_input_size = 2)
+        released_list = []
+        package_queue.set_input_slot_listener(lambda: released_list.append(True))
+
+        self.assertTrue(package_queue.try_enqueue_input(InputPack("A", "endpoint")))
+        self.assertTrue(package_queue.try_enqueue_input(InputPack("B", "endpoint")))
+        self.assertFalse(package_queue.try_enqueue_input(InputPack("C", "endpoint")))
+
+        # The signals do not take input slots.
+        self.assertTrue(package_queue.try_enqueue_input(InputPack("signal", None)))
+
+        self.assertEqual("A", package_queue.dequeue_input(0).message)
+        self.assertEqual([True], released_list)
+        self.assertTrue(package_queue.try_enqueue_input(InputPack("C", "endpoint")))
+
+        # Only a failed try waits for a slot.
+        self.assertEqual("B", package_queue.dequeue_input(0).message)
+        self.assertEqual([True], released_list)
+        self.assertEqual("signal", package_queue.dequeue_input(0).message)
+        self.assertEqual("C", package_queue.dequeue_input(0).message)
+        self.assertEqual(None, package_queue.dequeue_input(0))
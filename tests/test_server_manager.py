@@ -0,0 +1,65 @@
+from common import message as Message
+from common.direction import Direction
+from server.server_manager import ServerManager
+
+import unittest
+
+ENDPOINT = ("endpoint", 1)
+
+
+def create_server_manager():
+    server_manager = ServerManager(1, 10, 24, "SEED")
+    server_manager.set_scheduler(lambda delay, callback: None)
+    server_manager._login_request(Message.Login("A"), ENDPOINT)
+    server_manager.new_arena()
+    server_manager._arena_enabled = True # the player events are accepted without starting the tick scheduler
+    get_output_message_list(server_manager)
+    return server_manager
+
+
+def get_output_message_list(server_manager):
+    message_list = []
+    output_pack = server_manager.dequeue_output()
+    while output_pack:
+        message_list.append(output_pack.message)
+        output_pack = server_manager.dequeue_output()
+
+    return message_list
+
+
+class ServerManagerTest(unittest.TestCase):
+    def test_cast(self):
+        server_manager = create_server_manager()
+        control = server_manager._room.get_player_with_endpoint(ENDPOINT).get_control()
+
+        server_manager._player_cast_request(Message.PlayerCast(1, 0), ENDPOINT)
+        self.assertEqual([], get_output_message_list(server_manager))
+        self.assertFalse(control.is_idle())
+
+
+    def test_cast_with_unknown_skill(self):
+        server_manager = create_server_manager()
+        control = server_manager._room.get_player_with_endpoint(ENDPOINT).get_control()
+
+        # The skill becomes the spec id of the frame spells: an unknown skill closes the connection instead.
+        for skill_id in [0, 3, 300]:
+            server_manager._player_cast_request(Message.PlayerCast(skill_id, 0), ENDPOINT)
+            self.assertEqual([""], get_output_message_list(server_manager))
+            self.assertTrue(control.is_idle())
+
+
+    def test_event_without_player(self):
+        server_manager = create_server_manager()
+        server_manager._arena_enabled = False
+        unknown_endpoint = ("endpoint", 2)
+
+        # The connection is closed, without reaching the player checks.
+        request_list = [
+            (server_manager._player_movement_request, Message.PlayerMovement(Direction.UP, 0)),
+            (server_manager._player_cast_request, Message.PlayerCast(1, 0)),
+        ]
+        for endpoint in [ENDPOINT, unknown_endpoint]:
+            for request, message in request_list:
+                with self.subTest(endpoint = endpoint, message = message.__class__.__name__):
+                    request(message, endpoint)
+                    self.assertEqual([""], get_output_message_list(server_manager))
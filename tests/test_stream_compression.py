@@ -0,0 +1,26 @@
+from common import stream_compression as StreamCompression, netstring as Netstring
+
+import unittest
+
+
+class StreamCompressionTest(unittest.TestCase):
+    def test_round_trip_by_chunks(self):
+        compressor = StreamCompression.create_compressor(StreamCompression.ZLIB)
+        decompressor = StreamCompression.create_decompressor(StreamCompression.ZLIB, 4096, 16 * 1024)
+        for index in range(100):
+            data = Netstring.encode(b"message %d " % index * (index % 7 + 1))
+            self.assertEqual(data, decompressor.decompress(compressor.compress(data)))
+
+
+    def test_output_limit(self):
+        compressor = StreamCompression.create_compressor(StreamCompression.ZLIB)
+        decompressor = StreamCompression.create_decompressor(StreamCompression.ZLIB, 4096, 16 * 1024)
+        bomb = compressor.compress(b"0" * 10 * 1024 * 1024)
+        with self.assertRaises(StreamCompression.StreamCompressionError):
+            decompressor.decompress(bomb[:4096])
+
+
+    def test_negotiate(self):
+        self.assertEqual(StreamCompression.ZLIB, StreamCompression.negotiate([StreamCompression.ZLIB]))
+        self.assertEqual(StreamCompression.NONE, StreamCompression.negotiate([]))
+        self.assertEqual(None, StreamCompression.create_compressor(StreamCompression.NONE))
@@ -0,0 +1,40 @@
+from common.util.vec2 import Vec2
+
+import unittest
+
+
+class Vec2Test(unittest.TestCase):
+    def test_equality(self):
+        self.assertEqual(Vec2(1, 2), Vec2(1, 2))
+        self.assertNotEqual(Vec2(1, 2), Vec2(2, 1))
+        self.assertEqual(hash(Vec2(1, 2)), hash(Vec2(1, 2)))
+        self.assertEqual({Vec2(1, 2): "A"}, {Vec2(1, 2): "A"})
+
+        # A vector is equal only to another vector, as when it was not a tuple.
+        self.assertFalse(Vec2(1, 2) == (1, 2))
+        self.assertTrue(Vec2(1, 2) != (1, 2))
+        self.assertFalse((1, 2) == Vec2(1, 2))
+        self.assertNotIn((1, 2), {Vec2(1, 2)})
+
+
+    def test_tuple_behaviour(self):
+        # The coordinates can be unpacked.
+        x, y = Vec2(1, 2)
+        self.assertEqual((1, 2), (x, y))
+
+        # The vectors are neither ordered nor repeated.
+        with self.assertRaises(TypeError):
+            Vec2(1, 2) < Vec2(2, 1)
+        with self.assertRaises(TypeError):
+            Vec2(1, 2) >= Vec2(2, 1)
+        with self.assertRaises(TypeError):
+            Vec2(1, 2) * 2
+        with self.assertRaises(TypeError):
+            2 * Vec2(1, 2)
+
+
+    def test_operations(self):
+        self.assertEqual(Vec2(4, 6), Vec2(1, 2) + Vec2(3, 4))
+        self.assertEqual(Vec2(-2, -2), Vec2(1, 2) - Vec2(3, 4))
+        self.assertEqual(Vec2(3, 2), Vec2.from_index(Vec2(3, 2).to_index(7), 7))
+        self.assertEqual(5, Vec2.distance(Vec2(0, 0), Vec2(3, 4)))